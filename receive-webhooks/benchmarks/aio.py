@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Concurrent webhooks per process: threads with the synchronous resources against asyncio with
+# resources.aio. Each webhook is verified, looked up (DEDUP_MODE=read), claimed in DynamoDB and
+# written to S3, against fakes with a simulated round trip. Threads block for every call, so
+# in-flight webhooks are bounded by the pool; coroutines only hold their state while waiting.
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+import benchmarks
+from benchmarks import events, fakes, ingest
+
+os.environ["DEDUP_MODE"] = "read"
+
+
+class InFlight:
+    def __init__(self) -> None:
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> None:
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc_info: Any) -> None:
+        with self._lock:
+            self.current -= 1
+
+
+def _item(provider: Any, event_id: str) -> Dict[str, Any]:
+    from app import constants, keys
+
+    return {
+        constants.PARTITION_KEY: keys.partition_key(provider.get_provider_name(), event_id),
+        constants.SORT_KEY: event_id,
+    }
+
+
+def handle(event: Dict[str, Any], name: str, s3: Any, dynamodb: Any, in_flight: InFlight) -> int:
+    from aws_lambda_powertools.utilities.data_classes import APIGatewayProxyEventV2
+
+    from app import providers
+
+    with in_flight:
+        provider = providers.PROVIDER_MAP[name](APIGatewayProxyEventV2(event))
+        if not provider.verify():
+            return 401
+        event_id = provider.get_event_id()
+        if provider.is_duplicate(event_id):
+            return 200
+        dynamodb.put_item(_item(provider, event_id), if_not_exists=True)
+        body = provider.body
+        s3.put_object(
+            f"raw/{name}/evt_{event_id}.json", body.data, digests=body.digests(*s3.CHECKSUM_DIGESTS)
+        )
+        return 200
+
+
+async def handle_async(
+    event: Dict[str, Any], name: str, s3: Any, dynamodb: Any, in_flight: InFlight
+) -> int:
+    from aws_lambda_powertools.utilities.data_classes import APIGatewayProxyEventV2
+
+    from app import providers
+
+    with in_flight:
+        provider = providers.PROVIDER_MAP[name](APIGatewayProxyEventV2(event))
+        if not await provider.verify_async():
+            return 401
+        event_id = provider.get_event_id()
+        if await provider.is_duplicate_async(event_id, dynamodb):
+            return 200
+        await dynamodb.put_item(_item(provider, event_id), if_not_exists=True)
+        body = provider.body
+        await s3.put_object(
+            f"raw/{name}/evt_{event_id}.json", body.data, digests=body.digests(*s3.CHECKSUM_DIGESTS)
+        )
+        return 200
+
+
+def run_threads(
+    name: str, requests: List[Dict[str, Any]], concurrency: int, fake: List[Any], latency: float
+) -> Dict[str, Any]:
+    from app import resources
+
+    for client in fake:
+        client.latency = latency
+    s3, dynamodb, in_flight = resources.S3(), resources.DynamoDB(), InFlight()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        statuses = list(
+            executor.map(lambda event: handle(event, name, s3, dynamodb, in_flight), requests)
+        )
+        threads = threading.active_count()
+    elapsed = time.perf_counter() - start
+    return _result("threads", concurrency, statuses, elapsed, in_flight.peak, threads)
+
+
+def run_asyncio(
+    name: str, requests: List[Dict[str, Any]], concurrency: int, fake: List[Any], latency: float
+) -> Dict[str, Any]:
+    from app import resources
+
+    async def main() -> List[int]:
+        for client in fake:
+            client.latency = 0.0
+        async with resources.AsyncClientPool(max_connections=concurrency) as pool:
+            fakes.install_async(pool, {"s3": fake[0], "dynamodb": fake[1]}, latency)
+            s3, dynamodb = resources.AsyncS3(pool), resources.AsyncDynamoDB(pool)
+            limit = asyncio.Semaphore(concurrency)
+
+            async def bounded(event: Dict[str, Any]) -> int:
+                async with limit:
+                    return await handle_async(event, name, s3, dynamodb, in_flight)
+
+            return await asyncio.gather(*(bounded(event) for event in requests))
+
+    in_flight = InFlight()
+    start = time.perf_counter()
+    statuses = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+    threads = threading.active_count()
+    return _result("asyncio", concurrency, statuses, elapsed, in_flight.peak, threads)
+
+
+def isolated(run: Callable[..., Dict[str, Any]], *args: Any) -> Dict[str, Any]:
+    """
+    Call run in a forked process, so the memory growth of each run is measured on its own
+    """
+
+    def target(connection: Any) -> None:
+        baseline = _status("VmRSS")
+        result = run(*args)
+        result["rss_growth_mb"] = (_status("VmHWM") - baseline) / 1024
+        connection.send(result)
+
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.get_context("fork").Process(target=target, args=(sender,))
+    process.start()
+    result = receiver.recv()
+    process.join()
+    return result
+
+
+def _status(field: str) -> int:
+    # in kB, from /proc (Linux only)
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _result(
+    mode: str, concurrency: int, statuses: List[int], elapsed: float, in_flight: int, threads: int
+) -> Dict[str, Any]:
+    counts: Dict[str, int] = {}
+    for status in statuses:
+        counts[str(status)] = counts.get(str(status), 0) + 1
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "throughput_rps": len(statuses) / elapsed,
+        "peak_in_flight": in_flight,
+        "threads": threads,
+        "statuses": dict(sorted(counts.items())),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent webhooks: threads against asyncio")
+    parser.add_argument("-n", "--requests", type=int, default=3000)
+    parser.add_argument("-p", "--provider", default="stripe")
+    parser.add_argument("-c", "--concurrency", type=int, action="append")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="simulated AWS latency")
+    args = parser.parse_args()
+
+    s3, dynamodb, _, _ = fakes.install(events.CREDENTIALS, ingest.PARAMETER_NAME)
+    if args.provider == "plaid":
+        fakes.install_plaid(events.plaid_jwk, events.CREDENTIALS)
+    from app import providers
+
+    providers.PROVIDER_MAP.preload(args.provider)
+    # credentials are fetched once up front, as they would be by earlier requests
+    providers.base.CREDENTIALS.get_parameter()
+
+    results = []
+    for concurrency in args.concurrency or [64, 512]:
+        for run in (run_threads, run_asyncio):
+            requests = ingest.build_events(args.provider, "unique", args.requests, 0)
+            latency = args.latency_ms / 1e3
+            results.append(
+                isolated(run, args.provider, requests, concurrency, [s3, dynamodb], latency)
+            )
+
+    print(
+        f"{'mode':<8} {'concurrency':>11} {'req/s':>8} {'in flight':>9} {'threads':>7} "
+        f"{'RSS +MB':>8}  statuses"
+    )
+    for result in results:
+        print(
+            f"{result['mode']:<8} {result['concurrency']:>11} {result['throughput_rps']:8.0f} "
+            f"{result['peak_in_flight']:>9} {result['threads']:>7} "
+            f"{result['rss_growth_mb']:8.1f}  {result['statuses']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
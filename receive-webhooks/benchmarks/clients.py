@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Per-request CPU cost of building a DynamoDB client versus using the shared registry.
+#
+# Lambda allocates CPU in proportion to memory, so run this with a matching CPU share to
+# approximate a 128 MB function (about 0.07 vCPU), e.g.:
+#
+#     docker run --rm --memory 128m --cpus 0.07 -v "$PWD":/src -w /src python:3.13 \
+#         sh -c "pip install -r requirements-dev.txt && python -m benchmarks.clients"
+
+import argparse
+import time
+
+import benchmarks  # noqa: F401
+
+import boto3
+
+from app import constants, resources
+
+
+def per_client(iterations: int) -> float:
+    session = boto3._get_default_session()
+    start = time.process_time()
+    for _ in range(iterations):
+        session.client("dynamodb", config=constants.BOTO3_CONFIG)
+    return (time.process_time() - start) / iterations
+
+
+def per_registry(iterations: int) -> float:
+    resources.clear_clients()
+    start = time.process_time()
+    for _ in range(iterations):
+        resources.DynamoDB()
+    return (time.process_time() - start) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DynamoDB client construction cost")
+    parser.add_argument("-n", "--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    # Pay the one-off loader costs before measuring either variant
+    per_client(1)
+
+    before = per_client(args.iterations)
+    after = per_registry(args.iterations)
+    print(f"client per request:   {before * 1e6:10.1f} us CPU")
+    print(f"registry per request: {after * 1e6:10.1f} us CPU")
+    print(f"speedup:              {before / after:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Init time per provider: each sample is a fresh interpreter that imports the Lambda handler
+# and resolves one provider, the same work a cold start does before its first request. The
+# "all" row preloads every provider (PRELOAD_PROVIDERS=all), matching eager imports.
+#
+# Run under a 128 MB / arm64 container to approximate the deployed function, e.g.:
+#
+#     docker run --rm --platform linux/arm64 --memory 128m --cpus 0.07 -v "$PWD":/src \
+#         -w /src python:3.13 sh -c "pip install -r requirements-dev.txt \
+#         -r src/dependencies/requirements.txt && python -m benchmarks.cold_start"
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import List, Optional
+
+import benchmarks
+
+from app.providers import PROVIDER_CLASSES
+
+SAMPLE = """
+import time
+start = time.perf_counter()
+import benchmarks
+import app.lambda_handler
+from app import providers
+if {name!r}:
+    providers.PROVIDER_MAP[{name!r}]
+print(time.perf_counter() - start)
+"""
+
+
+def measure(name: Optional[str], samples: int, preload: str = "") -> List[float]:
+    env = {**os.environ, "PRELOAD_PROVIDERS": preload}
+    cwd = os.path.dirname(os.path.dirname(benchmarks.SRC_DIR))
+    timings = []
+    for _ in range(samples):
+        output = subprocess.run(
+            [sys.executable, "-c", SAMPLE.format(name=name)],
+            capture_output=True,
+            check=True,
+            cwd=cwd,
+            env=env,
+            text=True,
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold start init time per provider")
+    parser.add_argument("-n", "--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = [("(none)", measure(None, args.samples))]
+    rows += [(name, measure(name, args.samples)) for name in PROVIDER_CLASSES]
+    rows.append(("all", measure(None, args.samples, preload="all")))
+
+    print(f"{'provider':<16} {'median ms':>10} {'min ms':>10}")
+    for name, timings in rows:
+        print(f"{name:<16} {statistics.median(timings) * 1e3:10.1f} {min(timings) * 1e3:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# CPU cost versus bytes saved for each available S3 payload encoding, measured on the
+# representative provider payloads (plus padded 64 KB bodies for the large case).
+
+import argparse
+import json
+import time
+from typing import List
+
+import benchmarks  # noqa: F401
+from benchmarks.payloads import PAYLOADS, pad, payload
+
+from app.resources import compression
+
+
+def measure(body: bytes, encoding: str, iterations: int) -> List[float]:
+    start = time.process_time()
+    for _ in range(iterations):
+        encoded = compression.compress(body, encoding)
+    compress_time = (time.process_time() - start) / iterations
+
+    start = time.process_time()
+    for _ in range(iterations):
+        compression.decompress(encoded, encoding)
+    decompress_time = (time.process_time() - start) / iterations
+
+    return [len(body), len(encoded), compress_time, decompress_time]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="S3 payload compression cost and savings")
+    parser.add_argument("-n", "--iterations", type=int, default=200)
+    parser.add_argument("--large", type=int, default=64 * 1024, help="padded body size")
+    args = parser.parse_args()
+
+    bodies = {name: json.dumps(payload(name)).encode() for name in PAYLOADS}
+    bodies["stripe (large)"] = json.dumps(pad(payload("stripe"), args.large)).encode()
+
+    print(
+        f"{'provider':<16} {'encoding':<9} {'bytes':>8} {'stored':>8} {'ratio':>6} "
+        f"{'comp us':>9} {'decomp us':>9}"
+    )
+    for name, body in bodies.items():
+        for encoding in compression.available_encodings()[1:]:
+            size, stored, comp, decomp = measure(body, encoding, args.iterations)
+            print(
+                f"{name:<16} {encoding:<9} {size:>8} {stored:>8} {size / stored:>6.1f} "
+                f"{comp * 1e6:>9.1f} {decomp * 1e6:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
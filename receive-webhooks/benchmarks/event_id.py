@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Cost of reading the event ID from the representative provider payloads (plus padded 256 KB
+# bodies): a full json.loads as before, a full parse with the fastest installed backend, and the
+# scan of RequestBody.get_field with and without orjson.
+
+import argparse
+import json
+import time
+from typing import Callable
+
+import benchmarks  # noqa: F401
+from benchmarks.payloads import PAYLOADS, pad, payload
+
+from app import jsonscan, providers
+from app.body import RequestBody
+
+
+def measure(func: Callable[[], object], iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Event ID extraction cost")
+    parser.add_argument("-n", "--iterations", type=int, default=200)
+    parser.add_argument("--large", type=int, default=256 * 1024, help="padded body size")
+    args = parser.parse_args()
+
+    paths = {}
+    for name in PAYLOADS:
+        provider_class = providers.PROVIDER_MAP.get(name)
+        if provider_class and provider_class.EVENT_ID_PATH:
+            paths[name] = provider_class.EVENT_ID_PATH.split(".")
+
+    bodies = {name: json.dumps(payload(name)).encode() for name in paths}
+    # the padding follows the ID in Stripe payloads and precedes it in Unit payloads
+    for name in ("stripe", "unit"):
+        if name in paths:
+            bodies[f"{name} (large)"] = json.dumps(pad(payload(name), args.large)).encode()
+
+    backend = jsonscan.orjson
+    print(f"full parse backend: {jsonscan.BACKEND}")
+    print(
+        f"{'provider':<16} {'bytes':>8} {'json us':>9} {'full us':>9} {'scan us':>9} "
+        f"{'scan (json) us':>15}"
+    )
+    for name, body in bodies.items():
+        path = paths[name.split(" ")[0]]
+        loads = measure(lambda: json.loads(body), args.iterations)
+        full = measure(lambda: jsonscan.loads(body), args.iterations)
+        scan = measure(lambda: RequestBody(body).get_field(path), args.iterations)
+        jsonscan.orjson = None
+        try:
+            scan_json = measure(lambda: RequestBody(body).get_field(path), args.iterations)
+        finally:
+            jsonscan.orjson = backend
+        print(
+            f"{name:<16} {len(body):>8} {loads * 1e6:>9.1f} {full * 1e6:>9.1f} "
+            f"{scan * 1e6:>9.1f} {scan_json * 1e6:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
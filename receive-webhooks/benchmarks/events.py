@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# API Gateway HTTP API (payload format 2.0) events carrying correctly signed webhook requests
+# for each provider, built from the sample bodies in benchmarks.payloads.
+
+import base64
+import hashlib
+import hmac
+import secrets
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jose import jwt
+
+__all__ = [
+    "CREDENTIALS",
+    "PLAID_KEY_ID",
+    "LambdaContext",
+    "UNSIGNED_BODIES",
+    "forged_basic",
+    "http_event",
+    "plaid_jwk",
+    "plaid_key",
+    "signed_event",
+]
+
+CREDENTIALS: Dict[str, str] = {
+    # Standard Webhooks style secret; HMAC providers use the whole string as their key
+    "webhook_secret": "whsec_" + base64.b64encode(secrets.token_bytes(24)).decode(),
+    "basic_auth_user": "webhooks",
+    "basic_auth_password": secrets.token_urlsafe(16),
+    # Plaid API keys, checked by the local stub of the verification key endpoint
+    "client_id": secrets.token_hex(12),
+    "client_secret": secrets.token_hex(15),
+}
+
+# Providers that only send credentials, so a forged request has wrong credentials rather than
+# an altered body
+UNSIGNED_BODIES = ("treasury_prime",)
+
+# Plaid signs with ES256 keys that fakes.PlaidStub serves by key ID
+PLAID_KEY_ID = "benchmark-" + secrets.token_hex(4)
+_PLAID_KEYS: Dict[str, ec.EllipticCurvePrivateKey] = {}
+
+
+@dataclass
+class LambdaContext:
+    function_name: str = "webhook-benchmark"
+    function_version: str = "$LATEST"
+    memory_limit_in_mb: int = 128
+    invoked_function_arn: str = "arn:aws:lambda:us-east-1:123456789012:function:webhook-benchmark"
+    aws_request_id: str = "00000000-0000-0000-0000-000000000000"
+    log_group_name: str = "/aws/lambda/webhook-benchmark"
+    log_stream_name: str = "benchmark"
+
+    def get_remaining_time_in_millis(self) -> int:
+        return 5000
+
+
+def http_event(path: str, body: str, headers: Dict[str, str]) -> Dict[str, Any]:
+    now = time.time()
+    return {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": path,
+        "rawQueryString": "",
+        "headers": {
+            "content-type": "application/json",
+            "content-length": str(len(body)),
+            "user-agent": "webhook-benchmark",
+            **{name.lower(): value for name, value in headers.items()},
+        },
+        "requestContext": {
+            "accountId": "123456789012",
+            "apiId": "benchmark",
+            "domainName": "benchmark.execute-api.us-east-1.amazonaws.com",
+            "http": {
+                "method": "POST",
+                "path": path,
+                "protocol": "HTTP/1.1",
+                "sourceIp": "192.0.2.1",
+                "userAgent": "webhook-benchmark",
+            },
+            "requestId": str(uuid.uuid4()),
+            "routeKey": "$default",
+            "stage": "$default",
+            "time": time.strftime("%d/%b/%Y:%H:%M:%S +0000", time.gmtime(now)),
+            "timeEpoch": int(now * 1000),
+        },
+        "body": body,
+        "isBase64Encoded": False,
+    }
+
+
+def _key() -> bytes:
+    return CREDENTIALS["webhook_secret"].encode()
+
+
+def _hex(algo: str, *parts: str) -> str:
+    return hmac.new(_key(), "".join(parts).encode(), algo).hexdigest()
+
+
+def _basic(password: Optional[str] = None) -> str:
+    user = f"{CREDENTIALS['basic_auth_user']}:{password or CREDENTIALS['basic_auth_password']}"
+    return "Basic " + base64.b64encode(user.encode()).decode()
+
+
+def forged_basic() -> str:
+    """
+    Basic credentials with the right user and a wrong password
+    """
+    return _basic(secrets.token_urlsafe(16))
+
+
+def _column(body: str) -> Dict[str, str]:
+    return {"Column-Signature": _hex("sha256", body)}
+
+
+def _dwolla(body: str) -> Dict[str, str]:
+    return {"X-Request-Signature-SHA-256": _hex("sha256", body)}
+
+
+def _lithic(body: str) -> Dict[str, str]:
+    message_id, timestamp = "msg_" + uuid.uuid4().hex, str(int(time.time()))
+    key = base64.b64decode(CREDENTIALS["webhook_secret"].removeprefix("whsec_"))
+    signed = f"{message_id}.{timestamp}.{body}".encode()
+    signature = base64.b64encode(hmac.new(key, signed, hashlib.sha256).digest()).decode()
+    return {
+        "webhook-id": message_id,
+        "webhook-timestamp": timestamp,
+        "webhook-signature": f"v1,{signature}",
+    }
+
+
+def _marqeta(body: str) -> Dict[str, str]:
+    return {
+        "Authorization": _basic(),
+        "X-Marqeta-Signature": _hex("sha1", body),
+        "X-Marqeta-Request-Trace-Id": str(uuid.uuid4()),
+    }
+
+
+def plaid_key(key_id: str) -> ec.EllipticCurvePrivateKey:
+    if key_id not in _PLAID_KEYS:
+        _PLAID_KEYS[key_id] = ec.generate_private_key(ec.SECP256R1())
+    return _PLAID_KEYS[key_id]
+
+
+def plaid_jwk(key_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Public JWK of a signing key, as /webhook_verification_key/get returns it
+    """
+    if key_id not in _PLAID_KEYS:
+        return None
+
+    numbers = _PLAID_KEYS[key_id].public_key().public_numbers()
+
+    def encode(value: int) -> str:
+        return base64.urlsafe_b64encode(value.to_bytes(32, "big")).rstrip(b"=").decode()
+
+    return {
+        "alg": "ES256",
+        "crv": "P-256",
+        "kid": key_id,
+        "kty": "EC",
+        "use": "sig",
+        "x": encode(numbers.x),
+        "y": encode(numbers.y),
+        "created_at": 1700000000,
+        "expired_at": None,
+    }
+
+
+def _plaid(body: str, key_id: str = PLAID_KEY_ID) -> Dict[str, str]:
+    pem = plaid_key(key_id).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    claims = {
+        "iat": int(time.time()),
+        "request_body_sha256": hashlib.sha256(body.encode()).hexdigest(),
+    }
+    token = jwt.encode(claims, pem.decode(), algorithm="ES256", headers={"kid": key_id})
+    return {"Plaid-Verification": token}
+
+
+def _solidfi(body: str) -> Dict[str, str]:
+    return {"sd-webhook-sha256-signature": _hex("sha256", body)}
+
+
+def _stripe(body: str) -> Dict[str, str]:
+    timestamp = str(int(time.time()))
+    return {"Stripe-Signature": f"t={timestamp},v1={_hex('sha256', timestamp, '.', body)}"}
+
+
+def _treasury_prime(body: str) -> Dict[str, str]:
+    return {"Authorization": _basic()}
+
+
+def _trolley(body: str) -> Dict[str, str]:
+    timestamp = str(int(time.time()))
+    return {
+        "X-PaymentRails-Signature": f"t={timestamp},v1={_hex('sha256', timestamp, body)}",
+        "X-PaymentRails-Delivery": str(uuid.uuid4()),
+    }
+
+
+def _unit(body: str) -> Dict[str, str]:
+    digest = hmac.new(_key(), body.encode(), "sha1").digest()
+    return {"x-unit-signature": base64.encodebytes(digest).decode().rstrip()}
+
+
+SIGNERS: Dict[str, Callable[[str], Dict[str, str]]] = {
+    "column": _column,
+    "dwolla": _dwolla,
+    "lithic": _lithic,
+    "marqeta": _marqeta,
+    "plaid": _plaid,
+    "solidfi": _solidfi,
+    "stripe": _stripe,
+    "treasury_prime": _treasury_prime,
+    "trolley": _trolley,
+    "unit": _unit,
+}
+
+
+def signed_event(provider: str, body: str) -> Dict[str, Any]:
+    """
+    Build an event for POST /<provider> with the provider's signature headers
+    """
+    return http_event(f"/{provider}", body, SIGNERS[provider](body))
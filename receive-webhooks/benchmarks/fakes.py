@@ -0,0 +1,639 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# In-memory stand-ins for the S3, DynamoDB, SSM and SQS clients, implementing the subset of the
+# botocore client API the function uses. Errors are raised as botocore ClientErrors so the
+# resources layer maps them exactly as it would in AWS. Plaid's verification key endpoint is
+# served over HTTP by PlaidStub, so the provider's pooled session is exercised as well.
+
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+__all__ = [
+    "FakeS3",
+    "FakeDynamoDB",
+    "FakeSSM",
+    "FakeSQS",
+    "PlaidStub",
+    "AsyncFakeClient",
+    "install",
+    "install_async",
+    "install_plaid",
+    "reset",
+]
+
+
+def _error(code: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+
+class _FakeClient:
+    def __init__(self, latency: float = 0.0, connect_latency: float = 0.0) -> None:
+        # simulated network round trip per call, and TCP + TLS handshake on the first call
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.calls: Dict[str, int] = {}
+        self._connected = False
+        self._lock = threading.Lock()
+
+    def _call(self, operation: str) -> None:
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            connecting, self._connected = not self._connected, True
+        delay = self.latency + (self.connect_latency if connecting else 0.0)
+        if delay:
+            time.sleep(delay)
+
+
+class FakeS3(_FakeClient):
+    def __init__(self, latency: float = 0.0, connect_latency: float = 0.0) -> None:
+        super().__init__(latency, connect_latency)
+        self.objects: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._versions = itertools.count(1)
+
+    def put_object(self, **params: Any) -> Dict[str, Any]:
+        self._call("put_object")
+        body = params["Body"]
+        if isinstance(body, str):
+            body = body.encode()
+        version_id = str(next(self._versions))
+        with self._lock:
+            self.objects[(params["Key"], version_id)] = {
+                **params,
+                "Body": bytes(body),
+                "LastModified": datetime.now(tz=timezone.utc),
+            }
+        return {"VersionId": version_id}
+
+    def list_objects_v2(self, **params: Any) -> Dict[str, Any]:
+        self._call("list_objects_v2")
+        with self._lock:
+            latest: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+            for (key, version_id), obj in self.objects.items():
+                if key.startswith(params.get("Prefix", "")):
+                    if key not in latest or int(version_id) > latest[key][0]:
+                        latest[key] = (int(version_id), obj)
+
+        after = params.get("ContinuationToken") or params.get("StartAfter") or ""
+        keys = sorted(key for key in latest if key > after)
+        page = keys[: params.get("MaxKeys", 1000)]
+        response: Dict[str, Any] = {
+            "Contents": [
+                {
+                    "Key": key,
+                    "Size": len(latest[key][1]["Body"]),
+                    "LastModified": latest[key][1]["LastModified"],
+                }
+                for key in page
+            ],
+            "IsTruncated": len(page) < len(keys),
+        }
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = page[-1]
+        return response
+
+    def get_object(self, **params: Any) -> Dict[str, Any]:
+        self._call("get_object")
+        obj = self._find(params["Key"], params.get("VersionId"))
+        body: bytes = obj["Body"]
+        if params.get("Range"):
+            start, end = re.fullmatch(r"bytes=(\d+)-(\d+)", params["Range"]).groups()
+            body = body[int(start) : int(end) + 1]
+        return {
+            "Body": io.BytesIO(body),
+            "ContentEncoding": obj.get("ContentEncoding"),
+            "ContentType": obj.get("ContentType"),
+            "Metadata": obj.get("Metadata", {}),
+        }
+
+    def head_object(self, **params: Any) -> Dict[str, Any]:
+        self._call("head_object")
+        try:
+            obj = self._find(params["Key"], params.get("VersionId"))
+        except ClientError:
+            raise _error("404", "HeadObject")
+        return {"ContentLength": len(obj["Body"]), "Metadata": obj.get("Metadata", {})}
+
+    def delete_object(self, **params: Any) -> Dict[str, Any]:
+        self._call("delete_object")
+        with self._lock:
+            self.objects.pop((params["Key"], params.get("VersionId")), None)
+        return {}
+
+    def _find(self, key: str, version_id: Optional[str]) -> Dict[str, Any]:
+        with self._lock:
+            versions = [(int(v), obj) for (k, v), obj in self.objects.items() if k == key]
+        if version_id:
+            versions = [(v, obj) for v, obj in versions if str(v) == version_id]
+        if not versions:
+            raise _error("NoSuchKey", "GetObject")
+        return max(versions, key=lambda version: version[0])[1]
+
+
+class _Condition:
+    """
+    Evaluates the subset of DynamoDB condition expressions the function uses: comparisons,
+    BETWEEN, attribute_exists / attribute_not_exists, begins_with, AND, OR, NOT and parentheses.
+    """
+
+    TOKENS = re.compile(r"\s*(\(|\)|<>|<=|>=|=|<|>|,|[#:]?[A-Za-z_][A-Za-z0-9_]*)")
+    COMPARISONS = {
+        "=": lambda a, b: a == b,
+        "<>": lambda a, b: a != b,
+        "<": lambda a, b: a < b,
+        "<=": lambda a, b: a <= b,
+        ">": lambda a, b: a > b,
+        ">=": lambda a, b: a >= b,
+    }
+
+    def __init__(self, expression: str, names: Dict[str, str], values: Dict[str, Any]) -> None:
+        self.tokens = self.TOKENS.findall(expression)
+        self.names = names
+        self.values = values
+
+    def evaluate(self, item: Optional[Dict[str, Any]]) -> bool:
+        self.item = item or {}
+        self.position = 0
+        return self._or()
+
+    def _next(self) -> str:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _or(self) -> bool:
+        result = self._and()
+        while self._peek() == "OR":
+            self._next()
+            result = self._and() or result
+        return result
+
+    def _and(self) -> bool:
+        result = self._not()
+        while self._peek() == "AND":
+            self._next()
+            result = self._not() and result
+        return result
+
+    def _not(self) -> bool:
+        if self._peek() == "NOT":
+            self._next()
+            return not self._not()
+        if self._peek() == "(":
+            self._next()
+            result = self._or()
+            self._next()  # )
+            return result
+        if self._peek() == "begins_with":
+            self._next()
+            self._next()  # (
+            value = self._operand()
+            self._next()  # ,
+            prefix = self._operand()
+            self._next()  # )
+            return isinstance(value, str) and value.startswith(prefix)
+        if self._peek() in ("attribute_exists", "attribute_not_exists"):
+            function = self._next()
+            self._next()  # (
+            exists = self.names[self._next()] in self.item
+            self._next()  # )
+            return exists if function == "attribute_exists" else not exists
+        left = self._operand()
+        operator = self._next()
+        if operator == "BETWEEN":
+            low = self._operand()
+            self._next()  # AND
+            high = self._operand()
+            return left is not None and low <= left <= high
+        right = self._operand()
+        if left is None or right is None:
+            return operator == "<>"
+        return self.COMPARISONS[operator](left, right)
+
+    def _operand(self) -> Any:
+        token = self._next()
+        value = (
+            self.values.get(token) if token.startswith(":") else self.item.get(self.names[token])
+        )
+        return _plain(value)
+
+
+def _plain(value: Optional[Dict[str, Any]]) -> Any:
+    # Comparable Python value of a serialized scalar attribute
+    if value is None:
+        return None
+    (kind, data), *_ = value.items()
+    return float(data) if kind == "N" else data
+
+
+class FakeDynamoDB(_FakeClient):
+    # Index name -> (partition key, sort key)
+    INDEXES = {
+        "gsi2": ("gsi1pk", "gsi1sk"),
+        "gsi3": ("gsi3pk", "arrived_at"),
+    }
+    # Index name -> non-key attributes it projects, for indexes that don't project every one
+    PROJECTIONS = {
+        "gsi2": (),
+        "gsi3": ("provider", "tenant", "storage", "s3", "segment", "content_encoding"),
+    }
+
+    def __init__(self, latency: float = 0.0, connect_latency: float = 0.0) -> None:
+        super().__init__(latency, connect_latency)
+        self.items: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    @staticmethod
+    def _key(key: Dict[str, Any]) -> Tuple[str, str]:
+        return (key["pk"]["S"], key["sk"]["S"])
+
+    @staticmethod
+    def _check(params: Dict[str, Any], item: Optional[Dict[str, Any]], operation: str) -> None:
+        expression = params.get("ConditionExpression")
+        if not expression:
+            return
+        condition = _Condition(
+            expression,
+            params.get("ExpressionAttributeNames", {}),
+            params.get("ExpressionAttributeValues", {}),
+        )
+        if not condition.evaluate(item):
+            error = _error("ConditionalCheckFailedException", operation)
+            if item and params.get("ReturnValuesOnConditionCheckFailure") == "ALL_OLD":
+                error.response["Item"] = dict(item)
+            raise error
+
+    def put_item(self, **params: Any) -> Dict[str, Any]:
+        self._call("put_item")
+        key = self._key(params["Item"])
+        with self._lock:
+            self._check(params, self.items.get(key), "PutItem")
+            self.items[key] = dict(params["Item"])
+        return {}
+
+    def get_item(self, **params: Any) -> Dict[str, Any]:
+        self._call("get_item")
+        with self._lock:
+            item = self.items.get(self._key(params["Key"]))
+        return {"Item": dict(item)} if item else {}
+
+    def update_item(self, **params: Any) -> Dict[str, Any]:
+        self._call("update_item")
+        key = self._key(params["Key"])
+        names = params.get("ExpressionAttributeNames", {})
+        values = params.get("ExpressionAttributeValues", {})
+        clauses = dict(
+            re.findall(
+                r"(SET|REMOVE|ADD) (.*?)(?= (?:SET|REMOVE|ADD) |$)", params["UpdateExpression"]
+            )
+        )
+        with self._lock:
+            self._check(params, self.items.get(key), "UpdateItem")
+            item = self.items.setdefault(key, dict(params["Key"]))
+            for assignment in filter(None, clauses.get("SET", "").split(", ")):
+                name, value = assignment.split(" = ")
+                item[names[name]] = values[value]
+            for name in filter(None, clauses.get("REMOVE", "").split(", ")):
+                item.pop(names[name], None)
+            for addition in filter(None, clauses.get("ADD", "").split(", ")):
+                name, value = addition.split(" ")
+                total = (_plain(item.get(names[name])) or 0) + _plain(values[value])
+                item[names[name]] = {"N": str(int(total) if total == int(total) else total)}
+            result = dict(item)
+        return {"Attributes": result} if params.get("ReturnValues") == "ALL_NEW" else {}
+
+    def delete_item(self, **params: Any) -> Dict[str, Any]:
+        self._call("delete_item")
+        with self._lock:
+            self.items.pop(self._key(params["Key"]), None)
+        return {}
+
+    def query(self, **params: Any) -> Dict[str, Any]:
+        self._call("query")
+        partition, sort = self.INDEXES.get(params.get("IndexName"), ("pk", "sk"))
+        names = params["ExpressionAttributeNames"]
+        values = params["ExpressionAttributeValues"]
+        condition = _Condition(params["KeyConditionExpression"], names, values)
+
+        def order(item: Dict[str, Any]) -> Tuple[Any, ...]:
+            return (_plain(item.get(sort)) or "", item["pk"]["S"], item["sk"]["S"])
+
+        with self._lock:
+            items = sorted(
+                (dict(item) for item in self.items.values() if partition in item),
+                key=order,
+            )
+        items = [item for item in items if condition.evaluate(item)]
+        projection = self.PROJECTIONS.get(params.get("IndexName"))
+        if projection is not None:
+            projected = {"pk", "sk", partition, sort, *projection}
+            items = [{name: item[name] for name in projected if name in item} for item in items]
+        if params.get("ExclusiveStartKey"):
+            start = order(params["ExclusiveStartKey"])
+            items = [item for item in items if order(item) > start]
+
+        limit = params.get("Limit") or len(items)
+        page, rest = items[:limit], items[limit:]
+        matching = page
+        if params.get("FilterExpression"):
+            # like DynamoDB, the filter applies to the page read, after the limit
+            matching_filter = _Condition(params["FilterExpression"], names, values)
+            matching = [item for item in page if matching_filter.evaluate(item)]
+        response: Dict[str, Any] = {"Items": matching, "Count": len(matching)}
+        if rest and page:
+            last = page[-1]
+            response["LastEvaluatedKey"] = {
+                name: last[name] for name in {"pk", "sk", partition, sort} if name in last
+            }
+        return response
+
+
+class FakeSSM(_FakeClient):
+    def __init__(
+        self, parameters: Dict[str, Any], latency: float = 0.0, connect_latency: float = 0.0
+    ) -> None:
+        super().__init__(latency, connect_latency)
+        self.parameters = parameters
+        self._versions: Dict[str, int] = {}
+
+    def get_parameter(self, **params: Any) -> Dict[str, Any]:
+        self._call("get_parameter")
+        name = params["Name"]
+        if name not in self.parameters:
+            raise _error("ParameterNotFound", "GetParameter")
+        value = self.parameters[name]
+        if not isinstance(value, str):
+            value = json.dumps(value)
+        return {"Parameter": {"Name": name, "Type": "String", "Value": value}}
+
+    def get_parameters_by_path(self, **params: Any) -> Dict[str, Any]:
+        self._call("get_parameters_by_path")
+        path = params["Path"].rstrip("/") + "/"
+        names = sorted(
+            name
+            for name in self.parameters
+            if name.startswith(path) and (params.get("Recursive") or "/" not in name[len(path) :])
+        )
+        after = params.get("NextToken") or ""
+        names = [name for name in names if name > after]
+        page = names[: params.get("MaxResults", 10)]
+        response: Dict[str, Any] = {"Parameters": [self._parameter(name) for name in page]}
+        if len(page) < len(names):
+            response["NextToken"] = page[-1]
+        return response
+
+    def put_parameter(self, **params: Any) -> Dict[str, Any]:
+        self._call("put_parameter")
+        name = params["Name"]
+        new = name not in self.parameters
+        if not new and not params.get("Overwrite"):
+            raise _error("ParameterAlreadyExists", "PutParameter")
+        with self._lock:
+            self.parameters[name] = params["Value"]
+            self._versions[name] = self._versions.get(name, 0 if new else 1) + 1
+        return {"Version": self._versions[name]}
+
+    def _parameter(self, name: str) -> Dict[str, Any]:
+        value = self.parameters[name]
+        if not isinstance(value, str):
+            value = json.dumps(value)
+        version = self._versions.get(name, 1)
+        return {"Name": name, "Type": "SecureString", "Value": value, "Version": version}
+
+
+class FakeSQS(_FakeClient):
+    def __init__(self, latency: float = 0.0, connect_latency: float = 0.0) -> None:
+        super().__init__(latency, connect_latency)
+        self.messages: List[Dict[str, Any]] = []
+        self._ids = itertools.count(1)
+
+    def send_message(self, **params: Any) -> Dict[str, Any]:
+        self._call("send_message")
+        message_id = str(next(self._ids))
+        attributes = {
+            name: {"stringValue": value["StringValue"], "dataType": value["DataType"]}
+            for name, value in params.get("MessageAttributes", {}).items()
+        }
+        with self._lock:
+            self.messages.append(
+                {
+                    "messageId": message_id,
+                    "body": params["MessageBody"],
+                    "messageAttributes": attributes,
+                }
+            )
+        return {"MessageId": message_id}
+
+    def get_queue_attributes(self, **params: Any) -> Dict[str, Any]:
+        self._call("get_queue_attributes")
+        return {"Attributes": {"QueueArn": "arn:aws:sqs:us-east-1:123456789012:benchmark"}}
+
+    def receive(self, batch_size: int = 10) -> List[Dict[str, Any]]:
+        """
+        Remove and return up to batch_size messages, shaped like SQS event source records
+        """
+        with self._lock:
+            records, self.messages[:batch_size] = self.messages[:batch_size], []
+        return records
+
+
+class PlaidStub(_FakeClient):
+    """
+    Local HTTP server answering POST /webhook_verification_key/get like Plaid does
+    """
+
+    def __init__(
+        self,
+        jwk: Callable[[str], Optional[Dict[str, Any]]],
+        credentials: Dict[str, Any],
+        latency: float = 0.0,
+    ) -> None:
+        super().__init__(latency)
+        # when set, every lookup is answered 200 with this body, like a failing gateway would
+        self.malformed: Optional[bytes] = None
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so pooled connections are reused
+            disable_nagle_algorithm = True
+
+            def do_POST(self) -> None:
+                stub._call("webhook_verification_key/get")
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                key = jwk(request.get("key_id", ""))
+                if stub.malformed is not None:
+                    self._send(200, stub.malformed)
+                elif (request.get("client_id"), request.get("secret")) != (
+                    credentials.get("client_id"),
+                    credentials.get("client_secret"),
+                ):
+                    self._reply(400, {"error_code": "INVALID_API_KEYS"})
+                elif key is None:
+                    self._reply(400, {"error_code": "INVALID_WEBHOOK_VERIFICATION_KEY_ID"})
+                else:
+                    self._reply(200, {"key": key, "request_id": "benchmark"})
+
+            def _reply(self, status: int, body: Dict[str, Any]) -> None:
+                self._send(status, json.dumps(body).encode())
+
+            def _send(self, status: int, data: bytes) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, name="plaid-stub", daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def install(
+    credentials: Dict[str, Any],
+    parameter_name: str,
+    latency: float = 0.0,
+    connect_latency: float = 0.0,
+) -> Tuple[FakeS3, FakeDynamoDB, FakeSSM, FakeSQS]:
+    """
+    Route every client the function creates to in-memory stand-ins.
+
+    Must run before any app module is imported, since they create their clients at import.
+    """
+    from aws_lambda_powertools.utilities.parameters import base, ssm
+
+    from app import resources
+
+    s3 = FakeS3(latency, connect_latency)
+    dynamodb = FakeDynamoDB(latency, connect_latency)
+    sqs = FakeSQS(latency, connect_latency)
+    parameters = FakeSSM({parameter_name: credentials}, latency, connect_latency)
+    resources.register_client("s3", s3)
+    resources.register_client("dynamodb", dynamodb)
+    resources.register_client("sqs", sqs)
+    resources.register_client("ssm", parameters)
+    base.DEFAULT_PROVIDERS["ssm"] = ssm.SSMProvider(boto3_client=parameters)
+    return s3, dynamodb, parameters, sqs
+
+
+class AsyncFakeClient:
+    """
+    Awaitable view of a fake client for resources.aio, sharing its store. Calls wait on a
+    bounded pool of `max_connections`, like aiobotocore's connector, and sleep on the event loop
+    instead of blocking a thread.
+    """
+
+    def __init__(
+        self,
+        client: _FakeClient,
+        latency: float = 0.0,
+        connect_latency: float = 0.0,
+        max_connections: int = 128,
+    ) -> None:
+        self.client = client
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.max_connections = max_connections
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._connections: Optional[asyncio.Semaphore] = None
+        self._opened = 0
+
+    def __getattr__(self, operation: str) -> Callable[..., Any]:
+        method = getattr(self.client, operation)
+
+        async def call(**params: Any) -> Dict[str, Any]:
+            if self._connections is None:
+                self._connections = asyncio.Semaphore(self.max_connections)
+            async with self._connections:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                delay = self.latency
+                if self._opened < self.max_connections:
+                    # until the pool is full, each call opens a new connection
+                    self._opened += 1
+                    delay += self.connect_latency
+                try:
+                    if delay:
+                        await asyncio.sleep(delay)
+                    return method(**params)
+                finally:
+                    self.in_flight -= 1
+
+        return call
+
+
+def install_async(
+    pool: Any,
+    clients: Dict[str, _FakeClient],
+    latency: float = 0.0,
+    connect_latency: float = 0.0,
+) -> Dict[str, AsyncFakeClient]:
+    """
+    Register async views of fakes by service name (e.g. the S3 and DynamoDB fakes returned by
+    install(), with their own latency set to 0) in a resources.AsyncClientPool
+    """
+    views = {}
+    for service, client in clients.items():
+        views[service] = AsyncFakeClient(client, latency, connect_latency, pool.max_connections)
+        pool.register(service, views[service])
+    return views
+
+
+def install_plaid(
+    jwk: Callable[[str], Optional[Dict[str, Any]]],
+    credentials: Dict[str, Any],
+    latency: float = 0.0,
+) -> PlaidStub:
+    """
+    Start a PlaidStub and point the Plaid provider at it. Must run before the provider is imported.
+    """
+    stub = PlaidStub(jwk, credentials, latency)
+    os.environ["PLAID_BASE_URL"] = stub.url
+    return stub
+
+
+def reset(*clients: _FakeClient) -> None:
+    for client in clients:
+        client.calls.clear()
+        for store in ("objects", "items", "messages"):
+            if hasattr(client, store):
+                getattr(client, store).clear()
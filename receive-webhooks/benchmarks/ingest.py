@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# End-to-end ingest benchmark: drives app.lambda_handler.handler with signed API Gateway
+# events for every provider, with S3, DynamoDB and SSM replaced by in-memory stand-ins.
+#
+#     python -m benchmarks.ingest --requests 500 --output results.json
+#
+# Scenarios:
+#   unique       every request is a new event
+#   retry-storm  every event is delivered RETRIES times in a row, as providers do on timeouts
+#   large        new events with bodies padded to --large-size bytes
+#   forged       new events whose body was altered after signing, rejected by verification
+#                (Treasury Prime only sends Basic credentials, so its password is wrong instead)
+
+import argparse
+import contextlib
+import copy
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+import benchmarks
+from benchmarks import events, fakes
+from benchmarks.payloads import pad, payload
+
+PARAMETER_NAME = "/webhook/credentials"
+RETRIES = 5
+SCENARIOS = ("unique", "retry-storm", "large", "forged")
+
+os.environ.setdefault("BUCKET_NAME", "webhook-benchmark")
+os.environ.setdefault("TABLE_NAME", "webhook-benchmark")
+os.environ.setdefault("KMS_KEY_ID", "alias/webhook-benchmark")
+os.environ.setdefault("SSM_PARAMETER", PARAMETER_NAME)
+
+
+def build_events(provider: str, scenario: str, count: int, large_size: int) -> List[Dict]:
+    if scenario == "retry-storm":
+        originals = build_events(provider, "unique", max(1, count // RETRIES), large_size)
+        return [copy.deepcopy(event) for event in originals for _ in range(RETRIES)][:count]
+
+    result = []
+    for _ in range(count):
+        body = payload(provider)
+        if scenario == "large":
+            body = pad(body, large_size)
+        event = events.signed_event(provider, json.dumps(body))
+        if scenario == "forged" and provider in events.UNSIGNED_BODIES:
+            event["headers"]["authorization"] = events.forged_basic()
+        elif scenario == "forged":
+            event["body"] = json.dumps({**body, "forged": True})
+        result.append(event)
+    return result
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run(
+    handler: Any, provider: str, scenario: str, count: int, large_size: int, alloc_samples: int
+) -> Dict[str, Any]:
+    requests = build_events(provider, scenario, count, large_size)
+    context = events.LambdaContext()
+
+    # The first request pays for lazy imports and client setup; report it on its own
+    start = time.perf_counter()
+    handler(build_events(provider, "unique", 1, large_size)[0], context)
+    first = time.perf_counter() - start
+
+    statuses: Dict[int, int] = {}
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for event in requests:
+        start = time.perf_counter()
+        response = handler(event, context)
+        latencies.append(time.perf_counter() - start)
+        statuses[response["statusCode"]] = statuses.get(response["statusCode"], 0) + 1
+    elapsed = time.perf_counter() - started
+
+    # Allocation profiling slows requests down, so it runs as a separate pass on fresh events
+    allocated: List[int] = []
+    tracemalloc.start()
+    for event in build_events(provider, scenario, alloc_samples, large_size):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        handler(event, context)
+        allocated.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    return {
+        "provider": provider,
+        "scenario": scenario,
+        "requests": count,
+        "statuses": {str(code): total for code, total in sorted(statuses.items())},
+        "throughput_rps": count / elapsed,
+        "first_ms": first * 1e3,
+        "p50_ms": percentile(latencies, 50) * 1e3,
+        "p95_ms": percentile(latencies, 95) * 1e3,
+        "p99_ms": percentile(latencies, 99) * 1e3,
+        "mean_ms": statistics.fmean(latencies) * 1e3,
+        "peak_alloc_kb": (statistics.fmean(allocated) / 1024) if allocated else None,
+    }
+
+
+def drain(handler: Any, queue: fakes.FakeSQS) -> Dict[str, Any]:
+    """
+    Persist everything enqueued by a run through the queue consumer, in batches of 10
+    """
+    context = events.LambdaContext()
+    messages = failures = 0
+    started = time.perf_counter()
+    while records := queue.receive(10):
+        messages += len(records)
+        failures += len(handler({"Records": records}, context)["batchItemFailures"])
+    elapsed = time.perf_counter() - started
+
+    return {
+        "consumed": messages,
+        "consumer_failures": failures,
+        "consumer_rps": messages / elapsed if elapsed else None,
+    }
+
+
+def commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            cwd=os.path.dirname(benchmarks.SRC_DIR),
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end ingest benchmark")
+    parser.add_argument("-n", "--requests", type=int, default=200, help="requests per run")
+    parser.add_argument("-p", "--provider", action="append", help="limit to these providers")
+    parser.add_argument("-s", "--scenario", action="append", choices=SCENARIOS)
+    parser.add_argument("--large-size", type=int, default=256 * 1024)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated AWS latency")
+    parser.add_argument("--alloc-samples", type=int, default=20)
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    parser.add_argument(
+        "--metrics", action="store_true", help="emit EMF metrics (discarded) to include their cost"
+    )
+    parser.add_argument(
+        "--ingest-mode",
+        choices=("direct", "queue"),
+        default="direct",
+        help="in queue mode, also time draining the queue through the consumer",
+    )
+    args = parser.parse_args()
+    if args.metrics:
+        os.environ["METRICS_ENABLED"] = "true"
+    os.environ["INGEST_MODE"] = args.ingest_mode
+
+    s3, dynamodb, ssm, sqs = fakes.install(
+        events.CREDENTIALS, PARAMETER_NAME, args.latency_ms / 1e3
+    )
+    plaid = fakes.install_plaid(events.plaid_jwk, events.CREDENTIALS, args.latency_ms / 1e3)
+
+    from app import ingest_handler, lambda_handler, providers
+
+    names = args.provider or [name for name in providers.PROVIDER_MAP if name in events.SIGNERS]
+    results = []
+    for scenario in args.scenario or SCENARIOS:
+        for name in names:
+            fakes.reset(s3, dynamodb, ssm, sqs, plaid)
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                result = run(
+                    lambda_handler.handler,
+                    name,
+                    scenario,
+                    args.requests,
+                    args.large_size,
+                    args.alloc_samples,
+                )
+            if args.ingest_mode == "queue":
+                result.update(drain(ingest_handler.handler, sqs))
+            result["aws_calls"] = {**s3.calls, **dynamodb.calls, **ssm.calls, **sqs.calls}
+            if plaid.calls:
+                result["plaid_calls"] = dict(plaid.calls)
+            results.append(result)
+
+    print(
+        f"{'scenario':<12} {'provider':<15} {'req/s':>8} {'first ms':>9} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8} {'alloc KB':>9}  statuses"
+    )
+    for r in results:
+        print(
+            f"{r['scenario']:<12} {r['provider']:<15} {r['throughput_rps']:>8.0f} "
+            f"{r['first_ms']:>9.2f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+            f"{r['peak_alloc_kb']:>9.1f}  {r['statuses']}"
+        )
+
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss_kb //= 1024
+    print(f"peak RSS: {peak_rss_kb / 1024:.1f} MB")
+
+    if args.output:
+        report = {
+            "commit": commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "args": vars(args),
+            "peak_rss_kb": peak_rss_kb,
+            "results": results,
+        }
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Representative webhook bodies per provider, shaped after each provider's documented events.
+
+import json
+import random
+import string
+import time
+import uuid
+from typing import Any, Callable, Dict
+
+__all__ = ["PAYLOADS", "payload", "pad"]
+
+
+def _id(prefix: str = "", length: int = 24) -> str:
+    return prefix + "".join(random.choices(string.ascii_letters + string.digits, k=length))
+
+
+def _stripe() -> Dict[str, Any]:
+    return {
+        "id": _id("evt_"),
+        "object": "event",
+        "api_version": "2024-06-20",
+        "created": int(time.time()),
+        "type": "payment_intent.succeeded",
+        "livemode": False,
+        "pending_webhooks": 1,
+        "request": {"id": _id("req_", 14), "idempotency_key": str(uuid.uuid4())},
+        "data": {
+            "object": {
+                "id": _id("pi_"),
+                "object": "payment_intent",
+                "amount": random.randint(100, 100000),
+                "amount_received": random.randint(100, 100000),
+                "currency": "usd",
+                "customer": _id("cus_", 14),
+                "description": "Subscription update",
+                "latest_charge": _id("ch_"),
+                "metadata": {"order_id": str(uuid.uuid4())},
+                "payment_method": _id("pm_"),
+                "payment_method_types": ["card"],
+                "status": "succeeded",
+                "charges": {
+                    "object": "list",
+                    "data": [
+                        {
+                            "id": _id("ch_"),
+                            "object": "charge",
+                            "amount": 2000,
+                            "billing_details": {
+                                "address": {"city": "Seattle", "country": "US", "state": "WA"},
+                                "email": "jenny.rosen@example.com",
+                                "name": "Jenny Rosen",
+                            },
+                            "outcome": {
+                                "network_status": "approved_by_network",
+                                "risk_level": "normal",
+                                "seller_message": "Payment complete.",
+                                "type": "authorized",
+                            },
+                            "payment_method_details": {
+                                "card": {"brand": "visa", "last4": "4242", "exp_year": 2030}
+                            },
+                        }
+                    ],
+                },
+            }
+        },
+    }
+
+
+def _column() -> Dict[str, Any]:
+    return {
+        "id": _id("evnt_"),
+        "created_at": "2026-10-17T12:00:00Z",
+        "type": "book.transfer.completed",
+        "data": {
+            "id": _id("book_"),
+            "amount": random.randint(1, 10**6),
+            "currency_code": "USD",
+            "sender_account_number_id": _id("acno_"),
+            "receiver_account_number_id": _id("acno_"),
+            "status": "completed",
+            "description": "Payroll",
+            "idempotency_key": str(uuid.uuid4()),
+        },
+    }
+
+
+def _dwolla() -> Dict[str, Any]:
+    event_id = str(uuid.uuid4())
+    return {
+        "id": event_id,
+        "resourceId": str(uuid.uuid4()),
+        "topic": "customer_transfer_completed",
+        "timestamp": "2026-10-17T12:00:00.000Z",
+        "_links": {
+            "self": {"href": f"https://api.dwolla.com/events/{event_id}"},
+            "account": {"href": f"https://api.dwolla.com/accounts/{uuid.uuid4()}"},
+            "resource": {"href": f"https://api.dwolla.com/transfers/{uuid.uuid4()}"},
+            "customer": {"href": f"https://api.dwolla.com/customers/{uuid.uuid4()}"},
+        },
+        "created": "2026-10-17T12:00:00.000Z",
+    }
+
+
+def _lithic() -> Dict[str, Any]:
+    return {
+        "event_type": "card_transaction.updated",
+        "token": str(uuid.uuid4()),
+        "payload": {
+            "token": str(uuid.uuid4()),
+            "card_token": str(uuid.uuid4()),
+            "amount": random.randint(1, 10000),
+            "status": "SETTLED",
+            "merchant": {"descriptor": "COFFEE SHOP", "mcc": "5814", "city": "NEW YORK"},
+            "events": [{"type": "AUTHORIZATION", "amount": 500, "result": "APPROVED"}],
+        },
+    }
+
+
+def _marqeta() -> Dict[str, Any]:
+    return {
+        "transactions": [
+            {
+                "token": str(uuid.uuid4()),
+                "type": "authorization",
+                "state": "PENDING",
+                "user_token": str(uuid.uuid4()),
+                "card_token": str(uuid.uuid4()),
+                "amount": 10.0,
+                "currency_code": "USD",
+                "network": "VISA",
+                "card_acceptor": {
+                    "mid": "000000000011111",
+                    "mcc": "6411",
+                    "name": "Chicken Tooth Music",
+                },
+                "gpa": {"currency_code": "USD", "ledger_balance": 20.0, "available_balance": 10.0},
+                "created_time": "2026-10-17T12:00:00Z",
+            }
+        ]
+    }
+
+
+def _solidfi() -> Dict[str, Any]:
+    return {
+        "eventType": "card.transaction",
+        "data": {
+            "id": str(uuid.uuid4()),
+            "accountId": str(uuid.uuid4()),
+            "amount": "12.34",
+            "status": "posted",
+            "merchant": {"name": "GROCERY", "category": "5411"},
+        },
+    }
+
+
+def _treasury_prime() -> Dict[str, Any]:
+    return {
+        "id": _id("wh_"),
+        "event": "ach.update",
+        "op": "update",
+        "url": f"https://api.treasuryprime.com/ach/{_id('ach_')}",
+    }
+
+
+def _trolley() -> Dict[str, Any]:
+    return {
+        "model": "payment",
+        "action": "updated",
+        "body": {
+            "payment": {
+                "id": _id("P-", 22),
+                "status": "processed",
+                "amount": "100.00",
+                "currency": "USD",
+                "recipient": {"id": _id("R-", 22), "email": "john@example.com"},
+            }
+        },
+    }
+
+
+def _unit() -> Dict[str, Any]:
+    return {
+        "data": [
+            {
+                "id": str(random.randint(10**6, 10**7)),
+                "type": "transaction.created",
+                "attributes": {"createdAt": "2026-10-17T12:00:00.000Z", "amount": 10000},
+                "relationships": {
+                    "account": {"data": {"id": "10001", "type": "account"}},
+                    "customer": {"data": {"id": "10000", "type": "customer"}},
+                },
+            }
+        ],
+        "id": str(random.randint(10**6, 10**7)),
+        "included": [],
+    }
+
+
+def _plaid() -> Dict[str, Any]:
+    return {
+        "webhook_type": "TRANSACTIONS",
+        "webhook_code": "SYNC_UPDATES_AVAILABLE",
+        "item_id": _id("", 37),
+        "initial_update_complete": True,
+        "historical_update_complete": False,
+        "environment": "production",
+    }
+
+
+PAYLOADS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "column": _column,
+    "dwolla": _dwolla,
+    "lithic": _lithic,
+    "marqeta": _marqeta,
+    "plaid": _plaid,
+    "solidfi": _solidfi,
+    "stripe": _stripe,
+    "treasury_prime": _treasury_prime,
+    "trolley": _trolley,
+    "unit": _unit,
+}
+
+
+def payload(provider: str) -> Dict[str, Any]:
+    return PAYLOADS[provider]()
+
+
+def pad(data: Dict[str, Any], size: int) -> Dict[str, Any]:
+    """
+    Grow a payload to roughly `size` bytes with realistic repeated line items
+    """
+
+    def line_item() -> Dict[str, Any]:
+        return {"id": _id("li_"), "description": "Line item", "amount": random.randint(1, 999)}
+
+    item_size = len(json.dumps(line_item())) + 2
+    count = max(0, (size - len(json.dumps(data))) // item_size + 1)
+    return {**data, "line_items": [line_item() for _ in range(count)]}
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Plaid verification key cache: many threads verifying with a key no container has seen yet, a
+# cold container whose key is already in the table, a key rotation that re-fetches the known keys
+# concurrently, repeated made-up key IDs and a Plaid outage answering with error bodies, against a
+# local stub of the Plaid endpoint. Also checks that different webhooks of one Item are all
+# stored, while a retry is a duplicate.
+#
+#     python -m benchmarks.plaid_keys --threads 32 --keys 4 --latency-ms 50
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import time
+from typing import Any, Callable, Dict
+
+import benchmarks  # noqa: F401
+from benchmarks import events, fakes
+from benchmarks.payloads import payload
+
+PARAMETER_NAME = "/webhook/credentials"
+
+os.environ.setdefault("BUCKET_NAME", "webhook-benchmark")
+os.environ.setdefault("TABLE_NAME", "webhook-benchmark")
+os.environ.setdefault("KMS_KEY_ID", "alias/webhook-benchmark")
+os.environ.setdefault("SSM_PARAMETER", PARAMETER_NAME)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Plaid verification key cache benchmark")
+    parser.add_argument("-t", "--threads", type=int, default=32, help="concurrent verifications")
+    parser.add_argument("-k", "--keys", type=int, default=4, help="keys known before a rotation")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="simulated Plaid latency")
+    parser.add_argument("--aws-latency-ms", type=float, default=5.0, help="simulated AWS latency")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    _, dynamodb, _, _ = fakes.install(events.CREDENTIALS, PARAMETER_NAME, args.aws_latency_ms / 1e3)
+    stub = fakes.install_plaid(events.plaid_jwk, events.CREDENTIALS, args.latency_ms / 1e3)
+
+    from app.providers import plaid
+
+    cache = plaid.VERIFICATION_KEYS
+    client_id, secret = events.CREDENTIALS["client_id"], events.CREDENTIALS["client_secret"]
+
+    def get(key_id: str) -> Any:
+        return cache.get(key_id, client_id, secret)
+
+    def run(name: str, func: Callable[[], Any]) -> Dict[str, Any]:
+        stub.calls.clear()
+        dynamodb.calls.clear()
+        start = time.perf_counter()
+        func()
+        return {
+            "scenario": name,
+            "ms": (time.perf_counter() - start) * 1e3,
+            "plaid_calls": sum(stub.calls.values()),
+            "dynamodb_calls": dict(dynamodb.calls),
+        }
+
+    def stampede() -> None:
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            keys = list(executor.map(get, [events.PLAID_KEY_ID] * args.threads))
+        assert all(key and key["kid"] == events.PLAID_KEY_ID for key in keys)
+
+    events.plaid_key(events.PLAID_KEY_ID)
+    results = [run(f"stampede x{args.threads}", stampede)]
+
+    # a new container: nothing in memory, the key is in the table
+    cache.clear()
+    results.append(run("cold container", lambda: get(events.PLAID_KEY_ID)))
+
+    # known keys are re-fetched concurrently when a new key ID shows up
+    known = [f"{events.PLAID_KEY_ID}-{idx}" for idx in range(args.keys)]
+    for key_id in known:
+        events.plaid_key(key_id)
+        get(key_id)
+    unknown_ttl, cache.unknown_ttl = cache.unknown_ttl, 0
+    rotated = f"{events.PLAID_KEY_ID}-rotated"
+    events.plaid_key(rotated)
+    results.append(run(f"rotation +{len(known) + 1} keys", lambda: get(rotated)))
+    cache.unknown_ttl = unknown_ttl
+
+    def made_up() -> None:
+        for _ in range(args.threads):
+            assert get("made-up") is None
+
+    results.append(run(f"unknown key x{args.threads}", made_up))
+
+    def outage() -> None:
+        # error bodies keep the stale key in use, and Plaid is called once per retry interval
+        for body in (b"<html>Bad Gateway</html>", b'{"error_code": "INTERNAL_SERVER_ERROR"}'):
+            cache.clear()
+            get(rotated)
+            ttl, cache.ttl = cache.ttl, 0
+            stub.malformed = body
+            calls = sum(stub.calls.values())
+            try:
+                for _ in range(args.threads):
+                    key = get(rotated)
+                    assert key and key["kid"] == rotated, key
+            finally:
+                stub.malformed = None
+                cache.ttl = ttl
+            assert sum(stub.calls.values()) == calls + 1, stub.calls
+
+    results.append(run(f"plaid outage x{args.threads}", outage))
+
+    iterations = 10000
+    results.append(
+        run(f"warm hits x{iterations}", lambda: [get(rotated) for _ in range(iterations)])
+    )
+
+    def same_item() -> None:
+        from app import lambda_handler
+
+        # webhooks of one Item share its item_id, retries share the whole body
+        body = payload("plaid")
+        updates = [body, {**body, "webhook_code": "DEFAULT_UPDATE"}, body]
+        context = events.LambdaContext()
+        for update in updates:
+            response = lambda_handler.handler(
+                events.signed_event("plaid", json.dumps(update)), context
+            )
+            assert response["statusCode"] == 200, response
+        stored = [
+            item for item in dynamodb.items.values() if item.get("provider") == {"S": "plaid"}
+        ]
+        assert len(stored) == 2, stored
+
+    results.append(run("same item x3", same_item))
+
+    print(f"{'scenario':<20} {'ms':>9} {'plaid':>6}  dynamodb")
+    for r in results:
+        print(f"{r['scenario']:<20} {r['ms']:>9.2f} {r['plaid_calls']:>6}  {r['dynamodb_calls']}")
+    print(f"cache: {cache.stats()}")
+    stub.close()
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"args": vars(args), "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
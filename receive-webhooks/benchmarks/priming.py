@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# First-request latency with and without init-phase priming (PRIME_ON_INIT). Each sample is a
+# fresh interpreter that imports the Lambda handler against fakes with a simulated round trip
+# per call and a simulated handshake on each client's first call, then sends two requests.
+# Priming moves the handshakes and first-use costs from the first request into init, which is
+# what provisioned concurrency and SnapStart keep off the request path.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+import benchmarks
+
+SAMPLE = """
+import json
+import time
+start = time.perf_counter()
+import benchmarks
+from benchmarks import events, fakes, ingest
+fakes.install(events.CREDENTIALS, ingest.PARAMETER_NAME, {latency}, {connect_latency})
+fakes.install_plaid(events.plaid_jwk, events.CREDENTIALS, {latency})
+from app import lambda_handler
+timings = {{"init": time.perf_counter() - start}}
+context = events.LambdaContext()
+for name, event in zip(("first", "second"), ingest.build_events({provider!r}, "unique", 2, 0)):
+    start = time.perf_counter()
+    status = lambda_handler.handler(event, context)["statusCode"]
+    timings[name] = time.perf_counter() - start
+    assert status == 200, status
+print(json.dumps(timings))
+"""
+
+
+def measure(mode: str, provider: str, samples: int, latency: float, connect: float) -> List[Dict]:
+    env = {
+        **os.environ,
+        "PRIME_ON_INIT": mode,
+        "PRELOAD_PROVIDERS": provider,
+        "AWS_LAMBDA_INITIALIZATION_TYPE": "provisioned-concurrency",
+    }
+    cwd = os.path.dirname(os.path.dirname(benchmarks.SRC_DIR))
+    code = SAMPLE.format(provider=provider, latency=latency, connect_latency=connect)
+    results = []
+    for _ in range(samples):
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            check=True,
+            cwd=cwd,
+            env=env,
+            text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="First-request latency with and without priming")
+    parser.add_argument("-n", "--samples", type=int, default=5)
+    parser.add_argument("-p", "--provider", default="stripe")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated round trip")
+    parser.add_argument("--connect-ms", type=float, default=30.0, help="simulated handshake")
+    args = parser.parse_args()
+
+    print(f"{'PRIME_ON_INIT':<14} {'init ms':>9} {'first ms':>9} {'second ms':>10}")
+    for mode in ("never", "provisioned"):
+        results = measure(
+            mode, args.provider, args.samples, args.latency_ms / 1e3, args.connect_ms / 1e3
+        )
+        medians = [
+            statistics.median(result[name] for result in results) * 1e3
+            for name in ("init", "first", "second")
+        ]
+        print(f"{mode:<14} {medians[0]:9.1f} {medians[1]:9.1f} {medians[2]:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Replay benchmark: archives webhooks through persistence.store_webhook against the in-memory
+# stand-ins, loses a share of their DynamoDB items, then runs app.replay as a dry run, as an
+# interrupted and resumed backfill, and as a rate limited dispatch to the worker handlers.
+#
+#     python -m benchmarks.replay --items 2000 --workers 16 --latency-ms 5
+
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict
+
+import benchmarks  # noqa: F401
+from benchmarks import events, fakes
+from benchmarks.payloads import payload
+
+os.environ.setdefault("BUCKET_NAME", "webhook-benchmark")
+os.environ.setdefault("TABLE_NAME", "webhook-benchmark")
+os.environ.setdefault("KMS_KEY_ID", "alias/webhook-benchmark")
+
+# one provider reading the event ID from the payload, one reading it from a header
+PROVIDERS = ("stripe", "trolley")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay benchmark")
+    parser.add_argument("-n", "--items", type=int, default=1000, help="archived webhooks")
+    parser.add_argument("-w", "--workers", type=int, default=16, help="replay threads")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated AWS latency")
+    parser.add_argument("--lost", type=float, default=0.2, help="share of items to delete")
+    parser.add_argument("--rate", type=float, default=500.0, help="dispatch rate limit")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    s3, dynamodb, _, _ = fakes.install(events.CREDENTIALS, "/webhook/credentials")
+
+    from app import constants, persistence, providers, replay, worker
+    from app.body import RequestBody
+
+    # keep provider imports out of the first run's throughput
+    providers.PROVIDER_MAP.preload(",".join(PROVIDERS))
+
+    start = datetime.now(tz=timezone.utc) - timedelta(minutes=1)
+    for idx in range(args.items):
+        provider = PROVIDERS[idx % len(PROVIDERS)]
+        data = payload(provider)
+        event_id = data.get("id", f"delivery_{idx}")
+        persistence.store_webhook(provider, event_id, RequestBody(json.dumps(data).encode()))
+    end = datetime.now(tz=timezone.utc) + timedelta(minutes=1)
+
+    lost = [key for idx, key in enumerate(list(dynamodb.items)) if idx % 100 < args.lost * 100]
+    for key in lost:
+        del dynamodb.items[key]
+
+    s3.latency = dynamodb.latency = args.latency_ms / 1e3
+    results: Dict[str, Any] = {"items": args.items, "lost": len(lost), "runs": []}
+
+    def run(name: str, provider: str, **kwargs: Any) -> Dict[str, Any]:
+        s3.calls.clear()
+        dynamodb.calls.clear()
+        report = replay.replay(provider, start, end, max_workers=args.workers, **kwargs)
+        report.update(run=name, aws_calls={**s3.calls, **dynamodb.calls})
+        results["runs"].append(report)
+        return report
+
+    for provider in PROVIDERS:
+        run("dry-run", provider, dry_run=True)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for provider in PROVIDERS:
+            # An interrupted run replayed and checkpointed the first half of the listing
+            path = os.path.join(directory, f"{provider}.log")
+            objects = list(replay.list_objects(provider, start, end))
+            checkpoint = replay.Checkpoint(path)
+            for webhook in objects[: len(objects) // 2]:
+                replay.replay_webhook(webhook, constants.REPLAY_TARGET_STORE)
+                checkpoint.add(webhook.key)
+            checkpoint.close()
+            run("resumed-backfill", provider, checkpoint=replay.Checkpoint(path))
+
+    results["restored"] = sum(1 for key in lost if key in dynamodb.items)
+
+    handled: Counter = Counter()
+    lock = threading.Lock()
+
+    def handler(item: Dict[str, Any], data: bytes) -> None:
+        with lock:
+            handled[(item["pk"], item["sk"])] += 1
+
+    for provider in PROVIDERS:
+        worker.register_handler(provider)(handler)
+        run(
+            "dispatch",
+            provider,
+            source=constants.REPLAY_SOURCE_DYNAMODB,
+            target=constants.REPLAY_TARGET_DISPATCH,
+            rate=args.rate,
+        )
+    results["dispatched"] = len(handled)
+    results["dispatched_more_than_once"] = sum(1 for count in handled.values() if count > 1)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Throughput of the long-running server (app.server) against the Lambda path. The Lambda row
+# calls app.lambda_handler.handler in-process, one request at a time, as a single execution
+# environment would. The server rows start app.server with fakes installed (inherited by its
+# forked workers) and drive it from client processes over keep-alive connections, so they also
+# pay for HTTP parsing and the loopback round trip.
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import statistics
+import time
+from typing import Any, Dict, List, Tuple
+
+import benchmarks
+from benchmarks import events, fakes, ingest
+
+Request = Tuple[str, Dict[str, str], bytes]
+
+_fork = multiprocessing.get_context("fork")
+
+
+def to_request(event: Dict[str, Any]) -> Request:
+    return event["rawPath"], event["headers"], event["body"].encode()
+
+
+def _client(
+    port: int, requests: List[Request], warmup: Request, barrier: Any, results: Any
+) -> None:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    path, headers, body = warmup
+    connection.request("POST", path, body, headers)
+    connection.getresponse().read()
+    barrier.wait()
+
+    statuses: Dict[int, int] = {}
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for path, headers, body in requests:
+        start = time.perf_counter()
+        connection.request("POST", path, body, headers)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+    results.put((started, time.perf_counter(), latencies, statuses))
+    connection.close()
+
+
+def _serve(workers: int, ports: Any) -> None:
+    from app import server
+
+    server.run(host="127.0.0.1", port=0, workers=workers, ready=ports.put)
+
+
+def _check(port: int, max_body_bytes: int, provider: str) -> Dict[str, int]:
+    """
+    Status of requests with bodies the server has to frame or reject itself. Clients send their
+    whole body before reading the response, so a rejection must not reset the connection.
+    """
+    path, headers, body = to_request(ingest.build_events(provider, "unique", 1, 0)[0])
+    oversized = b"x" * (max_body_bytes + 1)
+    # http.client only frames chunks itself without a Content-Length
+    del headers["content-length"]
+    requests = {
+        "too_large": (oversized, {}),
+        "chunked": (iter([body[:10], body[10:]]), headers),
+        "chunked_too_large": (iter([oversized[:max_body_bytes], oversized[-1:]]), {}),
+    }
+
+    checks = {}
+    for name, (data, request_headers) in requests.items():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        connection.request(
+            "POST", path, data, request_headers, encode_chunked=not isinstance(data, bytes)
+        )
+        checks[name] = connection.getresponse().status
+        connection.close()
+    return checks
+
+
+def run_server(
+    provider: str, count: int, workers: int, clients: int, checks: bool
+) -> Dict[str, Any]:
+    ports = _fork.Queue()
+    master = _fork.Process(target=_serve, args=(workers, ports))
+    master.start()
+    port = ports.get(timeout=30)
+
+    requests = [to_request(event) for event in ingest.build_events(provider, "unique", count, 0)]
+    warmups = [to_request(event) for event in ingest.build_events(provider, "unique", clients, 0)]
+    barrier, results = _fork.Barrier(clients), _fork.Queue()
+    processes = [
+        _fork.Process(
+            target=_client,
+            args=(port, requests[index::clients], warmups[index], barrier, results),
+        )
+        for index in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get(timeout=300) for _ in processes]
+    for process in processes:
+        process.join()
+
+    result = {"mode": "server", "workers": workers, "clients": clients}
+    if checks:
+        from app import server
+
+        result["checks"] = _check(port, server.MAX_BODY_BYTES, provider)
+
+    start = time.perf_counter()
+    os.kill(master.pid, signal.SIGTERM)
+    master.join()
+    result["shutdown_ms"] = (time.perf_counter() - start) * 1e3
+    return {**result, **_summarize(outcomes, count)}
+
+
+def run_lambda(provider: str, count: int) -> Dict[str, Any]:
+    from app import lambda_handler
+
+    context = events.LambdaContext()
+    lambda_handler.handler(ingest.build_events(provider, "unique", 1, 0)[0], context)
+
+    statuses: Dict[int, int] = {}
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for event in ingest.build_events(provider, "unique", count, 0):
+        start = time.perf_counter()
+        status = lambda_handler.handler(event, context)["statusCode"]
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+    outcome = (started, time.perf_counter(), latencies, statuses)
+    return {"mode": "lambda", "workers": 1, "clients": 1, **_summarize([outcome], count)}
+
+
+def _summarize(outcomes: List[Tuple], count: int) -> Dict[str, Any]:
+    elapsed = max(end for _, end, _, _ in outcomes) - min(start for start, _, _, _ in outcomes)
+    latencies = [latency for _, _, values, _ in outcomes for latency in values]
+    statuses: Dict[str, int] = {}
+    for _, _, _, counts in outcomes:
+        for status, total in counts.items():
+            statuses[str(status)] = statuses.get(str(status), 0) + total
+    return {
+        "throughput_rps": count / elapsed,
+        "p50_ms": ingest.percentile(latencies, 50) * 1e3,
+        "p99_ms": ingest.percentile(latencies, 99) * 1e3,
+        "mean_ms": statistics.fmean(latencies) * 1e3,
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Long-running server against the Lambda path")
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("-p", "--provider", default="stripe")
+    parser.add_argument("-w", "--workers", type=int, action="append", help="worker counts")
+    parser.add_argument("-c", "--clients", type=int, help="client connections (2 per worker)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated AWS latency")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("PRIME_ON_INIT", "never")
+    fakes.install(events.CREDENTIALS, ingest.PARAMETER_NAME, args.latency_ms / 1e3)
+    if args.provider == "plaid":
+        fakes.install_plaid(events.plaid_jwk, events.CREDENTIALS, args.latency_ms / 1e3)
+
+    # servers first, so their workers fork before this process imports the handler
+    results = []
+    for index, workers in enumerate(args.workers or sorted({1, os.cpu_count() or 1})):
+        clients = args.clients or 2 * workers
+        results.append(run_server(args.provider, args.requests, workers, clients, index == 0))
+    results.insert(0, run_lambda(args.provider, args.requests))
+
+    print(
+        f"{'mode':<8} {'workers':>7} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'mean ms':>8}  statuses"
+    )
+    for result in results:
+        print(
+            f"{result['mode']:<8} {result['workers']:>7} {result['clients']:>7} "
+            f"{result['throughput_rps']:8.0f} {result['p50_ms']:8.2f} {result['p99_ms']:8.2f} "
+            f"{result['mean_ms']:8.2f}  {result['statuses']}"
+        )
+    for result in results:
+        if "checks" in result:
+            print(f"body framing checks: {result['checks']}")
+        if "shutdown_ms" in result:
+            print(f"{result['workers']} worker(s) stopped in {result['shutdown_ms']:.0f} ms")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Tenant index: bulk loads N tenants from SSM parameters and from table items, refreshes after a
+# share of them changed, measures lookups, and sends webhooks to /stripe/<tenant> signed with
+# the tenant's own secret, with another tenant's secret, and for an unknown tenant.
+#
+#     python -m benchmarks.tenants --tenants 5000 --latency-ms 5
+
+import argparse
+import contextlib
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from typing import Any, Dict
+
+import benchmarks  # noqa: F401
+from benchmarks import events, fakes
+from benchmarks.payloads import payload
+
+os.environ.setdefault("BUCKET_NAME", "webhook-benchmark")
+os.environ.setdefault("TABLE_NAME", "webhook-benchmark")
+os.environ.setdefault("KMS_KEY_ID", "alias/webhook-benchmark")
+os.environ.setdefault("SSM_PARAMETER", "/webhook/credentials")
+
+
+def stripe_headers(body: str, secret: str) -> Dict[str, str]:
+    timestamp = str(int(time.time()))
+    signature = hmac.new(secret.encode(), f"{timestamp}.{body}".encode(), hashlib.sha256)
+    return {"Stripe-Signature": f"t={timestamp},v1={signature.hexdigest()}"}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tenant index benchmark")
+    parser.add_argument("-n", "--tenants", type=int, default=5000)
+    parser.add_argument("--changed", type=float, default=0.01, help="share changed on refresh")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated AWS latency")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    _, dynamodb, ssm, _ = fakes.install(events.CREDENTIALS, "/webhook/credentials")
+
+    from app import constants, lambda_handler, resources, tenants
+
+    secrets_by_tenant = {
+        f"tenant-{idx}": "whsec_" + secrets.token_hex(16) for idx in range(args.tenants)
+    }
+    table = resources.DynamoDB()
+    for name, secret in secrets_by_tenant.items():
+        credentials = {"webhook_secret": secret}
+        ssm.parameters[f"{constants.TENANT_PARAMETER_PATH}{name}"] = credentials
+        table.put_item(
+            {
+                constants.PARTITION_KEY: constants.TENANT_PARTITION,
+                constants.SORT_KEY: name,
+                "credentials": credentials,
+                "version": 1,
+            }
+        )
+    dynamodb.latency = ssm.latency = args.latency_ms / 1e3
+
+    results: Dict[str, Any] = {"tenants": args.tenants, "runs": []}
+    changed = [name for idx, name in enumerate(secrets_by_tenant) if idx % 100 < args.changed * 100]
+    for source in (constants.TENANT_SOURCE_SSM, constants.TENANT_SOURCE_DYNAMODB):
+        index = tenants.TenantIndex(source, constants.TENANT_PARAMETER_PATH, 300)
+        for phase in ("load", "refresh"):
+            if phase == "refresh":
+                for name in changed:
+                    credentials = {"webhook_secret": "whsec_" + secrets.token_hex(16)}
+                    if source == constants.TENANT_SOURCE_SSM:
+                        ssm.put_parameter(
+                            Name=f"{constants.TENANT_PARAMETER_PATH}{name}",
+                            Value=json.dumps(credentials),
+                            Overwrite=True,
+                        )
+                    else:
+                        table.put_item(
+                            {
+                                constants.PARTITION_KEY: constants.TENANT_PARTITION,
+                                constants.SORT_KEY: name,
+                                "credentials": credentials,
+                                "version": 2,
+                            }
+                        )
+            dynamodb.calls.clear()
+            ssm.calls.clear()
+            start = time.perf_counter()
+            stats = index.load()
+            elapsed = time.perf_counter() - start
+            results["runs"].append(
+                {
+                    "source": source,
+                    "phase": phase,
+                    "ms": elapsed * 1e3,
+                    **stats,
+                    "calls": {**dynamodb.calls, **ssm.calls},
+                }
+            )
+
+    names = list(secrets_by_tenant)
+    iterations = 200_000
+    start = time.perf_counter()
+    for idx in range(iterations):
+        index.get(names[idx % len(names)])
+    results["lookup_ns"] = (time.perf_counter() - start) / iterations * 1e9
+
+    # end to end with the table-loaded index, for tenants that did not change
+    tenants.TENANTS = index
+    tenant, other = names[-1], names[-2]
+    cases = {
+        "own secret": (tenant, secrets_by_tenant[tenant]),
+        "other tenant's secret": (tenant, secrets_by_tenant[other]),
+        "unknown tenant": ("no-such-tenant", secrets_by_tenant[tenant]),
+    }
+    statuses = {}
+    for case, (name, secret) in cases.items():
+        body = json.dumps(payload("stripe"))
+        event = events.http_event(f"/stripe/{name}", body, stripe_headers(body, secret))
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            response = lambda_handler.handler(event, events.LambdaContext())
+        statuses[case] = int(response["statusCode"])
+    results["statuses"] = statuses
+    results["stored_under"] = sorted({key[0] for key in dynamodb.items if key[0] != "TENANT"})
+
+    print(f"{'source':<10} {'phase':<8} {'ms':>9} {'tenants':>8} {'changed':>8}  calls")
+    for r in results["runs"]:
+        print(
+            f"{r['source']:<10} {r['phase']:<8} {r['ms']:>9.1f} {r['tenants']:>8} "
+            f"{r['changed']:>8}  {r['calls']}"
+        )
+    print(f"lookup: {results['lookup_ns']:.0f} ns")
+    print(f"statuses: {statuses}")
+    print(f"stored under: {results['stored_under']}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Pending-index worker benchmark: stores webhooks through persistence.store_webhook, then
+# drains the PENDING index with several concurrent workers against the in-memory
+# stand-ins, and checks that every item was handled exactly once.
+#
+#     python -m benchmarks.worker --items 2000 --workers 4 --latency-ms 5
+
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import threading
+import time
+from typing import Any, Dict
+
+import benchmarks  # noqa: F401
+from benchmarks import events, fakes
+from benchmarks.payloads import PAYLOADS, payload
+
+os.environ.setdefault("BUCKET_NAME", "webhook-benchmark")
+os.environ.setdefault("TABLE_NAME", "webhook-benchmark")
+os.environ.setdefault("KMS_KEY_ID", "alias/webhook-benchmark")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pending-index worker benchmark")
+    parser.add_argument("-n", "--items", type=int, default=1000, help="pending items to drain")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="concurrent workers")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated AWS latency")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="handler failure rate")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    s3, dynamodb, _, _ = fakes.install(events.CREDENTIALS, "/webhook/credentials")
+
+    from app import persistence, worker
+    from app.body import RequestBody
+
+    providers = sorted(PAYLOADS)
+    for idx in range(args.items):
+        provider = providers[idx % len(providers)]
+        body = RequestBody(json.dumps(payload(provider)).encode())
+        persistence.store_webhook(provider, f"evt_{idx}", body)
+
+    handled: Counter = Counter()
+    lock = threading.Lock()
+
+    def handler(item: Dict[str, Any], data: bytes) -> None:
+        with lock:
+            handled[(item["pk"], item["sk"])] += 1
+            failing = handled[(item["pk"], item["sk"])] == 1 and (
+                hash(item["sk"]) % 1000 < args.fail_rate * 1000
+            )
+        if failing:
+            raise RuntimeError("simulated handler failure")
+
+    for provider in providers:
+        worker.register_handler(provider)(handler)
+
+    s3.latency = dynamodb.latency = args.latency_ms / 1e3
+    s3.calls.clear()
+    dynamodb.calls.clear()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        runs = list(pool.map(lambda n: worker.process_pending(f"worker-{n}"), range(args.workers)))
+    elapsed = time.perf_counter() - started
+
+    outcomes: Counter = Counter()
+    for stats in runs:
+        outcomes.update(stats)
+    statuses = Counter(item.get("status", {}).get("S") for item in dynamodb.items.values())
+    duplicates = sum(1 for count in handled.values() if count > 1)
+
+    result = {
+        "items": args.items,
+        "workers": args.workers,
+        "latency_ms": args.latency_ms,
+        "elapsed_s": elapsed,
+        "items_per_minute": len(handled) / elapsed * 60,
+        "outcomes": dict(outcomes),
+        "statuses": dict(statuses),
+        "handled_more_than_once": duplicates,
+        "aws_calls": {**s3.calls, **dynamodb.calls},
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import base64
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import json
+import os
+from typing import Dict, Any, List, Tuple
+import uuid
+
+from aws_lambda_powertools import Logger
+
+from app import constants, exceptions, persistence, resources
+
+__all__ = ["archive_records", "build_segment"]
+
+logger = Logger(child=True)
+
+s3 = resources.S3()
+dynamodb = resources.DynamoDB()
+
+SEGMENT_WINDOW = int(os.getenv(constants.ENV_SEGMENT_WINDOW, constants.SEGMENT_WINDOW))
+
+
+@dataclass(slots=True, frozen=True)
+class StagedRecord:
+    sequence_number: str
+    item: Dict[str, Any]
+
+
+def archive_records(records: List[Dict[str, Any]]) -> List[str]:
+    """
+    Move staged payloads from DynamoDB stream records into per-provider segment objects.
+
+    Returns the sequence numbers of records that could not be archived.
+    """
+    groups: Dict[Tuple[str, datetime], List[StagedRecord]] = defaultdict(list)
+    for record in records:
+        image = record.get("dynamodb", {}).get("NewImage")
+        if record.get("eventName") != "INSERT" or not image:
+            continue
+
+        item = _deserialize(image)
+        if item.get("storage") != constants.STORAGE_STAGED:
+            continue
+
+        window = _window_start(item["arrived_at"])
+        sequence_number = record["dynamodb"]["SequenceNumber"]
+        groups[(item["provider"], window)].append(StagedRecord(sequence_number, item))
+
+    failed: List[str] = []
+    for (provider, window), staged in groups.items():
+        try:
+            failed.extend(_write_segment(provider, window, staged))
+        except exceptions.S3PutError:
+            failed.extend(record.sequence_number for record in staged)
+
+    return failed
+
+
+def build_segment(items: List[Dict[str, Any]]) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """
+    Build a gzip NDJSON segment and the (offset, length) of each item within it.
+
+    Every line is compressed as its own gzip member. The concatenation is still a valid gzip
+    stream, and any single record can be read back with a ranged GET.
+    """
+    segment = bytearray()
+    ranges: List[Tuple[int, int]] = []
+    for item in items:
+        record = {
+            "event_id": item[constants.SORT_KEY],
+            "provider": item["provider"],
+            "arrived_at": item["arrived_at"],
+            "payload": persistence.read_payload(item).decode(),
+        }
+        if item.get("tenant"):
+            record["tenant"] = item["tenant"]
+        line = json.dumps(record, separators=(",", ":"))
+        member = resources.compress(line.encode() + b"\n", resources.compression.GZIP)
+        ranges.append((len(segment), len(member)))
+        segment += member
+
+    return bytes(segment), ranges
+
+
+def _write_segment(provider: str, window: datetime, staged: List[StagedRecord]) -> List[str]:
+    body, ranges = build_segment([record.item for record in staged])
+
+    key = f"raw/{provider}/segments/{window:%Y/%m/%d/%H%M%S}-{uuid.uuid4().hex}.ndjson.gz"
+    metadata = {
+        "provider": provider,
+        "window_start": window.isoformat().replace("+00:00", "Z"),
+        "records": str(len(staged)),
+    }
+    obj = s3.put_object(
+        key,
+        body,
+        metadata,
+        content_type="application/x-ndjson",
+        content_encoding=resources.compression.GZIP,
+    )
+    logger.info("Wrote segment", key=obj.key, records=len(staged), size=len(body))
+
+    failed: List[str] = []
+    for record, (offset, length) in zip(staged, ranges):
+        item_key = {
+            constants.PARTITION_KEY: record.item[constants.PARTITION_KEY],
+            constants.SORT_KEY: record.item[constants.SORT_KEY],
+        }
+        segment = {
+            "bucket": obj.bucket,
+            "key": obj.key,
+            "version_id": obj.version_id,
+            "offset": offset,
+            "length": length,
+        }
+        try:
+            dynamodb.update_item(
+                item_key,
+                {"storage": constants.STORAGE_SEGMENT, "segment": segment},
+                remove=["payload", "content_encoding"],
+                if_exists=True,
+            )
+        except exceptions.NotFoundError:
+            # the item was already processed and removed, nothing left to point at the segment
+            pass
+        except exceptions.DynamoDBWriteError:
+            # the payload is still staged in the item, so a retry writes it to a new segment
+            failed.append(record.sequence_number)
+
+    return failed
+
+
+def _deserialize(image: Dict[str, Any]) -> Dict[str, Any]:
+    # Stream records carry binary attributes base64 encoded
+    decoded = {
+        name: {"B": base64.b64decode(value["B"])} if "B" in value else value
+        for name, value in image.items()
+    }
+    return dynamodb.deserialize(decoded)
+
+
+def _window_start(arrived_at: str) -> datetime:
+    timestamp = datetime.fromisoformat(arrived_at.replace("Z", "+00:00")).timestamp()
+    return datetime.fromtimestamp(timestamp - timestamp % SEGMENT_WINDOW, tz=timezone.utc)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import base64
+from typing import Any, Dict, Optional, Sequence
+
+from aws_lambda_powertools.utilities.data_classes.common import BaseProxyEvent
+
+from app import jsonscan
+from app.resources.checksums import compute_digests
+
+__all__ = ["RequestBody"]
+
+
+_UNPARSED = object()
+
+
+class RequestBody:
+    """
+    Immutable request body decoded once per request and shared by verification, hashing and
+    upload, so large payloads are not re-encoded or re-hashed by every stage.
+    """
+
+    __slots__ = ("data", "_digests", "_text", "_json")
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self._digests: Dict[str, bytes] = {}
+        self._text: Optional[str] = None
+        self._json: Any = _UNPARSED
+
+    @classmethod
+    def from_event(cls, event: BaseProxyEvent) -> "RequestBody":
+        body = event.body or ""
+        if event.is_base64_encoded:
+            return cls(base64.b64decode(body))
+        return cls(body.encode())
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __bool__(self) -> bool:
+        return bool(self.data)
+
+    @property
+    def view(self) -> memoryview:
+        return memoryview(self.data)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.data.decode()
+        return self._text
+
+    @property
+    def json(self) -> Any:
+        """
+        Body parsed as JSON, with orjson when installed
+        """
+        if self._json is _UNPARSED:
+            self._json = jsonscan.loads(self.data)
+        return self._json
+
+    def get_field(self, path: Sequence[str]) -> Any:
+        """
+        Return the JSON value at `path` (e.g. ("data", "id")) or None, scanning the body only up
+        to the value when that is cheaper than parsing it
+        """
+        if self._json is _UNPARSED and jsonscan.should_scan(len(self.data)):
+            try:
+                return jsonscan.scan(self.text, path)
+            except (jsonscan.ScanAborted, ValueError):
+                # malformed bodies raise the same error as the full parse would
+                pass
+        return jsonscan.lookup(self.json, path)
+
+    def digest(self, algorithm: str) -> bytes:
+        return self.digests(algorithm)[algorithm]
+
+    def digests(self, *algorithms: str) -> Dict[str, bytes]:
+        """
+        Return the requested digests, computing any missing ones together in one pass
+        """
+        missing = [algorithm for algorithm in algorithms if algorithm not in self._digests]
+        if missing:
+            self._digests.update(compute_digests(self.data, missing))
+        return {algorithm: self._digests[algorithm] for algorithm in algorithms}
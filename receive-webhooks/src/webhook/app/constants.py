@@ -41,8 +41,233 @@ ENV_BUCKET_PREFIX = "BUCKET_PREFIX"
 ENV_KMS_KEY_ID = "KMS_KEY_ID"
 ENV_TABLE_NAME = "TABLE_NAME"
 ENV_SSM_PARAMETER = "SSM_PARAMETER"
+ENV_DEDUP_MODE = "DEDUP_MODE"
+ENV_DEDUP_CACHE_SIZE = "DEDUP_CACHE_SIZE"
+ENV_DEDUP_CACHE_TTL = "DEDUP_CACHE_TTL"
+ENV_PERSIST_CONCURRENTLY = "PERSIST_CONCURRENTLY"
+ENV_CLAIM_TIMEOUT = "CLAIM_TIMEOUT"
+ENV_PRELOAD_PROVIDERS = "PRELOAD_PROVIDERS"
+ENV_CREDENTIALS_TTL = "CREDENTIALS_TTL"
+ENV_CREDENTIALS_REFRESH = "CREDENTIALS_REFRESH"
+ENV_INLINE_MAX_BYTES = "INLINE_MAX_BYTES"
+ENV_INLINE_COMPRESSION = "INLINE_COMPRESSION"
+ENV_ARCHIVE_MODE = "ARCHIVE_MODE"
+ENV_SEGMENT_WINDOW = "SEGMENT_WINDOW"
+ENV_S3_COMPRESSION = "S3_COMPRESSION"
+ENV_S3_COMPRESSION_MIN_BYTES = "S3_COMPRESSION_MIN_BYTES"
+ENV_S3_CHECKSUM_ALGORITHM = "S3_CHECKSUM_ALGORITHM"
+ENV_METRICS_ENABLED = "METRICS_ENABLED"
+ENV_INGEST_MODE = "INGEST_MODE"
+ENV_QUEUE_URL = "QUEUE_URL"
+ENV_WORKER_HANDLERS = "WORKER_HANDLERS"
+ENV_WORKER_LEASE = "WORKER_LEASE"
+ENV_PENDING_SHARDS = "PENDING_SHARDS"
+ENV_PARTITION_SCHEME = "PARTITION_SCHEME"
+ENV_PARTITION_SHARDS = "PARTITION_SHARDS"
+ENV_SIGNATURE_TOLERANCE = "SIGNATURE_TOLERANCE"
+ENV_PLAID_BASE_URL = "PLAID_BASE_URL"
+ENV_PLAID_KEY_TTL = "PLAID_KEY_TTL"
+ENV_PLAID_KEY_CACHE_SIZE = "PLAID_KEY_CACHE_SIZE"
+ENV_TENANT_SOURCE = "TENANT_SOURCE"
+ENV_TENANT_PARAMETER_PATH = "TENANT_PARAMETER_PATH"
+ENV_TENANT_REFRESH = "TENANT_REFRESH"
+ENV_PRIME_ON_INIT = "PRIME_ON_INIT"
+ENV_SERVER_HOST = "SERVER_HOST"
+ENV_SERVER_PORT = "SERVER_PORT"
+ENV_SERVER_WORKERS = "SERVER_WORKERS"
+ENV_SERVER_MAX_BODY_BYTES = "SERVER_MAX_BODY_BYTES"
+ENV_SERVER_KEEP_ALIVE = "SERVER_KEEP_ALIVE"
+ENV_SERVER_GRACEFUL_TIMEOUT = "SERVER_GRACEFUL_TIMEOUT"
+ENV_ASYNC_MAX_CONNECTIONS = "ASYNC_MAX_CONNECTIONS"
 
 PARTITION_KEY = "pk"
 SORT_KEY = "sk"
 
+# Partition key schemes: "STRIPE", or "STRIPE#<shard>" with the shard derived from the event ID
+# so that a single provider's events are spread over PARTITION_SHARDS partitions
+PARTITION_SCHEME_PROVIDER = "provider"
+PARTITION_SCHEME_SHARDED = "sharded"
+PARTITION_SHARDS = 16
+
+# Index of items waiting to be processed, keyed by gsi1pk and ordered by arrival (gsi1sk).
+# Pending items are spread over PENDING_SHARDS partitions ("PENDING#0".."PENDING#<n-1>") by
+# a hash of their event ID, so ingest bursts don't throttle on a single index partition.
+# gsi2 only projects keys. It replaced gsi1, which had the same keys and projected every attribute.
+PENDING_INDEX = "gsi2"
+PENDING_PARTITION_KEY = "gsi1pk"
+PENDING_SORT_KEY = "gsi1sk"
+PENDING_SHARDS = 8
+
+# Index of every item by arrival: keyed by the item's partition key and UTC day in gsi3pk (e.g.
+# "STRIPE#2026-10-17") and ordered by arrived_at, so a time window is read one day bucket at a
+# time. Payloads are not projected; inline and staged ones are read from the table.
+ARRIVAL_INDEX = "gsi3"
+ARRIVAL_PARTITION_KEY = "gsi3pk"
+ARRIVAL_SORT_KEY = "arrived_at"
+
+# Processing states; PENDING and FAILED are also the gsi1pk values that keep an item indexed
+STATUS_PENDING = "PENDING"
+STATUS_PROCESSING = "PROCESSING"
+STATUS_DONE = "DONE"
+STATUS_FAILED = "FAILED"
+
+# Deduplication modes
+DEDUP_MODE_READ = "read"  # GetItem before writing
+DEDUP_MODE_CONDITIONAL = "conditional"  # conditional PutItem claims the event ID
+
+# An S3-backed item is written as a claim carrying CLAIMED_AT (epoch seconds), which is removed
+# once the payload is stored. Claims older than CLAIM_TIMEOUT were left by an attempt that died
+# between its writes and may be taken over; it is longer than the ingest function's timeout.
+CLAIMED_AT = "claimed_at"
+CLAIM_TIMEOUT = 60  # seconds
+
+# In-process cache of recently persisted event IDs
+DEDUP_CACHE_SIZE = 1024
+DEDUP_CACHE_TTL = 300  # seconds
+
+# Cached webhook credentials are refreshed in the background once they are within
+# CREDENTIALS_REFRESH seconds of CREDENTIALS_TTL, and fetched inline once fully expired
+CREDENTIALS_TTL = 300  # seconds
+CREDENTIALS_REFRESH = 60  # seconds
+
+# Where the credentials of /<provider>/<tenant> routes are loaded from: one JSON parameter per
+# tenant under TENANT_PARAMETER_PATH, or items of the table under TENANT_PARTITION (sort key =
+# tenant) with a `credentials` map. Tenants are loaded at init and re-listed every
+# TENANT_REFRESH seconds in the background.
+TENANT_SOURCE_NONE = "none"
+TENANT_SOURCE_SSM = "ssm"
+TENANT_SOURCE_DYNAMODB = "dynamodb"
+TENANT_PARAMETER_PATH = "/webhook/tenants/"
+TENANT_PARTITION = "TENANT"
+TENANT_REFRESH = 300  # seconds
+
+# Signed timestamps further than this from the current time are rejected as replays
+SIGNATURE_TOLERANCE = 300  # seconds
+
+# Reasons a request is rejected, used as the `reason` dimension of the rejection metrics
+REJECT_UNKNOWN_PROVIDER = "UnknownProvider"
+REJECT_UNKNOWN_TENANT = "UnknownTenant"
+REJECT_MISSING_BODY = "MissingBody"
+REJECT_MISSING_SIGNATURE = "MissingSignature"
+REJECT_MALFORMED_SIGNATURE = "MalformedSignature"
+REJECT_STALE_TIMESTAMP = "StaleTimestamp"
+REJECT_NOT_CONFIGURED = "NotConfigured"  # credentials missing from the SSM parameter
+REJECT_INVALID_CREDENTIALS = "InvalidCredentials"
+REJECT_INVALID_SIGNATURE = "InvalidSignature"
+REJECT_KEY_UNAVAILABLE = "KeyUnavailable"  # the verification key could not be fetched
+
+# Plaid signs webhooks with rotating keys fetched by key ID from /webhook_verification_key/get.
+# Known keys are re-fetched after PLAID_KEY_TTL seconds to learn whether they have expired,
+# unknown key IDs are remembered for PLAID_UNKNOWN_KEY_TTL seconds, and fetched keys are stored
+# in the table under PLAID_KEY_PARTITION (sort key = key ID) so cold containers start warm.
+PLAID_BASE_URL = "https://production.plaid.com"
+PLAID_KEY_TTL = 3600  # seconds
+PLAID_UNKNOWN_KEY_TTL = 60  # seconds
+# After a failed re-fetch the stale key is served for this long before Plaid is called again
+PLAID_KEY_RETRY_INTERVAL = 30  # seconds
+PLAID_KEY_CACHE_SIZE = 32
+PLAID_KEY_PARTITION = "JWK#PLAID"
+PLAID_MAX_WORKERS = 4
+PLAID_TIMEOUT = (1.0, 2.0)  # connect and read timeouts, in seconds, within the function timeout
+
+# Payloads smaller than INLINE_MAX_BYTES are stored in the DynamoDB item instead of S3
+# (0 disables inlining; DynamoDB items are limited to 400 KB)
+INLINE_MAX_BYTES = 0
+INLINE_COMPRESSION = "gzip"
+
+# Objects smaller than this are stored uncompressed when S3_COMPRESSION is enabled
+S3_COMPRESSION_MIN_BYTES = 1024
+
+# Upload integrity checks: SHA1 sends Content-MD5 plus a SHA-1 checksum, CRC32 sends a single
+# locally computed CRC32, and CRC32C leaves the CRC32C to botocore (awscrt, in the layer)
+S3_CHECKSUM_SHA1 = "SHA1"
+S3_CHECKSUM_CRC32 = "CRC32"
+S3_CHECKSUM_CRC32C = "CRC32C"
+
+# Where the payload of an item is stored
+STORAGE_S3 = "s3"
+STORAGE_INLINE = "inline"
+STORAGE_STAGED = "staged"  # inline until the archive function moves it into a segment
+STORAGE_SEGMENT = "segment"
+
+# Archive modes
+ARCHIVE_MODE_OBJECT = "object"  # one S3 object per webhook
+ARCHIVE_MODE_SEGMENT = "segment"  # staged in DynamoDB, then aggregated into segment objects
+
+# Staged payloads must leave room for the rest of the item within the 400 KB item limit
+SEGMENT_STAGE_MAX_BYTES = 350 * 1024
+SEGMENT_WINDOW = 300  # seconds
+
+# Ingest modes
+INGEST_MODE_DIRECT = "direct"  # persist to S3 and DynamoDB before replying
+INGEST_MODE_QUEUE = "queue"  # enqueue to SQS, reply, and persist from the queue consumer
+
+# Larger payloads are persisted directly even in queue mode
+SQS_MAX_MESSAGE_BYTES = 256 * 1024
+
+# Worker threads used by the queue consumer to persist the messages of a batch in parallel
+INGEST_MAX_WORKERS = 10
+
+# Pending items are leased to a worker for WORKER_LEASE seconds; expired leases are reclaimed
+# by any worker, and items that fail WORKER_MAX_ATTEMPTS times are marked FAILED
+WORKER_LEASE = 300  # seconds
+WORKER_MAX_ATTEMPTS = 5
+WORKER_RETRY_DELAY = 30  # seconds, multiplied by the attempt number
+WORKER_MAX_WORKERS = 16
+WORKER_PAGE_SIZE = 100
+
+# Concurrent queries of a scatter-gather read over sharded partitions
+QUERY_MAX_WORKERS = 16
+
+# Connections per service of the asyncio clients (resources.aio), shared by every coroutine.
+# Calls beyond this wait for a free connection instead of opening more.
+ASYNC_MAX_CONNECTIONS = 128
+
+# Bodies smaller than these are parsed fully instead of being scanned for the event ID, which is
+# faster with orjson, or with the json module when orjson is not installed
+JSON_SCAN_MIN_BYTES = 16 * 1024
+JSON_SCAN_MIN_BYTES_WITHOUT_ORJSON = 4 * 1024
+
+# Replay targets: re-persist missing webhooks, or re-run the worker handlers on them
+REPLAY_TARGET_STORE = "store"
+REPLAY_TARGET_DISPATCH = "dispatch"
+
+# Replay sources
+REPLAY_SOURCE_S3 = "s3"  # objects under raw/{provider}/, by LastModified
+REPLAY_SOURCE_DYNAMODB = "dynamodb"  # items of the provider, by arrived_at
+
+REPLAY_MAX_WORKERS = 16
+
+# CloudWatch namespace of the per-stage EMF metrics, unless POWERTOOLS_METRICS_NAMESPACE is set
+METRICS_NAMESPACE = "Webhooks"
+
+# When the webhook function opens its AWS connections and runs its hot code paths during init:
+# never, only for provisioned concurrency and SnapStart (whose init is not on a request's path),
+# or always
+PRIME_NEVER = "never"
+PRIME_PROVISIONED = "provisioned"
+PRIME_ALWAYS = "always"
+
+# Long-running HTTP server (app.server). Workers default to the number of CPUs.
+SERVER_HOST = "0.0.0.0"
+SERVER_PORT = 8080
+# Largest request body accepted, the API Gateway HTTP API payload limit
+SERVER_MAX_BODY_BYTES = 10 * 1024 * 1024
+# Seconds an idle keep-alive connection is held open
+SERVER_KEEP_ALIVE = 5
+# Seconds workers get to finish in-flight requests after SIGTERM before they are killed
+SERVER_GRACEFUL_TIMEOUT = 30
+# Seconds the rest of a rejected request is read and discarded after the response, so that
+# closing the connection does not reset it before the client has read the response
+SERVER_LINGER_TIMEOUT = 2
+# Exited workers are restarted after SERVER_RESTART_BACKOFF seconds, doubled for every other
+# restart in the last SERVER_RESTART_WINDOW seconds. Past SERVER_MAX_RESTARTS restarts in that
+# window the workers are failing at startup or on every request, and the server stops.
+SERVER_RESTART_BACKOFF = 0.5
+SERVER_RESTART_WINDOW = 60
+SERVER_MAX_RESTARTS = 5
+
+# Worker threads used to write S3 and DynamoDB in parallel
+PERSIST_MAX_WORKERS = 4
+
 EXPIRES_IN_DAYS = 3
@@ -28,6 +28,10 @@ class S3DeleteError(Exception):
     pass
 
 
+class S3GetError(Exception):
+    pass
+
+
 class DynamoDBReadError(Exception):
     pass
 
@@ -36,5 +40,35 @@ class DynamoDBWriteError(Exception):
     pass
 
 
+class DuplicateItemError(Exception):
+    pass
+
+
+class ClaimPendingError(Exception):
+    pass
+
+
 class NotFoundError(Exception):
     pass
+
+
+class ConditionFailedError(Exception):
+    pass
+
+
+class SQSSendError(Exception):
+    pass
+
+
+class S3ListError(Exception):
+    pass
+
+
+class SSMReadError(Exception):
+    pass
+
+
+class RequestRejectedError(Exception):
+    def __init__(self, reason: str, message: str) -> None:
+        super().__init__(message)
+        self.reason = reason
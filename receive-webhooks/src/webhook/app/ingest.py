@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import base64
+import binascii
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from aws_lambda_powertools import Logger
+import boto3
+
+from app import constants, exceptions, metrics, persistence, resources
+from app.body import RequestBody
+
+__all__ = ["INGEST_MODE", "enqueue_webhook", "process_records"]
+
+logger = Logger(child=True)
+
+session = boto3._get_default_session()
+sqs = resources.SQS(session)
+
+INGEST_MODE = os.getenv(constants.ENV_INGEST_MODE, constants.INGEST_MODE_DIRECT)
+
+# Anything outside the characters SQS accepts in a message body is sent base64 encoded
+INVALID_CHARACTERS = re.compile("[^\t\n\r\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]")
+BASE64 = "base64"
+
+# Shared across invocations so warm containers reuse the worker threads
+EXECUTOR = ThreadPoolExecutor(max_workers=constants.INGEST_MAX_WORKERS, thread_name_prefix="ingest")
+
+
+def enqueue_webhook(
+    provider: str,
+    event_id: Optional[str],
+    body: RequestBody,
+    timer: metrics.StageTimer = metrics.NULL_TIMER,
+    tenant: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Enqueue the webhook for the queue consumer to persist, returning the message ID, so the
+    request is acknowledged after a single write. Payloads too large for a message are
+    persisted directly instead.
+
+    Raises SQSSendError when the message can't be sent, and the errors of store_webhook when
+    the payload is persisted directly.
+    """
+    received_at = datetime.now(tz=timezone.utc)
+    attributes = {
+        "provider": provider,
+        "received_at": received_at.isoformat(),
+    }
+    if event_id:
+        attributes["event_id"] = event_id
+    if tenant:
+        attributes["tenant"] = tenant
+
+    message, size = _encode(body)
+    if message is None:
+        message = base64.b64encode(body.data).decode()
+        size = len(message)
+        attributes["content_transfer_encoding"] = BASE64
+
+    size += sum(
+        len(name) + len(value.encode()) + len("String") for name, value in attributes.items()
+    )
+    if size > constants.SQS_MAX_MESSAGE_BYTES:
+        logger.info("Payload too large for the queue, persisting directly", size=size)
+        persistence.store_webhook(provider, event_id, body, timer, received_at, tenant)
+        return None
+
+    return timer.measure(metrics.STAGE_ENQUEUE, sqs.send_message, message, attributes)
+
+
+def process_records(records: List[Dict[str, Any]]) -> List[str]:
+    """
+    Persist the webhooks of a batch of SQS messages, returning the IDs of failed messages
+    """
+    results = EXECUTOR.map(_process, records)
+    return [record["messageId"] for record, stored in zip(records, results) if not stored]
+
+
+def _process(record: Dict[str, Any]) -> bool:
+    try:
+        provider, event_id, body, received_at, tenant = _decode(record)
+    except (KeyError, ValueError, binascii.Error):
+        logger.exception("Unable to decode webhook message", message_id=record.get("messageId"))
+        return False
+
+    try:
+        persistence.store_webhook(provider, event_id, body, received_at=received_at, tenant=tenant)
+    except exceptions.DuplicateItemError:
+        # SQS delivers at least once, so redeliveries land here after the first one is stored
+        logger.info("Duplicate webhook message", provider=provider, event_id=event_id)
+    except (
+        exceptions.ClaimPendingError,
+        exceptions.S3PutError,
+        exceptions.DynamoDBWriteError,
+    ):
+        # redelivered after the visibility timeout, by when a pending claim has gone stale
+        return False
+    except Exception:
+        # any other failure only fails this message, not the rest of the batch
+        logger.exception(
+            "Unable to store webhook message",
+            message_id=record.get("messageId"),
+            provider=provider,
+            event_id=event_id,
+        )
+        return False
+
+    return True
+
+
+def _encode(body: RequestBody) -> Tuple[Optional[str], int]:
+    try:
+        text = body.text
+    except UnicodeDecodeError:
+        return None, 0
+
+    if INVALID_CHARACTERS.search(text):
+        return None, 0
+
+    return text, len(body)
+
+
+def _decode(
+    record: Dict[str, Any],
+) -> Tuple[str, Optional[str], RequestBody, datetime, Optional[str]]:
+    attributes: Dict[str, str] = {
+        name: attribute["stringValue"]
+        for name, attribute in record.get("messageAttributes", {}).items()
+    }
+
+    if attributes.get("content_transfer_encoding") == BASE64:
+        data = base64.b64decode(record["body"], validate=True)
+    else:
+        data = record["body"].encode()
+
+    return (
+        attributes["provider"],
+        attributes.get("event_id"),
+        RequestBody(data),
+        datetime.fromisoformat(attributes["received_at"]),
+        attributes.get("tenant"),
+    )
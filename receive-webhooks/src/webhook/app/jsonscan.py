@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import json
+from json.decoder import scanstring
+from json.scanner import make_scanner
+import re
+from typing import Any, Sequence
+
+from app import constants
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+__all__ = ["BACKEND", "ScanAborted", "loads", "lookup", "scan", "should_scan"]
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# one member up to its value: the key (still escaped) and the colon
+_MEMBER = re.compile(r'[ \t\n\r]*"([^"\\]*(?:\\.[^"\\]*)*)"[ \t\n\r]*:[ \t\n\r]*')
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,}])")
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+_SCALAR = re.compile(r"[^,\]}\s]+")
+# a \u escape in a key: the rest of its string is followed by a colon
+_ESCAPED_KEY = re.compile(rb'\\u[0-9a-fA-F]{4}[^"\\]*(?:\\.[^"\\]*)*"[ \t\n\r]*:')
+# bytes standing in for the keys of a path once the rest of a document is reduced to quotes and
+# brackets, none of which can occur unescaped in valid JSON
+_MARKERS = b"\x01\x02\x03\x04\x05\x06\x07\x08"
+_REDUCE = bytes(sorted(set(range(256)) - set(b'"[]{}' + _MARKERS)))
+# an object or array holding no other, whose markers are nested deeper than the path's keys
+_INNERMOST = re.compile(rb"[{\[][\x01-\x08]*[}\]]")
+_CLOSING = re.compile(rb"[}\]]")
+# C accelerated scanner of the json module, parsing one value at an offset
+_scan_once = make_scanner(json.JSONDecoder())
+
+
+class ScanAborted(Exception):
+    """
+    The document is better left to the full parser
+    """
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def should_scan(size: int) -> bool:
+    """
+    Whether a body of `size` bytes is scanned for a field rather than parsed fully. Small bodies
+    are parsed faster than they can be scanned, by orjson and by the json module alike.
+    """
+    if orjson is None:
+        return size >= constants.JSON_SCAN_MIN_BYTES_WITHOUT_ORJSON
+    return size >= constants.JSON_SCAN_MIN_BYTES
+
+
+def lookup(document: Any, path: Sequence[str]) -> Any:
+    """
+    Return the value at `path` in a parsed document, or None
+    """
+    for name in path:
+        if not isinstance(document, dict):
+            return None
+        document = document.get(name)
+    return document
+
+
+def scan(text: str, path: Sequence[str]) -> Any:
+    """
+    Return the value at `path` in a JSON document, or None, reading the document only up to the
+    value. Members before it are skipped without being parsed, except nested objects and arrays,
+    which the json module's C scanner parses. Documents that are not an object raise
+    ScanAborted, so the full parser validates them.
+
+    json.loads keeps the last of duplicate keys, so when a key of the path may occur again after
+    the value the scan raises ScanAborted rather than return a value the full parser would not.
+    Malformed JSON raises ValueError, but only when it is encountered before the value.
+    """
+    idx = _WHITESPACE.match(text, 0).end()
+    if text[idx : idx + 1] != "{":
+        raise ScanAborted()
+
+    for depth, name in enumerate(path):
+        if text[idx : idx + 1] != "{":
+            # the previous key holds no object, unless it occurs again
+            return _unless_repeated(None, text, _skip(text, idx), path, depth - 1)
+        idx += 1
+
+        while True:
+            member = _MEMBER.match(text, idx)
+            if not member:
+                end = _WHITESPACE.match(text, idx).end()
+                if text[end : end + 1] == "}":
+                    return _unless_repeated(None, text, end + 1, path, depth - 1)
+                raise ValueError(f"Expecting property name at {idx}")
+            key, idx = member.group(1), member.end()
+            if "\\" in key:
+                key = scanstring(key + '"', 0)[0]
+            if key == name:
+                break
+
+            separator = _SEPARATOR.match(text, _skip(text, idx))
+            if not separator:
+                raise ValueError(f"Expecting ',' delimiter at {idx}")
+            if separator.group(1) == "}":
+                return _unless_repeated(None, text, separator.end(), path, depth - 1)
+            idx = separator.end()
+
+        if depth == len(path) - 1:
+            try:
+                value, end = _scan_once(text, idx)
+            except StopIteration:
+                raise ValueError(f"Expecting value at {idx}") from None
+            return _unless_repeated(value, text, end, path, depth)
+
+    return None
+
+
+def _unless_repeated(value: Any, text: str, idx: int, path: Sequence[str], level: int) -> Any:
+    if _repeats(text, idx, path, level):
+        raise ScanAborted()
+    return value
+
+
+def _repeats(text: str, idx: int, path: Sequence[str], level: int) -> bool:
+    """
+    Whether a key of `path` occurs again after idx in the objects enclosing idx, where idx is
+    within the object holding path[level]. Only the path's own depth counts, so nested objects
+    reusing a key, such as the "id" of every Stripe object, don't abort the scan.
+
+    The rest of the document is reduced, at the speed of bytes methods, to its quotes, brackets
+    and a marker byte per path key. Nested objects and arrays are then removed from the inside
+    out, which leaves the markers of each enclosing object between its closing brackets. Strings
+    holding brackets, strings equal to a key and keys spelled with escapes only cost a full parse.
+    """
+    if level < 0:
+        return False
+    rest = text[idx:].encode()
+    if b"\\" in rest:
+        if _ESCAPED_KEY.search(rest):
+            return True
+        # an escaped quote would otherwise end its string early
+        rest = rest.replace(b"\\\\", b"").replace(b'\\"', b"")
+
+    names = list(dict.fromkeys(path[: level + 1]))
+    if len(names) > len(_MARKERS):
+        return True
+    markers = {}
+    for name, marker in zip(names, _MARKERS):
+        parts = rest.split(json.dumps(name, ensure_ascii=False).encode())
+        if len(parts) > 1:
+            markers[name] = bytes((marker,))
+            rest = markers[name].join(parts)
+    if not markers:
+        return False
+
+    rest = rest.translate(None, _REDUCE).replace(b'""', b"")
+    if b'"' in rest:
+        return True
+    empty = [b"{}", b"[]"] + [b"{" + marker + b"}" for marker in markers.values()]
+    while True:
+        reduced = rest
+        for pattern in empty:
+            reduced = reduced.replace(pattern, b"")
+        if len(reduced) == len(rest):
+            reduced = _INNERMOST.sub(b"", rest)
+            if len(reduced) == len(rest):
+                break
+        rest = reduced
+    if b"{" in rest or b"[" in rest:
+        # unbalanced, so malformed
+        return True
+
+    enclosing = _CLOSING.split(rest)
+    for segment, name in zip(enclosing, reversed(path[: level + 1])):
+        marker = markers.get(name)
+        if marker and marker in segment:
+            return True
+    return False
+
+
+def _skip(text: str, idx: int) -> int:
+    """
+    Return the end of the value starting at idx
+    """
+    char = text[idx : idx + 1]
+    if char == '"':
+        match = _STRING.match(text, idx)
+    elif char == "{" or char == "[":
+        try:
+            return _scan_once(text, idx)[1]
+        except StopIteration:
+            raise ValueError(f"Expecting value at {idx}") from None
+    else:
+        match = _SCALAR.match(text, idx)
+
+    if not match:
+        raise ValueError(f"Expecting value at {idx}")
+    return match.end()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+from datetime import datetime, timedelta, timezone
+import os
+from typing import List, Optional
+import zlib
+
+from app import constants
+
+__all__ = ["PARTITION_SCHEME", "partition_key", "partition_keys", "arrival_key", "arrival_keys"]
+
+PARTITION_SCHEME = os.getenv(constants.ENV_PARTITION_SCHEME, constants.PARTITION_SCHEME_PROVIDER)
+PARTITION_SHARDS = int(os.getenv(constants.ENV_PARTITION_SHARDS, constants.PARTITION_SHARDS))
+
+
+def partition_key(provider: str, event_id: str, tenant: Optional[str] = None) -> str:
+    """
+    Return the partition key of an event, e.g. "STRIPE", or "STRIPE#7" when sharded, and
+    "STRIPE/acme" or "STRIPE/acme#7" for a tenant.
+
+    The shard only depends on the event ID, so a retried event always maps to the same key and
+    deduplication stays exact. Tenants get their own keys, since not every provider's event IDs
+    are unique across accounts.
+    """
+    prefix = _prefix(provider, tenant)
+    if PARTITION_SCHEME == constants.PARTITION_SCHEME_SHARDED:
+        # crc32 rather than hash(), which is salted per process
+        shard = zlib.crc32(event_id.encode()) % PARTITION_SHARDS
+        return f"{prefix}#{shard}"
+    return prefix
+
+
+def partition_keys(provider: str, tenant: Optional[str] = None) -> List[str]:
+    """
+    Return every partition key a provider's (or a tenant's) events can be stored under
+    """
+    prefix = _prefix(provider, tenant)
+    if PARTITION_SCHEME == constants.PARTITION_SCHEME_SHARDED:
+        return [f"{prefix}#{shard}" for shard in range(PARTITION_SHARDS)]
+    return [prefix]
+
+
+def arrival_key(partition_key: str, arrived_at: datetime) -> str:
+    """
+    Return the arrival index partition of an item, its partition key and UTC day, e.g.
+    "STRIPE#2026-10-17" or "STRIPE#7#2026-10-17"
+    """
+    return f"{partition_key}#{arrived_at.astimezone(timezone.utc):%Y-%m-%d}"
+
+
+def arrival_keys(
+    provider: str, first: datetime, last: datetime, tenant: Optional[str] = None
+) -> List[str]:
+    """
+    Return every arrival index partition a provider's (or a tenant's) events that arrived from
+    `first` to `last` can be indexed under, one per partition key and day
+    """
+    day = first.astimezone(timezone.utc).date()
+    last_day = last.astimezone(timezone.utc).date()
+    days = []
+    while day <= last_day:
+        days.append(day)
+        day += timedelta(days=1)
+    return [f"{key}#{day:%Y-%m-%d}" for day in days for key in partition_keys(provider, tenant)]
+
+
+def _prefix(provider: str, tenant: Optional[str]) -> str:
+    return f"{provider.upper()}/{tenant}" if tenant else provider.upper()
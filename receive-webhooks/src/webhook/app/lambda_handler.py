@@ -26,7 +26,7 @@ from aws_lambda_powertools.logging import correlation_paths
 from aws_lambda_powertools.event_handler import APIGatewayHttpResolver
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
-from app import routers
+from app import routers, metrics, priming
 
 
 logger = Logger(use_rfc3339=True, utc=True)
@@ -34,10 +34,13 @@ tracer = Tracer()
 api = APIGatewayHttpResolver()
 api.include_router(routers.webhook_router)
 
+priming.prime_on_init()
+
 
 @tracer.capture_lambda_handler(capture_response=False)
 @logger.inject_lambda_context(
     log_event=True, correlation_id_path=correlation_paths.API_GATEWAY_HTTP
 )
+@metrics.log_metrics
 def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
     return api.resolve(event, context)
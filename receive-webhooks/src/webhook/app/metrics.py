@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+from time import perf_counter
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from aws_lambda_powertools import Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+
+from app import constants
+
+__all__ = [
+    "METRICS_ENABLED",
+    "StageTimer",
+    "NULL_TIMER",
+    "new_timer",
+    "publish",
+    "log_metrics",
+]
+
+T = TypeVar("T")
+
+# Stage latencies, emitted in milliseconds
+STAGE_DECODE = "BodyDecode"
+STAGE_PROVIDER = "ProviderLookup"
+STAGE_EVENT_ID = "EventIdExtraction"
+STAGE_VERIFY = "Verification"
+STAGE_DEDUP = "DedupLookup"
+STAGE_S3_PUT = "S3Put"
+STAGE_DYNAMODB_PUT = "DynamoDBPut"
+STAGE_ENQUEUE = "Enqueue"
+
+# Counters
+REQUESTS = "Requests"
+DUPLICATES = "Duplicates"
+VERIFICATION_FAILURES = "VerificationFailures"
+COMPENSATION_DELETES = "CompensationDeletes"
+COMPENSATION_FAILURES = "CompensationFailures"
+
+# Request outcomes, used as the `outcome` dimension
+OUTCOME_STORED = "stored"
+OUTCOME_QUEUED = "queued"
+OUTCOME_DUPLICATE = "duplicate"
+OUTCOME_REJECTED = "rejected"
+OUTCOME_ERROR = "error"
+
+METRICS_ENABLED = os.getenv(constants.ENV_METRICS_ENABLED, "true").lower() == "true"
+
+metrics = Metrics(namespace=os.getenv("POWERTOOLS_METRICS_NAMESPACE", constants.METRICS_NAMESPACE))
+
+
+class StageTimer:
+    """
+    Collects per-stage latencies and counters for a single request.
+
+    `lap()` records the time since the previous lap, so consecutive router stages cost one
+    clock read each. `measure()` times a single call. A timer belongs to the request thread,
+    so work handed to a worker thread is timed with a `fork()` that is merged back once the
+    work is done.
+    """
+
+    __slots__ = ("timings", "counts", "_mark")
+
+    def __init__(self) -> None:
+        self.timings: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._mark = perf_counter()
+
+    def lap(self, stage: str) -> None:
+        now = perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + now - self._mark
+        self._mark = now
+
+    def measure(self, stage: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + perf_counter() - start
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def fork(self) -> "StageTimer":
+        return StageTimer()
+
+    def merge(self, other: "StageTimer") -> None:
+        for stage, seconds in other.timings.items():
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        for name, value in other.counts.items():
+            self.count(name, value)
+
+
+class _NullTimer(StageTimer):
+    """
+    Timer used when metrics are disabled, so instrumented code paths stay branch-free
+    """
+
+    __slots__ = ()
+
+    def lap(self, stage: str) -> None:
+        pass
+
+    def measure(self, stage: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return func(*args, **kwargs)
+
+    def count(self, name: str, value: int = 1) -> None:
+        pass
+
+    def fork(self) -> StageTimer:
+        return self
+
+    def merge(self, other: StageTimer) -> None:
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+def new_timer() -> StageTimer:
+    return StageTimer() if METRICS_ENABLED else NULL_TIMER
+
+
+def publish(
+    timer: StageTimer, provider: Optional[str], outcome: str, reason: Optional[str] = None
+) -> None:
+    """
+    Add the timings and counters of a request to the metric set flushed by `log_metrics`.
+    Rejected requests also carry the rejection reason as a dimension.
+    """
+    if timer is NULL_TIMER:
+        return
+
+    metrics.add_dimension(name="provider", value=provider or "unknown")
+    metrics.add_dimension(name="outcome", value=outcome)
+    if reason:
+        metrics.add_dimension(name="reason", value=reason)
+    metrics.add_metric(name=REQUESTS, unit=MetricUnit.Count, value=1)
+    for stage, seconds in timer.timings.items():
+        metrics.add_metric(name=stage, unit=MetricUnit.Milliseconds, value=seconds * 1000)
+    for name, value in timer.counts.items():
+        metrics.add_metric(name=name, unit=MetricUnit.Count, value=value)
+
+
+def log_metrics(handler: Callable[..., T]) -> Callable[..., T]:
+    """
+    Flush the EMF metric set at the end of each invocation, unless metrics are disabled
+    """
+    if not METRICS_ENABLED:
+        return handler
+    return metrics.log_metrics(handler)
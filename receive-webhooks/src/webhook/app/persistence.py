@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+import json
+import math
+import os
+import time
+import zlib
+from typing import Dict, Any, Iterator, List, Optional
+
+from aws_lambda_powertools import Logger
+import boto3
+from boto3.dynamodb.types import Binary
+
+from app import exceptions, constants, resources, metrics, keys
+from app.body import RequestBody
+
+__all__ = ["store_webhook", "read_payload", "find_webhooks", "pending_shard", "pending_shards"]
+
+logger = Logger(child=True)
+
+session = boto3._get_default_session()
+s3 = resources.S3(session)
+dynamodb = resources.DynamoDB(session)
+
+DEDUP_MODE = os.getenv(constants.ENV_DEDUP_MODE, constants.DEDUP_MODE_CONDITIONAL)
+PERSIST_CONCURRENTLY = os.getenv(constants.ENV_PERSIST_CONCURRENTLY, "false").lower() == "true"
+INLINE_MAX_BYTES = int(os.getenv(constants.ENV_INLINE_MAX_BYTES, constants.INLINE_MAX_BYTES))
+INLINE_COMPRESSION = os.getenv(constants.ENV_INLINE_COMPRESSION, constants.INLINE_COMPRESSION)
+ARCHIVE_MODE = os.getenv(constants.ENV_ARCHIVE_MODE, constants.ARCHIVE_MODE_OBJECT)
+PENDING_SHARDS = int(os.getenv(constants.ENV_PENDING_SHARDS, constants.PENDING_SHARDS))
+CLAIM_TIMEOUT = int(os.getenv(constants.ENV_CLAIM_TIMEOUT, constants.CLAIM_TIMEOUT))
+
+# Shared across invocations so warm containers reuse the worker threads
+EXECUTOR = ThreadPoolExecutor(
+    max_workers=constants.PERSIST_MAX_WORKERS, thread_name_prefix="persist"
+)
+
+
+def store_webhook(
+    provider: str,
+    event_id: Optional[str],
+    body: RequestBody,
+    timer: metrics.StageTimer = metrics.NULL_TIMER,
+    received_at: Optional[datetime] = None,
+    tenant: Optional[str] = None,
+    if_not_exists: bool = False,
+) -> str:
+    """
+    Store the payload in S3 and the metadata in DynamoDB, returning the stored event ID.
+    Payloads smaller than INLINE_MAX_BYTES are stored in the DynamoDB item instead, and in
+    segment archive mode payloads are staged in the item until they are aggregated.
+
+    Raises DuplicateItemError when the event has already been stored, ClaimPendingError while
+    another request is still storing it, and S3PutError or DynamoDBWriteError when persisting
+    fails. Partial writes are compensated before raising.
+    `received_at` is the time the webhook was received, when it is persisted later, and
+    `tenant` the tenant of a /<provider>/<tenant> request, which scopes the event ID.
+    `if_not_exists` claims the event ID whatever DEDUP_MODE is, so an existing item is never
+    overwritten.
+    """
+    # Without a unique event ID there is nothing to claim, so fall back to an unconditional write
+    conditional = DEDUP_MODE == constants.DEDUP_MODE_CONDITIONAL or if_not_exists
+    claim = conditional and bool(event_id)
+
+    now = (received_at or datetime.now(tz=timezone.utc)).replace(microsecond=0)
+    expires_at = now + timedelta(days=constants.EXPIRES_IN_DAYS)
+    arrived_at = _isoformat(now)
+    if not event_id:
+        # if there is no unique event ID, use the arrival time
+        event_id = arrived_at
+
+    item_key = {
+        constants.PARTITION_KEY: keys.partition_key(provider, event_id, tenant),
+        constants.SORT_KEY: event_id,
+    }
+    item = {
+        **item_key,
+        constants.ARRIVAL_PARTITION_KEY: keys.arrival_key(item_key[constants.PARTITION_KEY], now),
+        "arrived_at": arrived_at,
+        "provider": provider,
+        "expires_at": math.floor(expires_at.timestamp()),
+    }
+    if tenant:
+        item["tenant"] = tenant
+
+    payload = body.data
+    storage = None
+    if len(payload) < INLINE_MAX_BYTES:
+        storage = constants.STORAGE_INLINE
+    elif (
+        ARCHIVE_MODE == constants.ARCHIVE_MODE_SEGMENT
+        and len(payload) < constants.SEGMENT_STAGE_MAX_BYTES
+    ):
+        storage = constants.STORAGE_STAGED
+
+    if storage:
+        # Small payloads skip S3 entirely and are written in a single (conditional) request
+        item.update(_inline(payload, storage))
+        item[constants.PENDING_PARTITION_KEY] = pending_shard(event_id)
+        item[constants.PENDING_SORT_KEY] = arrived_at
+        _put_item(item, claim, timer)
+        return event_id
+
+    item["storage"] = constants.STORAGE_S3
+    if claim:
+        item[constants.CLAIMED_AT] = int(time.time())
+    prefix = f"raw/{provider}/{tenant}" if tenant else f"raw/{provider}"
+    key = f"{prefix}/evt_{event_id}.json"
+    metadata = {
+        "event_id": str(event_id),
+        "arrived_at": str(arrived_at),
+        "provider": provider,
+        "expires_at": str(math.floor(expires_at.timestamp())),
+    }
+    if tenant:
+        metadata["tenant"] = tenant
+
+    if PERSIST_CONCURRENTLY and not claim:
+        obj = _write_concurrently(item, key, body, metadata, timer)
+    else:
+        obj = _write_sequentially(item, claim, key, body, metadata, timer)
+
+    # The item only joins the pending index once the payload is stored
+    pending: Dict[str, Any] = {
+        "s3": {
+            "bucket": obj.bucket,
+            "key": obj.key,
+            "version_id": obj.version_id,
+        },
+        constants.PENDING_PARTITION_KEY: pending_shard(event_id),
+        constants.PENDING_SORT_KEY: arrived_at,
+    }
+    try:
+        if claim:
+            # Completes the claim, unless it went stale and another request took it over
+            timer.measure(
+                metrics.STAGE_DYNAMODB_PUT,
+                dynamodb.update_item,
+                item_key,
+                pending,
+                remove=[constants.CLAIMED_AT],
+                condition="#claimed_at = :claimed_at",
+                names={"#claimed_at": constants.CLAIMED_AT},
+                values={":claimed_at": item[constants.CLAIMED_AT]},
+            )
+        elif PERSIST_CONCURRENTLY:
+            timer.measure(metrics.STAGE_DYNAMODB_PUT, dynamodb.update_item, item_key, pending)
+        else:
+            timer.measure(metrics.STAGE_DYNAMODB_PUT, dynamodb.put_item, {**item, **pending})
+    except exceptions.ConditionFailedError:
+        _delete_object(obj, timer)
+        raise exceptions.ClaimPendingError("Claim was taken over by another request")
+    except exceptions.DynamoDBWriteError:
+        _delete_object(obj, timer)
+        if claim or PERSIST_CONCURRENTLY:
+            _delete_item(item_key, timer)
+        raise
+
+    return event_id
+
+
+def find_webhooks(
+    provider: str, start: datetime, end: datetime, tenant: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Return the stored webhooks of a provider (or of one of its tenants) that arrived in
+    [start, end), in no particular order. The arrival index is queried for the window in each
+    day bucket, of every shard with sharded partition keys, in parallel. Items come without
+    their payload, which `read_payload` reads from the table.
+    """
+    # arrived_at is in whole seconds, so the last second before `end` closes the window
+    last = end - timedelta(microseconds=1)
+    return dynamodb.query_all(
+        constants.ARRIVAL_PARTITION_KEY,
+        keys.arrival_keys(provider, start, last, tenant),
+        index_name=constants.ARRIVAL_INDEX,
+        sort_range=(constants.ARRIVAL_SORT_KEY, _isoformat(start), _isoformat(last)),
+    )
+
+
+def pending_shard(event_id: str) -> str:
+    """
+    Return the pending index partition of an event, e.g. "PENDING#3"
+    """
+    # crc32 rather than hash(), which is salted per process
+    shard = zlib.crc32(event_id.encode()) % PENDING_SHARDS
+    return f"{constants.STATUS_PENDING}#{shard}"
+
+
+def pending_shards() -> List[str]:
+    return [f"{constants.STATUS_PENDING}#{shard}" for shard in range(PENDING_SHARDS)]
+
+
+def read_payload(item: Dict[str, Any]) -> bytes:
+    """
+    Return the raw payload of a stored webhook item, wherever it is stored
+    """
+    storage = item.get("storage", constants.STORAGE_S3)
+    if storage in (constants.STORAGE_INLINE, constants.STORAGE_STAGED) and "payload" not in item:
+        # items found on the arrival index don't carry their payload
+        item = dynamodb.get_item(_key_of(item))
+        storage = item.get("storage", constants.STORAGE_S3)
+
+    if storage in (constants.STORAGE_INLINE, constants.STORAGE_STAGED):
+        payload = item["payload"]
+        if isinstance(payload, str):
+            return payload.encode()
+        if isinstance(payload, Binary):
+            payload = payload.value
+        return resources.decompress(bytes(payload), item.get("content_encoding"))
+
+    if storage == constants.STORAGE_SEGMENT:
+        segment: Dict[str, Any] = item["segment"]
+        data = s3.get_object(
+            segment["key"],
+            segment.get("version_id"),
+            segment.get("bucket"),
+            byte_range=(int(segment["offset"]), int(segment["length"])),
+        )
+        # Each record is an independent gzip member holding one NDJSON line
+        record = json.loads(resources.decompress(data, resources.compression.GZIP))
+        return record["payload"].encode()
+
+    location: Dict[str, Any] = item["s3"]
+    return s3.get_object(location["key"], location.get("version_id"), location.get("bucket"))
+
+
+def _inline(payload: bytes, storage: str) -> Dict[str, Any]:
+    attributes: Dict[str, Any] = {"storage": storage}
+
+    if INLINE_COMPRESSION != resources.compression.IDENTITY:
+        compressed = resources.compress(payload, INLINE_COMPRESSION)
+        if len(compressed) < len(payload):
+            attributes["payload"] = compressed
+            attributes["content_encoding"] = INLINE_COMPRESSION
+            return attributes
+
+    # Uncompressed payloads stay readable strings in the console and in stream records
+    attributes["payload"] = payload.decode()
+    return attributes
+
+
+def _write_sequentially(
+    item: Dict[str, Any],
+    claim: bool,
+    key: str,
+    body: RequestBody,
+    metadata: Dict[str, str],
+    timer: metrics.StageTimer,
+) -> resources.S3Object:
+    if claim:
+        # Claim the event ID before touching S3 so duplicates cost a single conditional write
+        _put_item(item, claim, timer)
+
+    try:
+        return timer.measure(
+            metrics.STAGE_S3_PUT, s3.put_object, key, body.data, metadata, digests=_digests(body)
+        )
+    except exceptions.S3PutError:
+        if claim:
+            # Release the claim so the provider's retry is not treated as a duplicate
+            _delete_item(_key_of(item), timer)
+        raise
+
+
+def _write_concurrently(
+    item: Dict[str, Any],
+    key: str,
+    body: RequestBody,
+    metadata: Dict[str, str],
+    timer: metrics.StageTimer,
+) -> resources.S3Object:
+    # Without a claim there is no duplicate to skip the upload for, so both writes overlap
+    s3_timer = timer.fork()
+    future = EXECUTOR.submit(
+        s3_timer.measure,
+        metrics.STAGE_S3_PUT,
+        s3.put_object,
+        key,
+        body.data,
+        metadata,
+        digests=_digests(body),
+    )
+
+    item_error: Optional[Exception] = None
+    try:
+        _put_item(item, False, timer)
+    except Exception as error:
+        item_error = error
+
+    try:
+        obj = future.result()
+    except Exception:
+        if not item_error:
+            _delete_item(_key_of(item), timer)
+        raise
+    finally:
+        timer.merge(s3_timer)
+
+    if item_error:
+        # Remove the object written alongside a failed item
+        _delete_object(obj, timer)
+        raise item_error
+
+    return obj
+
+
+def _put_item(item: Dict[str, Any], claim: bool, timer: metrics.StageTimer) -> None:
+    if claim:
+        stale_before = int(time.time()) - CLAIM_TIMEOUT
+        timer.measure(metrics.STAGE_DYNAMODB_PUT, dynamodb.claim_item, item, stale_before)
+    else:
+        timer.measure(metrics.STAGE_DYNAMODB_PUT, dynamodb.put_item, item)
+
+
+def _digests(body: RequestBody) -> Dict[str, bytes]:
+    return body.digests(*s3.CHECKSUM_DIGESTS)
+
+
+def _isoformat(moment: datetime) -> str:
+    # arrived_at values sort lexically, e.g. "2026-10-17T12:00:00Z"
+    return moment.astimezone(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def _key_of(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        constants.PARTITION_KEY: item[constants.PARTITION_KEY],
+        constants.SORT_KEY: item[constants.SORT_KEY],
+    }
+
+
+def _delete_object(obj: resources.S3Object, timer: metrics.StageTimer) -> None:
+    timer.count(metrics.COMPENSATION_DELETES)
+    try:
+        s3.delete_object(obj.key, obj.version_id)
+    except exceptions.S3DeleteError:
+        # The object is left orphaned, so count it where a missing permission would show up
+        timer.count(metrics.COMPENSATION_FAILURES)
+
+
+def _delete_item(key: Dict[str, Any], timer: metrics.StageTimer) -> None:
+    timer.count(metrics.COMPENSATION_DELETES)
+    try:
+        dynamodb.delete_item(key)
+    except exceptions.DynamoDBWriteError:
+        timer.count(metrics.COMPENSATION_FAILURES)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Moves the one-time costs of a container's first request into init: TLS connections to S3,
+# DynamoDB, SSM and SQS, the credentials parameter, and the first use of the serializers and
+# hash functions. With SnapStart, code paths are warmed before the snapshot and connections are
+# opened again after every restore, since sockets don't survive one.
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+from time import perf_counter
+from typing import Callable, Dict
+
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.utilities.parameters.exceptions import (
+    GetParameterError,
+    TransformParameterError,
+)
+
+from app import constants, exceptions, ingest, persistence, providers, resources
+from app.body import RequestBody
+from app.providers.base import CREDENTIALS
+from app.resources.s3 import BUCKET_NAME
+from app.resources.sqs import QUEUE_URL
+
+try:
+    import snapshot_restore_py
+except ImportError:
+    snapshot_restore_py = None
+
+__all__ = ["PRIME_ON_INIT", "prime", "prime_connections", "prime_code_paths", "prime_on_init"]
+
+logger = Logger(child=True)
+
+PRIME_ON_INIT = os.getenv(constants.ENV_PRIME_ON_INIT, constants.PRIME_NEVER)
+
+# Set by Lambda: "on-demand", "provisioned-concurrency" or "snap-start"
+INITIALIZATION_TYPE = os.getenv("AWS_LAMBDA_INITIALIZATION_TYPE", "on-demand")
+
+# Looked up to open connections, the responses (usually not found) are discarded
+PRIME_KEY = "prime"
+
+SAMPLE = json.dumps({"id": "evt_prime", "type": "prime", "data": {"object": {"amount": 1}}})
+
+
+def prime_connections() -> Dict[str, float]:
+    """
+    Open a pooled connection to every service a request uses, in parallel. Any response,
+    including an error, leaves an open connection behind.
+    """
+    s3 = resources.get_client("s3", persistence.session)
+    dynamodb = resources.get_client("dynamodb", persistence.session)
+
+    calls: Dict[str, Callable[[], object]] = {
+        "s3": lambda: s3.head_object(Bucket=BUCKET_NAME, Key=PRIME_KEY),
+        "dynamodb": lambda: persistence.dynamodb.get_item(
+            {constants.PARTITION_KEY: PRIME_KEY, constants.SORT_KEY: PRIME_KEY}
+        ),
+        # also fetches the credentials parameter, which requests would otherwise wait for
+        "ssm": _prime_parameter,
+    }
+    if ingest.INGEST_MODE == constants.INGEST_MODE_QUEUE:
+        sqs = resources.get_client("sqs", ingest.session)
+        calls["sqs"] = lambda: sqs.get_queue_attributes(
+            QueueUrl=QUEUE_URL, AttributeNames=["QueueArn"]
+        )
+
+    with ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix="prime") as executor:
+        futures = {name: executor.submit(_timed, call) for name, call in calls.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
+def prime_code_paths() -> None:
+    """
+    Run the serializers, hash functions and HMACs of a request on a synthetic payload
+    """
+    body = RequestBody(SAMPLE.encode())
+    body.get_field(["id"])
+    body.digests(*persistence.s3.CHECKSUM_DIGESTS)
+
+    item = {
+        constants.PARTITION_KEY: PRIME_KEY,
+        constants.SORT_KEY: PRIME_KEY,
+        "arrived_at": "2026-01-01T00:00:00Z",
+        "expires_at": 0,
+        "s3": {"bucket": PRIME_KEY, "key": PRIME_KEY, "version_id": None},
+    }
+    resources.DynamoDB.deserialize(resources.DynamoDB.serialize(item))
+
+    # decodes the secret and keys the HMAC of every provider imported so far
+    for provider_class in providers.PROVIDER_MAP.loaded():
+        credentials = CREDENTIALS.get(provider_class)
+        if credentials.signer:
+            credentials.new_hmac(body.data).digest()
+
+
+def prime() -> Dict[str, float]:
+    timings = prime_connections()
+    prime_code_paths()
+    return timings
+
+
+def prime_on_init() -> None:
+    """
+    Prime according to PRIME_ON_INIT, registering SnapStart hooks when running under SnapStart
+    """
+    if PRIME_ON_INIT == constants.PRIME_NEVER:
+        return
+    if PRIME_ON_INIT == constants.PRIME_PROVISIONED and INITIALIZATION_TYPE == "on-demand":
+        return
+
+    if INITIALIZATION_TYPE == "snap-start" and snapshot_restore_py is not None:
+        snapshot_restore_py.register_before_snapshot(_before_snapshot)
+        snapshot_restore_py.register_after_restore(_after_restore)
+        return
+
+    try:
+        timings = prime()
+    except Exception:
+        # priming is an optimization, requests still work without it
+        logger.exception("Unable to prime")
+        return
+    logger.info("Primed", initialization_type=INITIALIZATION_TYPE, timings_ms=timings)
+
+
+def _before_snapshot() -> None:
+    try:
+        prime()
+    except Exception:
+        logger.exception("Unable to prime before snapshot")
+
+
+def _after_restore() -> None:
+    # the restored sockets are closed, and the cached parameter may be out of date
+    CREDENTIALS.clear()
+    try:
+        prime_connections()
+    except Exception:
+        logger.exception("Unable to prime after restore")
+
+
+def _prime_parameter() -> None:
+    CREDENTIALS.get_parameter()
+
+
+def _timed(call: Callable[[], object]) -> float:
+    start = perf_counter()
+    try:
+        call()
+    except (
+        *resources.AWS_ERRORS,
+        exceptions.NotFoundError,
+        exceptions.DynamoDBReadError,
+        exceptions.SSMReadError,
+        GetParameterError,
+        TransformParameterError,
+    ):
+        # lookups usually miss, and a service that can't be reached must not keep the others,
+        # or the code paths, from being primed
+        pass
+    return (perf_counter() - start) * 1e3
@@ -19,31 +19,79 @@
 * SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
-from typing import List
+import importlib
+import os
+from typing import Dict, Iterator, KeysView, List, Mapping, Type
 
+from app import constants
 from .base import BaseProvider
-from .column import ColumnProvider
-from .dwolla import DwollaProvider
-from .lithic import LithicProvider
-from .marqeta import MarqetaProvider
-from .solidfi import SolidProvider
-from .stripe import StripeProvider
-from .treasury_prime import TreasuryPrimeProvider
-from .trolley import TrolleyProvider
-from .unit import UnitProvider
-
-ALL_PROVIDERS: List[BaseProvider] = [
-    ColumnProvider,
-    DwollaProvider,
-    LithicProvider,
-    MarqetaProvider,
-    SolidProvider,
-    StripeProvider,
-    TreasuryPrimeProvider,
-    TrolleyProvider,
-    UnitProvider,
-]
-
-PROVIDER_MAP = {provider.get_provider_name(): provider for provider in ALL_PROVIDERS}
-
-__all__ = [PROVIDER_MAP]
+
+# Provider name -> "module:class". Modules are only imported when a provider is first looked
+# up, so a cold start does not pay for libraries (such as jose) that the request won't use.
+PROVIDER_CLASSES: Dict[str, str] = {
+    "column": ".column:ColumnProvider",
+    "dwolla": ".dwolla:DwollaProvider",
+    "lithic": ".lithic:LithicProvider",
+    "marqeta": ".marqeta:MarqetaProvider",
+    "plaid": ".plaid:PlaidProvider",
+    "solidfi": ".solidfi:SolidProvider",
+    "stripe": ".stripe:StripeProvider",
+    "treasury_prime": ".treasury_prime:TreasuryPrimeProvider",
+    "trolley": ".trolley:TrolleyProvider",
+    "unit": ".unit:UnitProvider",
+}
+
+
+class ProviderRegistry(Mapping[str, Type[BaseProvider]]):
+    """
+    Read-only mapping of provider name to provider class that imports modules on first lookup
+    """
+
+    def __init__(self, classes: Dict[str, str]) -> None:
+        self._classes = classes
+        self._loaded: Dict[str, Type[BaseProvider]] = {}
+
+    def __getitem__(self, name: str) -> Type[BaseProvider]:
+        provider_class = self._loaded.get(name)
+        if provider_class is None:
+            module_name, _, class_name = self._classes[name].partition(":")
+            module = importlib.import_module(module_name, __name__)
+            provider_class = getattr(module, class_name)
+            self._loaded[name] = provider_class
+        return provider_class
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._classes)
+
+    def __len__(self) -> int:
+        return len(self._classes)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._classes
+
+    def keys(self) -> KeysView[str]:
+        return self._classes.keys()
+
+    def loaded(self) -> List[Type[BaseProvider]]:
+        """
+        Provider classes imported so far
+        """
+        return list(self._loaded.values())
+
+    def preload(self, names: str) -> None:
+        """
+        Import a comma separated list of providers (or "all") ahead of the first request
+        """
+        for name in names.split(","):
+            name = name.strip()
+            if name == "all":
+                for name in self._classes:
+                    self[name]
+            elif name:
+                self[name]
+
+
+PROVIDER_MAP = ProviderRegistry(PROVIDER_CLASSES)
+PROVIDER_MAP.preload(os.getenv(constants.ENV_PRELOAD_PROVIDERS, ""))
+
+__all__ = ["BaseProvider", "PROVIDER_MAP", "PROVIDER_CLASSES", "ProviderRegistry"]
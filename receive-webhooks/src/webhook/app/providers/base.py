@@ -19,25 +19,46 @@
 * SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
+import asyncio
 import binascii
 import base64
+from collections import OrderedDict
 from dataclasses import dataclass
+import hashlib
 import hmac
 import os
-from typing import Optional, Dict, Any
+import threading
+import time
+from typing import TYPE_CHECKING, Optional, Dict, Any, Mapping, Tuple, Type
 
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities import parameters
 from aws_lambda_powertools.utilities.data_classes.common import BaseProxyEvent
 import boto3
 
-from app import resources, constants, exceptions
+from app import resources, constants, exceptions, keys
+from app.body import RequestBody
 
-__all__ = ["BaseProvider", "HTTPBasicCredentials"]
+if TYPE_CHECKING:
+    from app.tenants import Tenant
+
+__all__ = [
+    "BaseProvider",
+    "HTTPBasicCredentials",
+    "ProviderCredentials",
+    "CredentialCache",
+    "CREDENTIALS",
+    "EventIdCache",
+    "SEEN_EVENTS",
+]
 
 logger = Logger(child=True)
 
 SSM_PARAMETER = os.getenv(constants.ENV_SSM_PARAMETER)
+DEDUP_MODE = os.getenv(constants.ENV_DEDUP_MODE, constants.DEDUP_MODE_CONDITIONAL)
+SIGNATURE_TOLERANCE = int(
+    os.getenv(constants.ENV_SIGNATURE_TOLERANCE, constants.SIGNATURE_TOLERANCE)
+)
 
 
 @dataclass(slots=True, frozen=True)
@@ -45,85 +66,463 @@ class HTTPBasicCredentials:
     username: str
     password: str
 
+    def matches(self, other: Optional["HTTPBasicCredentials"]) -> bool:
+        if other is None:
+            return False
+        # compare both fields in constant time, so timing doesn't reveal partial matches
+        username = hmac.compare_digest(self.username.encode(), other.username.encode())
+        password = hmac.compare_digest(self.password.encode(), other.password.encode())
+        return username and password
+
+
+class EventIdCache:
+    """
+    Bounded LRU cache of (provider, tenant, event_id) keys with TTL eviction.
+
+    Providers tend to retry within seconds and the retry usually lands on the same warm
+    container, so remembering recently persisted events avoids a DynamoDB round trip.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Tuple[str, ...], float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Tuple[str, ...]) -> bool:
+        if self.maxsize <= 0:
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            expires = self._entries.get(key)
+            if expires is not None and expires > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            if expires is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False
+
+    def add(self, key: Tuple[str, ...]) -> None:
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = time.monotonic() + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+SEEN_EVENTS = EventIdCache(
+    maxsize=int(os.getenv(constants.ENV_DEDUP_CACHE_SIZE, constants.DEDUP_CACHE_SIZE)),
+    ttl=float(os.getenv(constants.ENV_DEDUP_CACHE_TTL, constants.DEDUP_CACHE_TTL)),
+)
+
+# Read by the duplicate lookup, which only counts items that are no longer a pending claim
+_DUPLICATE_ATTRIBUTES = [constants.PARTITION_KEY, constants.CLAIMED_AT]
+
+
+@dataclass(slots=True, frozen=True)
+class ProviderCredentials:
+    """
+    Credentials for one provider, decoded once per parameter fetch
+    """
+
+    parameter: Mapping[str, Any]
+    key: Optional[bytes] = None
+    signer: Optional[hmac.HMAC] = None
+    basic_auth: Optional[HTTPBasicCredentials] = None
+
+    @classmethod
+    def build(
+        cls, parameter: Mapping[str, Any], provider: Type["BaseProvider"]
+    ) -> "ProviderCredentials":
+        secret = parameter.get(provider.PARAMETER_KEY) if provider.PARAMETER_KEY else None
+        key = None
+        if secret:
+            try:
+                key = provider.decode_secret(secret)
+            except ValueError:
+                logger.warning(f"Unable to decode parameter {provider.PARAMETER_KEY}")
+        algo = provider.SIGNATURE_ALGO
+        signer = hmac.new(key, digestmod=algo) if key and algo else None
+
+        basic_auth = None
+        if "basic_auth_user" in parameter:
+            basic_auth = HTTPBasicCredentials(
+                parameter["basic_auth_user"], parameter.get("basic_auth_password", "")
+            )
+
+        return cls(parameter=parameter, key=key, signer=signer, basic_auth=basic_auth)
+
+    def new_hmac(self, *parts: bytes) -> hmac.HMAC:
+        """
+        Return a copy of the pre-keyed HMAC fed with the given parts
+        """
+        if self.signer is None:
+            raise ValueError("No signing key configured")
+
+        mac = self.signer.copy()
+        for part in parts:
+            mac.update(part)
+        return mac
+
+
+class CredentialCache:
+    """
+    Caches the webhook credential parameter and per-provider key material derived from it.
+
+    Entries are refreshed on a background thread shortly before they expire, so requests keep
+    using the current credentials instead of waiting on SSM.
+    """
+
+    def __init__(self, name: Optional[str], ttl: float, refresh: float) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.refresh = refresh
+        self._parameter: Optional[Dict[str, Any]] = None
+        self._fetched_at = 0.0
+        self._providers: Dict[Type["BaseProvider"], ProviderCredentials] = {}
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def get_parameter(self) -> Dict[str, Any]:
+        if not self.name:
+            return {}
+
+        age = time.monotonic() - self._fetched_at
+        if self._parameter is None or age >= self.ttl:
+            return self._fetch()
+
+        if age >= self.ttl - self.refresh and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._refresh, name="credentials", daemon=True).start()
+
+        return self._parameter
+
+    @property
+    def cached(self) -> bool:
+        """
+        Whether get_parameter() returns without fetching
+        """
+        if not self.name:
+            return True
+        return self._parameter is not None and time.monotonic() - self._fetched_at < self.ttl
+
+    def get(self, provider: Type["BaseProvider"]) -> ProviderCredentials:
+        parameter = self.get_parameter()
+
+        credentials = self._providers.get(provider)
+        if credentials is None or credentials.parameter is not parameter:
+            credentials = ProviderCredentials.build(parameter, provider)
+            self._providers[provider] = credentials
+        return credentials
+
+    def clear(self) -> None:
+        with self._lock:
+            self._parameter = None
+            self._fetched_at = 0.0
+            self._providers.clear()
+
+    def _fetch(self) -> Dict[str, Any]:
+        logger.debug(f"Fetching parameter: {self.name}")
+        parameter = parameters.get_parameter(self.name, transform="json", force_fetch=True)
+        with self._lock:
+            self._parameter = parameter
+            self._fetched_at = time.monotonic()
+        return parameter
+
+    def _refresh(self) -> None:
+        try:
+            self._fetch()
+        except Exception:
+            # keep serving the cached value, the next request past the TTL fetches inline
+            logger.exception("Unable to refresh parameter")
+        finally:
+            self._refreshing = False
+
+
+CREDENTIALS = CredentialCache(
+    SSM_PARAMETER,
+    ttl=float(os.getenv(constants.ENV_CREDENTIALS_TTL, constants.CREDENTIALS_TTL)),
+    refresh=float(os.getenv(constants.ENV_CREDENTIALS_REFRESH, constants.CREDENTIALS_REFRESH)),
+)
+
 
 class BaseProvider:
     SIGNATURE_HEADER: Optional[str] = None
     SIGNATURE_ALGO: Optional[str] = None
     SIGNATURE_ENCODING: Optional[str] = None
+    # Signed timestamps further than this from the current time are rejected, in seconds
+    SIGNATURE_TOLERANCE: int = SIGNATURE_TOLERANCE
     PARAMETER_KEY: Optional[str] = "webhook_secret"
+    # Where the event ID is read from: a header, or a dotted path into the JSON body
+    EVENT_ID_HEADER: Optional[str] = None
+    EVENT_ID_PATH: Optional[str] = None
 
-    def __init__(self, event: BaseProxyEvent, session: Optional[boto3.Session] = None) -> None:
+    def __init__(
+        self,
+        event: BaseProxyEvent,
+        session: Optional[boto3.Session] = None,
+        tenant: Optional["Tenant"] = None,
+    ) -> None:
         self._event = event
-        if not session:
-            session = boto3._get_default_session()
+        # Requests to /<provider>/<tenant> use the tenant's credentials instead of the shared ones
+        self.tenant = tenant
+        self._body: Optional[RequestBody] = None
+        # Clients come from the process-wide registry, so this does not build a new client
         self._client = resources.DynamoDB(session)
+        # Why verification failed, one of the constants.REJECT_* reasons
+        self.rejection: Optional[str] = None
+        # Signature material parsed by check() for verify_signature()
+        self._signature: Any = None
+        self._checked: Optional[bool] = None
+
+    @property
+    def body(self) -> RequestBody:
+        """
+        Request body decoded once and shared by verification, hashing and upload
+        """
+        if self._body is None:
+            self._body = RequestBody.from_event(self._event)
+        return self._body
 
     @classmethod
     def get_provider_name(cls) -> str:
         raise NotImplementedError
 
+    @classmethod
+    def decode_secret(cls, secret: str) -> bytes:
+        """
+        Return the signing key of the secret stored in the parameter
+        """
+        return secret.encode()
+
     def verify(self) -> bool:
-        if not self.SIGNATURE_HEADER or not self.SIGNATURE_ALGO:
-            raise NotImplementedError
+        """
+        Verify the request, cheapest checks first. Returns False with `rejection` set when the
+        request is not authentic.
+        """
+        return self.check() and self.verify_signature()
 
-        signature = self._event.get_header_value(self.SIGNATURE_HEADER)
-        if not signature:
-            logger.warning(f"Signature header {self.SIGNATURE_HEADER} not found")
+    async def verify_async(self) -> bool:
+        """
+        verify() for asyncio callers. The signature is checked on a worker thread only when
+        that may wait on I/O, so requests with cached credentials don't leave the event loop.
+        """
+        if not self.check():
             return False
+        if self.verify_may_block():
+            return await asyncio.to_thread(self.verify_signature)
+        return self.verify_signature()
 
-        payload = self._event.decoded_body
-        if not payload:
-            logger.warning("Missing payload body")
-            return False
+    def verify_may_block(self) -> bool:
+        """
+        Whether verify_signature() may wait on I/O, e.g. to fetch the credentials parameter
+        """
+        return self.tenant is None and not CREDENTIALS.cached
 
-        parameter = self.get_parameter()
-        key = bytes(parameter[self.PARAMETER_KEY], "utf-8")
+    def check(self) -> bool:
+        """
+        Run the checks that need neither I/O nor key material: body and header presence,
+        signature format and timestamp tolerance. Returns False with `rejection` set when the
+        request can be rejected without computing a signature.
+        """
+        if self._checked is None:
+            self._checked = self._check()
+        return self._checked
+
+    def _check(self) -> bool:
+        if not self.body:
+            return self.reject(constants.REJECT_MISSING_BODY, "Missing payload body")
 
+        if not self.SIGNATURE_HEADER:
+            return True
+
+        header = self._event.get_header_value(self.SIGNATURE_HEADER)
+        if not header:
+            return self.reject(
+                constants.REJECT_MISSING_SIGNATURE,
+                f"Signature header {self.SIGNATURE_HEADER} not found",
+            )
+
+        try:
+            self._signature = self.parse_signature(header)
+        except ValueError:
+            return self.reject(
+                constants.REJECT_MALFORMED_SIGNATURE,
+                f"Malformed signature header {self.SIGNATURE_HEADER}",
+            )
+
+        timestamp = self.signed_at()
+        if timestamp is not None and abs(time.time() - timestamp) > self.SIGNATURE_TOLERANCE:
+            return self.reject(
+                constants.REJECT_STALE_TIMESTAMP,
+                "Signature timestamp outside of the tolerance",
+                timestamp=timestamp,
+            )
+
+        return True
+
+    def parse_signature(self, header: str) -> Any:
+        """
+        Parse the signature header into the material verify_signature() checks, raising
+        ValueError when it is malformed. By default the header is the encoded HMAC of the body.
+        """
         if self.SIGNATURE_ENCODING == "base64":
-            computed_signature = hmac.new(key, payload, self.SIGNATURE_ALGO).digest()
-            computed_signature = base64.encodebytes(computed_signature).decode().rstrip()
+            digest = base64.b64decode(header, validate=True)
         else:
-            computed_signature = hmac.new(key, payload, self.SIGNATURE_ALGO).hexdigest()
+            digest = bytes.fromhex(header)
 
-        if not hmac.compare_digest(signature, computed_signature):
-            logger.warning(
+        if self.SIGNATURE_ALGO and len(digest) != hashlib.new(self.SIGNATURE_ALGO).digest_size:
+            raise ValueError("Unexpected signature length")
+        return digest
+
+    def signed_at(self) -> Optional[float]:
+        """
+        Return the timestamp covered by the parsed signature, if the provider signs one
+        """
+        return None
+
+    def verify_signature(self) -> bool:
+        """
+        Check the signature material parsed by check() against the credentials
+        """
+        if not self.SIGNATURE_ALGO:
+            raise NotImplementedError
+
+        credentials = self.get_credentials()
+        if not credentials.signer:
+            return self.reject(
+                constants.REJECT_NOT_CONFIGURED, f"Parameter {self.PARAMETER_KEY} not found"
+            )
+
+        if not hmac.compare_digest(credentials.new_hmac(self.body.data).digest(), self._signature):
+            return self.reject(
+                constants.REJECT_INVALID_SIGNATURE,
                 "Computed signature did not match provided signature",
-                signature=signature,
-                computed_signature=computed_signature,
             )
-            return False
 
         return True
 
+    def reject(self, reason: str, message: str, **kwargs: Any) -> bool:
+        """
+        Log and record why the request failed verification, returning False
+        """
+        logger.warning(message, reason=reason, **kwargs)
+        self.rejection = reason
+        return False
+
     def get_event_id(self) -> Optional[str]:
         """
         Return the unique ID for this event
         """
+        if self.EVENT_ID_HEADER:
+            return self._event.get_header_value(self.EVENT_ID_HEADER)
+        if self.EVENT_ID_PATH:
+            # only scans the body up to the ID, parsing it fully at most once per request
+            return self.body.get_field(self.EVENT_ID_PATH.split("."))
         raise NotImplementedError
 
-    def get_parameter(self) -> Dict[str, Any]:
-        if not SSM_PARAMETER:
-            return {}
+    @property
+    def tenant_name(self) -> Optional[str]:
+        return self.tenant.name if self.tenant else None
 
-        logger.debug(f"Fetching parameter: {SSM_PARAMETER}")
-        return parameters.get_parameter(SSM_PARAMETER, transform="json")
+    def get_parameter(self) -> Mapping[str, Any]:
+        if self.tenant:
+            return self.tenant.parameter
+        return CREDENTIALS.get_parameter()
+
+    def get_credentials(self) -> ProviderCredentials:
+        if self.tenant:
+            return self.tenant.credentials(type(self))
+        return CREDENTIALS.get(type(self))
 
     def is_duplicate(self, event_id: Optional[str]) -> bool:
-        if not event_id:
-            # if we don't have a unique event ID, treat the event as not a duplicate
+        duplicate = self._known_duplicate(event_id)
+        if duplicate is not None:
+            return duplicate
+
+        try:
+            item = self._client.get_item(self._event_key(event_id), _DUPLICATE_ATTRIBUTES)
+        except exceptions.NotFoundError:
             return False
 
-        key = {
-            constants.PARTITION_KEY: self.get_provider_name().upper(),
-            constants.SORT_KEY: event_id,
-        }
+        return self._stored(event_id, item)
+
+    async def is_duplicate_async(
+        self, event_id: Optional[str], dynamodb: resources.AsyncDynamoDB
+    ) -> bool:
+        """
+        is_duplicate() for asyncio callers, looking the event up with the given async client
+        """
+        duplicate = self._known_duplicate(event_id)
+        if duplicate is not None:
+            return duplicate
+
         try:
-            self._client.get_item(key, attributes=[constants.PARTITION_KEY])
+            item = await dynamodb.get_item(self._event_key(event_id), _DUPLICATE_ATTRIBUTES)
         except exceptions.NotFoundError:
             return False
 
+        return self._stored(event_id, item)
+
+    def _known_duplicate(self, event_id: Optional[str]) -> Optional[bool]:
+        """
+        Whether the event is a duplicate when that is known without a lookup, otherwise None
+        """
+        if not event_id:
+            # if we don't have a unique event ID, treat the event as not a duplicate
+            return False
+
+        if (self.get_provider_name(), self.tenant_name or "", event_id) in SEEN_EVENTS:
+            return True
+
+        if DEDUP_MODE == constants.DEDUP_MODE_CONDITIONAL:
+            # the conditional write in post_webhook decides whether the event is a duplicate
+            return False
+
+        return None
+
+    def _stored(self, event_id: str, item: Dict[str, Any]) -> bool:
+        """
+        Whether a looked up item is a stored event rather than a claim still being written
+        """
+        if constants.CLAIMED_AT in item:
+            return False
+
+        self.mark_seen(event_id)
         return True
 
+    def _event_key(self, event_id: str) -> Dict[str, Any]:
+        return {
+            constants.PARTITION_KEY: keys.partition_key(
+                self.get_provider_name(), event_id, self.tenant_name
+            ),
+            constants.SORT_KEY: event_id,
+        }
+
+    def mark_seen(self, event_id: Optional[str]) -> None:
+        """
+        Remember an event ID that has been persisted so retries can skip the DynamoDB lookup
+        """
+        if event_id:
+            SEEN_EVENTS.add((self.get_provider_name(), self.tenant_name or "", event_id))
+
     def extract_authorization(self, authorization: str) -> Optional[HTTPBasicCredentials]:
         scheme, _, param = authorization.partition(" ")
         if not authorization or scheme.lower() != "basic":
@@ -19,7 +19,7 @@
 * SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
-from typing import Optional, Dict, Any, Literal
+from typing import Literal
 
 from app.providers.base import BaseProvider
 
@@ -30,11 +30,8 @@ __all__ = ["DwollaProvider"]
 class DwollaProvider(BaseProvider):
     SIGNATURE_HEADER = "X-Request-Signature-SHA-256"
     SIGNATURE_ALGO = "sha256"
+    EVENT_ID_PATH = "id"
 
     @classmethod
     def get_provider_name(cls) -> Literal["dwolla"]:
         return "dwolla"
-
-    def get_event_id(self) -> Optional[str]:
-        data: Dict[str, Any] = self._event.json_body
-        return data.get("id")
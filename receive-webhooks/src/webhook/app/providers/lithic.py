@@ -21,36 +21,13 @@
 
 from typing import Literal
 
-from aws_lambda_powertools import Logger
-from lithic import Lithic
-
-from app.providers.base import BaseProvider
-
-logger = Logger(child=True)
+from app.providers.timestamped import StandardWebhooksProvider
 
 __all__ = ["LithicProvider"]
 
 
 # @see https://docs.lithic.com/docs/events-api#example-code
-class LithicProvider(BaseProvider):
+class LithicProvider(StandardWebhooksProvider):
     @classmethod
     def get_provider_name(cls) -> Literal["lithic"]:
         return "lithic"
-
-    def get_event_id(self) -> str | None:
-        return self._event.get_header_value("webhook-id")
-
-    def verify(self) -> bool:
-        payload = self._event.decoded_body
-
-        parameter = self.get_parameter()
-        secret: str = parameter["webhook_secret"]
-
-        client = Lithic()
-        try:
-            client.webhooks.unwrap(payload, self._event.headers, secret)
-        except Exception as error:
-            logger.warning("Error verifying webhook signature", error)
-            return False
-
-        raise True
@@ -19,10 +19,11 @@
 * SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
-from typing import Optional, Literal
+from typing import Literal, Optional
 
 from aws_lambda_powertools import Logger
 
+from app import constants
 from app.providers.base import BaseProvider, HTTPBasicCredentials
 
 __all__ = ["MarqetaProvider"]
@@ -34,32 +35,37 @@ logger = Logger(child=True)
 class MarqetaProvider(BaseProvider):
     SIGNATURE_HEADER = "X-Marqeta-Signature"
     SIGNATURE_ALGO = "sha1"
+    EVENT_ID_HEADER = "x-marqeta-request-trace-id"
+
+    _basic_auth: Optional[HTTPBasicCredentials] = None
 
     @classmethod
     def get_provider_name(cls) -> Literal["marqeta"]:
         return "marqeta"
 
-    def get_event_id(self) -> Optional[str]:
-        return self._event.get_header_value("x-marqeta-request-trace-id")
-
-    def verify(self) -> bool:
+    def _check(self) -> bool:
+        # Marqeta uses both an Authorization header and a signature header
         authorization = self._event.get_header_value("Authorization")
         if not authorization:
-            logger.warning(f"Authorization header not found")
-            return False
+            return self.reject(constants.REJECT_MISSING_SIGNATURE, "Authorization header not found")
 
-        parameter = self.get_parameter()
+        self._basic_auth = self.extract_authorization(authorization)
+        if not self._basic_auth:
+            return self.reject(
+                constants.REJECT_MALFORMED_SIGNATURE, "Malformed Authorization header"
+            )
 
-        expected = HTTPBasicCredentials(
-            parameter["basic_auth_user"], parameter["basic_auth_password"]
-        )
+        return super()._check()
 
-        actual = self.extract_authorization(authorization)
+    def verify_signature(self) -> bool:
+        expected = self.get_credentials().basic_auth
+        if not expected:
+            return self.reject(
+                constants.REJECT_NOT_CONFIGURED, "Parameter basic_auth_user not found"
+            )
 
-        if expected != actual:
-            logger.warning("Encoded values did not match", expected=expected, actual=actual)
-            return False
+        if not expected.matches(self._basic_auth):
+            return self.reject(constants.REJECT_INVALID_CREDENTIALS, "Encoded values did not match")
 
-        # Marqeta uses both an Authorization header and a signature header. After validating
-        # the Authorization header, we need to verify the signature.
-        return super().verify()
+        # After validating the Authorization header, we need to verify the signature
+        return super().verify_signature()
@@ -19,101 +19,366 @@
 * SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, replace
 import hmac
-import hashlib
+import json
+import math
+import os
+import threading
 import time
-from typing import Optional, Dict, Any, Literal
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
 from aws_lambda_powertools import Logger
 import requests
-from jose import jwt
+from requests.adapters import HTTPAdapter
+from jose import jwt, JWTError
+from urllib3.util.retry import Retry
 
+from app import constants, exceptions, resources
 from app.providers.base import BaseProvider
 
 logger = Logger(child=True)
 
-__all__ = ["PlaidProvider"]
+__all__ = ["PlaidProvider", "VerificationKey", "VerificationKeyCache", "VERIFICATION_KEYS"]
 
-KEY_CACHE = {}
+PLAID_BASE_URL = os.getenv(constants.ENV_PLAID_BASE_URL, constants.PLAID_BASE_URL)
+# Endpoint for getting public verification keys.
+ENDPOINT = f"{PLAID_BASE_URL}/webhook_verification_key/get"
+
+
+@dataclass(slots=True, frozen=True)
+class VerificationKey:
+    """
+    A Plaid verification key (JWK), with a None key for a key ID that Plaid does not know
+    """
+
+    key: Optional[Dict[str, Any]]
+    fetched_at: float  # epoch seconds, so entries read from the table can be aged too
+    retry_at: float = 0.0  # epoch seconds before which a failed re-fetch is not retried
+
+    @property
+    def expired(self) -> bool:
+        return self.key is not None and self.key.get("expired_at") is not None
+
+
+class VerificationKeyCache:
+    """
+    Bounded LRU cache of Plaid verification keys by key ID, backed by the table.
+
+    A miss is loaded once however many requests wait on it, and loads read the table before
+    calling Plaid, so a key fetched by one container warms the others, including cold ones.
+    When a new key ID shows up the keys have been rotated, so the other unexpired keys are
+    re-fetched alongside it, concurrently over a pooled session, to learn whether they expired.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        maxsize: int,
+        ttl: float,
+        unknown_ttl: float,
+        max_workers: int = constants.PLAID_MAX_WORKERS,
+    ) -> None:
+        self.url = url
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.unknown_ttl = unknown_ttl
+        self.max_workers = max_workers
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self._entries: OrderedDict[str, VerificationKey] = OrderedDict()
+        self._loading: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._dynamodb: Optional[resources.DynamoDB] = None
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            # idempotent lookups, so a failed POST can be retried once within the timeout budget
+            retries = Retry(
+                total=1, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=None
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=self.max_workers, max_retries=retries
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+
+    def cached(self, key_id: str) -> bool:
+        """
+        Whether get() returns this key without a lookup
+        """
+        entry = self._entries.get(key_id)
+        return entry is not None and self._is_fresh(entry, time.time(), self.ttl)
+
+    def get(self, key_id: str, client_id: str, secret: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the key with this ID, or None if Plaid does not know it.
+
+        Raises requests.RequestException when the key is neither cached nor fetchable.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key_id)
+            if entry is not None and self._is_fresh(entry, now, self.ttl):
+                self._entries.move_to_end(key_id)
+                self.hits += 1
+                return entry.key
+            self.misses += 1
+
+            key_ids = [key_id]
+            if entry is None:
+                # skip keys refreshed recently, so made-up key IDs can't multiply Plaid calls
+                key_ids.extend(
+                    other
+                    for other, cached in self._entries.items()
+                    if cached.key is not None
+                    and not cached.expired
+                    and now - cached.fetched_at >= self.unknown_ttl
+                )
+
+            futures: Dict[str, Future] = {}
+            owned: List[str] = []
+            for kid in key_ids:
+                future = self._loading.get(kid)
+                if future is None:
+                    future = self._loading[kid] = Future()
+                    owned.append(kid)
+                futures[kid] = future
+
+        background = [kid for kid in owned if kid != key_id]
+        if background:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="plaid-keys"
+                )
+            for kid in background:
+                # only reuse keys another container has just re-fetched
+                future = futures[kid]
+                self._executor.submit(self._load, kid, future, client_id, secret, self.unknown_ttl)
+        if key_id in owned:
+            self._load(key_id, futures[key_id], client_id, secret, self.ttl)
+        if background:
+            wait([futures[kid] for kid in background])
+
+        return futures[key_id].result()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.fetches = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetches": self.fetches,
+        }
+
+    def _is_fresh(self, entry: VerificationKey, now: float, max_age: float) -> bool:
+        if entry.expired or now < entry.retry_at:
+            # expired keys never become valid again, and a failed re-fetch is not retried at once
+            return True
+        if entry.key is None:
+            max_age = self.unknown_ttl
+        return now - entry.fetched_at < max_age
+
+    def _load(
+        self, key_id: str, future: Future, client_id: str, secret: str, max_age: float
+    ) -> None:
+        try:
+            entry = self._resolve(key_id, client_id, secret, max_age)
+        except Exception as error:
+            with self._lock:
+                del self._loading[key_id]
+            future.set_exception(error)
+            return
+
+        with self._lock:
+            self._entries[key_id] = entry
+            self._entries.move_to_end(key_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            del self._loading[key_id]
+        future.set_result(entry.key)
+
+    def _resolve(self, key_id: str, client_id: str, secret: str, max_age: float) -> VerificationKey:
+        entry = self._read(key_id)
+        if entry is not None and self._is_fresh(entry, time.time(), max_age):
+            return entry
+
+        try:
+            fetched = self._fetch(key_id, client_id, secret)
+        except requests.RequestException:
+            # keep verifying with the stale key rather than failing every request
+            stale = entry or self._entries.get(key_id)
+            if stale is None or stale.key is None:
+                raise
+            logger.exception("Unable to refresh verification key", key_id=key_id)
+            # rather than calling Plaid again on every request while it is failing
+            return replace(stale, retry_at=time.time() + constants.PLAID_KEY_RETRY_INTERVAL)
+
+        if fetched.key is not None:
+            self._write(key_id, fetched)
+        return fetched
+
+    def _fetch(self, key_id: str, client_id: str, secret: str) -> VerificationKey:
+        logger.debug(f"Fetching verification key: {key_id}")
+        response = self.session.post(
+            self.url,
+            json={"client_id": client_id, "secret": secret, "key_id": key_id},
+            timeout=constants.PLAID_TIMEOUT,
+        )
+        self.fetches += 1
+        fetched_at = time.time()
+        if response.status_code == 400:
+            error_code = _json(response).get("error_code")
+            if error_code == "INVALID_WEBHOOK_VERIFICATION_KEY_ID":
+                return VerificationKey(None, fetched_at)
+            logger.error("Unable to fetch verification key", error_code=error_code)
+        response.raise_for_status()
+
+        key = _json(response).get("key")
+        if not isinstance(key, dict):
+            # an error page or an unexpected body fails like an HTTP error
+            raise requests.RequestException(
+                "Malformed verification key response", response=response
+            )
+        return VerificationKey(key, fetched_at)
+
+    @property
+    def dynamodb(self) -> resources.DynamoDB:
+        if self._dynamodb is None:
+            self._dynamodb = resources.DynamoDB()
+        return self._dynamodb
+
+    def _read(self, key_id: str) -> Optional[VerificationKey]:
+        key = {constants.PARTITION_KEY: constants.PLAID_KEY_PARTITION, constants.SORT_KEY: key_id}
+        try:
+            item = self.dynamodb.get_item(key, attributes=["jwk", "fetched_at"])
+        except (exceptions.NotFoundError, exceptions.DynamoDBReadError):
+            return None
+        return VerificationKey(json.loads(item["jwk"]), float(item["fetched_at"]))
+
+    def _write(self, key_id: str, entry: VerificationKey) -> None:
+        fetched_at = math.floor(entry.fetched_at)
+        item = {
+            constants.PARTITION_KEY: constants.PLAID_KEY_PARTITION,
+            constants.SORT_KEY: key_id,
+            "jwk": json.dumps(entry.key),
+            "fetched_at": fetched_at,
+            "expires_at": fetched_at + constants.EXPIRES_IN_DAYS * 86400,
+        }
+        try:
+            self.dynamodb.put_item(item)
+        except exceptions.DynamoDBWriteError:
+            # the key is still cached in memory, other containers fetch it themselves
+            pass
+
+
+def _json(response: requests.Response) -> Dict[str, Any]:
+    """
+    Return the JSON object of a Plaid response, or an empty one for any other body
+    """
+    try:
+        body = response.json()
+    except ValueError:
+        return {}
+    return body if isinstance(body, dict) else {}
+
+
+VERIFICATION_KEYS = VerificationKeyCache(
+    ENDPOINT,
+    maxsize=int(os.getenv(constants.ENV_PLAID_KEY_CACHE_SIZE, constants.PLAID_KEY_CACHE_SIZE)),
+    ttl=float(os.getenv(constants.ENV_PLAID_KEY_TTL, constants.PLAID_KEY_TTL)),
+    unknown_ttl=constants.PLAID_UNKNOWN_KEY_TTL,
+)
 
 
 # @see https://plaid.com/docs/api/webhooks/webhook-verification/
 class PlaidProvider(BaseProvider):
     SIGNATURE_HEADER = "plaid-verification"
-    # Endpoint for getting public verification keys.
-    ENDPOINT = "https://production.plaid.com/webhook_verification_key/get"
+    # Claims of the verified JWT
+    _claims: Optional[Dict[str, Any]] = None
 
     @classmethod
     def get_provider_name(cls) -> Literal["plaid"]:
         return "plaid"
 
-    def get_event_id(self) -> Optional[str]:
-        data: Dict[str, Any] = self._event.json_body
-        return data.get("item_id")
+    def parse_signature(self, header: str) -> Tuple[str, str, Dict[str, Any]]:
+        # A JWT signed with ES256, whose claims include the issue time and the body hash
+        try:
+            jwt_header = jwt.get_unverified_header(header)
+            claims = jwt.get_unverified_claims(header)
+        except JWTError as error:
+            raise ValueError("Malformed JWT") from error
+        if jwt_header.get("alg") != "ES256" or not jwt_header.get("kid"):
+            raise ValueError("Unexpected JWT algorithm or missing key ID")
+        if not isinstance(claims.get("iat"), int):
+            raise ValueError("Missing iat claim")
+        return header, jwt_header["kid"], claims
 
-    def verify(self) -> bool:
-        signed_jwt = self._event.get_header_value(self.SIGNATURE_HEADER)
-        if not signed_jwt:
-            logger.warning(f"Signature header {self.SIGNATURE_HEADER} not found")
-            return False
-        current_key_id = jwt.get_unverified_header(signed_jwt)["kid"]
+    def get_event_id(self) -> Optional[str]:
+        # Plaid sends no event ID, and item_id is shared by every webhook of an Item. A retry
+        # carries the same body, so the verified body hash identifies the event.
+        if self._claims is None:
+            return None
+        return self._claims.get("request_body_sha256")
 
-        parameter = self.get_parameter()
+    def signed_at(self) -> Optional[float]:
+        # Plaid rejects tokens issued more than 5 minutes ago
+        return self._signature[2]["iat"]
 
-        # If the key is not in the cache, update all non-expired keys.
-        if current_key_id not in KEY_CACHE:
-            keys_ids_to_update = [
-                key_id for key_id, key in KEY_CACHE.items() if key["expired_at"] is None
-            ]
-
-            keys_ids_to_update.append(current_key_id)
-
-            for key_id in keys_ids_to_update:
-                r = requests.post(
-                    self.ENDPOINT,
-                    json={
-                        "client_id": parameter["client_id"],
-                        "secret": parameter["client_secret"],
-                        "key_id": key_id,
-                    },
-                )
+    def verify_may_block(self) -> bool:
+        # keys missing from memory are read from the table or fetched from Plaid
+        return super().verify_may_block() or not VERIFICATION_KEYS.cached(self._signature[1])
 
-                # If this is the case, the key ID may be invalid.
-                if r.status_code != 200:
-                    continue
+    def verify_signature(self) -> bool:
+        signed_jwt, current_key_id, _ = self._signature
 
-                response = r.json()
-                key = response["key"]
-                KEY_CACHE[key_id] = key
+        parameter = self.get_parameter()
+        client_id, secret = parameter.get("client_id"), parameter.get("client_secret")
+        if not client_id or not secret:
+            return self.reject(constants.REJECT_NOT_CONFIGURED, "Missing Plaid API keys")
 
-        # If the key ID is not in the cache, the key ID may be invalid.
-        if current_key_id not in KEY_CACHE:
-            return False
+        try:
+            key = VERIFICATION_KEYS.get(current_key_id, client_id, secret)
+        except requests.RequestException:
+            logger.exception("Unable to fetch verification key", key_id=current_key_id)
+            return self.reject(constants.REJECT_KEY_UNAVAILABLE, "Verification key unavailable")
 
-        # Fetch the current key from the cache.
-        key = KEY_CACHE[current_key_id]
+        # If Plaid does not know the key, the key ID may be invalid.
+        if key is None:
+            return self.reject(constants.REJECT_INVALID_SIGNATURE, "Unknown verification key")
 
         # Reject expired keys.
-        if key["expired_at"] is not None:
-            return False
+        if key.get("expired_at") is not None:
+            return self.reject(constants.REJECT_INVALID_SIGNATURE, "Expired verification key")
 
         # Validate the signature and extract the claims.
         try:
             claims = jwt.decode(signed_jwt, key, algorithms=["ES256"])
-        except jwt.JWTError:
-            return False
-
-        # Ensure that the token is not expired.
-        if claims["iat"] < time.time() - 5 * 60:
-            return False
-
-        body = self._event.decoded_body
+        except JWTError:
+            return self.reject(constants.REJECT_INVALID_SIGNATURE, "Invalid JWT signature")
 
         # Compute the hash of the body.
-        m = hashlib.sha256()
-        m.update(body.encode())
-        body_hash = m.hexdigest()
+        body_hash = self.body.digest("sha256").hex()
 
         # Ensure that the hash of the body matches the claim.
         # Use constant time comparison to prevent timing attacks.
-        return hmac.compare_digest(body_hash, claims["request_body_sha256"])
+        if not hmac.compare_digest(body_hash, claims["request_body_sha256"]):
+            return self.reject(constants.REJECT_INVALID_SIGNATURE, "Body hash did not match")
+
+        self._claims = claims
+        return True
@@ -19,7 +19,7 @@
 * SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
-from typing import Optional, Dict, Any, Literal
+from typing import Literal
 
 from app.providers.base import BaseProvider
 
@@ -29,11 +29,8 @@ __all__ = ["SolidProvider"]
 class SolidProvider(BaseProvider):
     SIGNATURE_HEADER = "sd-webhook-sha256-signature"
     SIGNATURE_ALGO = "sha256"
+    EVENT_ID_PATH = "data.id"
 
     @classmethod
     def get_provider_name(cls) -> Literal["solidfi"]:
         return "solidfi"
-
-    def get_event_id(self) -> Optional[str]:
-        data: Dict[str, Any] = self._event.json_body
-        return data.get("data", {}).get("id")
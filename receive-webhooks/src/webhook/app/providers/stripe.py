@@ -19,52 +19,20 @@
 * SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
-from typing import Optional, Dict, Any, Literal
+from typing import Literal
 
-from aws_lambda_powertools import Logger
-import stripe
-
-from app.providers.base import BaseProvider
-
-logger = Logger(child=True)
+from app.providers.timestamped import TimestampPairsProvider
 
 __all__ = ["StripeProvider"]
 
 
-# @see https://stripe.com/docs/webhooks#verify-official-libraries
-class StripeProvider(BaseProvider):
+# @see https://docs.stripe.com/webhooks#verify-manually
+class StripeProvider(TimestampPairsProvider):
+    # "t=<timestamp>,v1=<signature>[,v1=...]" over "<timestamp>.<body>", keyed with the whole
+    # "whsec_" secret
     SIGNATURE_HEADER = "Stripe-Signature"
-    SIGNATURE_ALGO = "sha256"
+    EVENT_ID_PATH = "id"
 
     @classmethod
     def get_provider_name(cls) -> Literal["stripe"]:
         return "stripe"
-
-    def get_event_id(self) -> Optional[str]:
-        data: Dict[str, Any] = self._event.json_body
-        return data.get("id")
-
-    def verify(self) -> bool:
-        signature = self._event.get_header_value(self.SIGNATURE_HEADER)
-        if not signature:
-            logger.warning(f"Signature header {self.SIGNATURE_HEADER} not found")
-            return False
-
-        payload = self._event.decoded_body
-        if not payload:
-            logger.warning("Missing payload body")
-            return False
-
-        parameter = self.get_parameter()
-        secret = parameter["webhook_secret"]
-
-        try:
-            stripe.Webhook.construct_event(payload, signature, secret)
-        except ValueError as error:
-            logger.warning("Invalid payload", error)
-            return False
-        except stripe.error.SignatureVerificationError as error:
-            logger.warning("Error verifying webhook signature", error)
-            return False
-
-        return True
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import base64
+from dataclasses import dataclass
+import hmac
+from typing import Iterable, List, Tuple
+
+from app import constants
+from app.providers.base import BaseProvider
+
+__all__ = [
+    "TimestampedSignature",
+    "TimestampedHMACProvider",
+    "TimestampPairsProvider",
+    "StandardWebhooksProvider",
+]
+
+
+@dataclass(slots=True, frozen=True)
+class TimestampedSignature:
+    """
+    Parsed signature header: the signed timestamp, the bytes signed ahead of the body, and every
+    signature sent (providers send several while a secret is being rotated)
+    """
+
+    timestamp: int
+    prefix: bytes
+    signatures: Tuple[bytes, ...]
+
+
+class TimestampedHMACProvider(BaseProvider):
+    """
+    Providers signing HMAC(prefix + body) with a timestamp in the prefix. Requests are authentic
+    when any of their signatures matches, and fresh when the timestamp is within the tolerance.
+    """
+
+    SIGNATURE_ALGO = "sha256"
+    # Signatures of other versions are ignored
+    SIGNATURE_VERSION = "v1"
+
+    def signed_at(self) -> int:
+        return self._signature.timestamp
+
+    def decode_signatures(self, values: Iterable[str]) -> Tuple[bytes, ...]:
+        """
+        Decode the signatures of SIGNATURE_VERSION, skipping malformed ones as long as one is left
+        """
+        signatures: List[bytes] = []
+        for value in values:
+            try:
+                signatures.append(super().parse_signature(value))
+            except ValueError:
+                continue
+        if not signatures:
+            raise ValueError(f"No valid {self.SIGNATURE_VERSION} signature")
+        return tuple(signatures)
+
+    def verify_signature(self) -> bool:
+        credentials = self.get_credentials()
+        if not credentials.signer:
+            return self.reject(
+                constants.REJECT_NOT_CONFIGURED, f"Parameter {self.PARAMETER_KEY} not found"
+            )
+
+        computed = credentials.new_hmac(self._signature.prefix, self.body.data).digest()
+        # compare every signature, so the time taken doesn't tell which one matched
+        matched = False
+        for signature in self._signature.signatures:
+            matched |= hmac.compare_digest(signature, computed)
+        if not matched:
+            return self.reject(
+                constants.REJECT_INVALID_SIGNATURE,
+                "Computed signature did not match provided signature",
+            )
+
+        return True
+
+
+class TimestampPairsProvider(TimestampedHMACProvider):
+    """
+    "t=<timestamp>,v1=<hex signature>[,v1=...]" headers over "<timestamp><separator><body>"
+    """
+
+    SIGNED_SEPARATOR = "."
+
+    def parse_signature(self, header: str) -> TimestampedSignature:
+        timestamp, values = None, []
+        for pair in header.split(","):
+            name, _, value = pair.strip().partition("=")
+            if name == "t":
+                timestamp = value
+            elif name == self.SIGNATURE_VERSION:
+                values.append(value)
+        if not timestamp or not timestamp.isdigit():
+            raise ValueError("Missing timestamp")
+
+        prefix = f"{timestamp}{self.SIGNED_SEPARATOR}".encode()
+        return TimestampedSignature(int(timestamp), prefix, self.decode_signatures(values))
+
+
+# @see https://github.com/standard-webhooks/standard-webhooks/blob/main/spec/standard-webhooks.md
+class StandardWebhooksProvider(TimestampedHMACProvider):
+    """
+    Space separated "v1,<base64 signature>" entries over "<webhook-id>.<webhook-timestamp>.<body>",
+    keyed with the base64 decoded "whsec_" secret
+    """
+
+    SIGNATURE_HEADER = "webhook-signature"
+    SIGNATURE_ENCODING = "base64"
+    EVENT_ID_HEADER = "webhook-id"
+    TIMESTAMP_HEADER = "webhook-timestamp"
+
+    @classmethod
+    def decode_secret(cls, secret: str) -> bytes:
+        return base64.b64decode(secret.removeprefix("whsec_"))
+
+    def _check(self) -> bool:
+        message_id = self._event.get_header_value(self.EVENT_ID_HEADER)
+        timestamp = self._event.get_header_value(self.TIMESTAMP_HEADER)
+        if not message_id or not timestamp:
+            return self.reject(
+                constants.REJECT_MISSING_SIGNATURE,
+                f"{self.EVENT_ID_HEADER} or {self.TIMESTAMP_HEADER} header not found",
+            )
+        return super()._check()
+
+    def parse_signature(self, header: str) -> TimestampedSignature:
+        message_id = self._event.get_header_value(self.EVENT_ID_HEADER)
+        timestamp = self._event.get_header_value(self.TIMESTAMP_HEADER)
+        if not timestamp.isdigit():
+            raise ValueError(f"Malformed {self.TIMESTAMP_HEADER}")
+
+        values = [
+            signature
+            for version, _, signature in (entry.partition(",") for entry in header.split())
+            if version == self.SIGNATURE_VERSION
+        ]
+        prefix = f"{message_id}.{timestamp}.".encode()
+        return TimestampedSignature(int(timestamp), prefix, self.decode_signatures(values))
@@ -19,10 +19,11 @@
 * SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
-from typing import Optional, Dict, Any, Literal
+from typing import Literal
 
 from aws_lambda_powertools import Logger
 
+from app import constants
 from app.providers.base import BaseProvider, HTTPBasicCredentials
 
 __all__ = ["TreasuryPrimeProvider"]
@@ -33,31 +34,26 @@ logger = Logger(child=True)
 # @see https://developers.treasuryprime.com/docs/webhooks#validating-webhooks
 class TreasuryPrimeProvider(BaseProvider):
     SIGNATURE_HEADER = "Authorization"
+    EVENT_ID_PATH = "id"
 
     @classmethod
     def get_provider_name(cls) -> Literal["treasury_prime"]:
         return "treasury_prime"
 
-    def get_event_id(self) -> Optional[str]:
-        data: Dict[str, Any] = self._event.json_body
-        return data.get("id")
-
-    def verify(self) -> bool:
-        authorization = self._event.get_header_value(self.SIGNATURE_HEADER)
-        if not authorization:
-            logger.warning(f"Authorization header not found")
-            return False
-
-        parameter = self.get_parameter()
-
-        expected = HTTPBasicCredentials(
-            parameter["basic_auth_user"], parameter["basic_auth_password"]
-        )
-
-        actual = self.extract_authorization(authorization)
-
-        if expected != actual:
-            logger.warning("Encoded values did not match", expected=expected, actual=actual)
-            return False
+    def parse_signature(self, header: str) -> HTTPBasicCredentials:
+        credentials = self.extract_authorization(header)
+        if not credentials:
+            raise ValueError("Malformed Authorization header")
+        return credentials
+
+    def verify_signature(self) -> bool:
+        expected = self.get_credentials().basic_auth
+        if not expected:
+            return self.reject(
+                constants.REJECT_NOT_CONFIGURED, "Parameter basic_auth_user not found"
+            )
+
+        if not expected.matches(self._signature):
+            return self.reject(constants.REJECT_INVALID_CREDENTIALS, "Encoded values did not match")
 
         return True
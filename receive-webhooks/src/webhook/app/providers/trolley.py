@@ -19,56 +19,20 @@
 * SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
-import hmac
-from typing import Optional, Literal
+from typing import Literal
 
-from aws_lambda_powertools import Logger
-
-from app.providers.base import BaseProvider
+from app.providers.timestamped import TimestampPairsProvider
 
 __all__ = ["TrolleyProvider"]
 
-logger = Logger(child=True)
-
 
 # @see https://docs.trolley.com/api/#webhooks-verify
-class TrolleyProvider(BaseProvider):
+class TrolleyProvider(TimestampPairsProvider):
+    # "t=<timestamp>,v1=<signature>" over the timestamp directly followed by the body
     SIGNATURE_HEADER = "X-PaymentRails-Signature"
-    SIGNATURE_ALGO = "sha256"
+    SIGNED_SEPARATOR = ""
+    EVENT_ID_HEADER = "X-PaymentRails-Delivery"
 
     @classmethod
     def get_provider_name(cls) -> Literal["trolley"]:
         return "trolley"
-
-    def get_event_id(self) -> Optional[str]:
-        return self._event.get_header_value("X-PaymentRails-Delivery")
-
-    def verify(self) -> bool:
-        signature = self._event.get_header_value(self.SIGNATURE_HEADER)
-        if not signature:
-            logger.warning(f"Signature header {self.SIGNATURE_HEADER} not found")
-            return False
-
-        payload = self._event.decoded_body
-        if not payload:
-            logger.warning("Missing payload body")
-            return False
-
-        parameter = self.get_parameter()
-        key = bytes(parameter[self.PARAMETER_KEY], "utf-8")
-
-        sig_values = signature.split(",")
-        timestamp = sig_values[0].split("=")[1]
-        v1 = sig_values[1].split("=")[1]
-
-        computed_signature = hmac.new(key, timestamp + payload, self.SIGNATURE_ALGO).hexdigest()
-
-        if not hmac.compare_digest(v1, computed_signature):
-            logger.warning(
-                "Computed signature did not match provided signature",
-                signature=v1,
-                computed_signature=computed_signature,
-            )
-            return False
-
-        return True
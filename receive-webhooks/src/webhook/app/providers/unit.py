@@ -19,7 +19,7 @@
 * SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
-from typing import Optional, Dict, Any, Literal
+from typing import Literal
 
 from app.providers.base import BaseProvider
 
@@ -31,11 +31,8 @@ class UnitProvider(BaseProvider):
     SIGNATURE_HEADER = "x-unit-signature"
     SIGNATURE_ALGO = "sha1"
     SIGNATURE_ENCODING = "base64"
+    EVENT_ID_PATH = "id"
 
     @classmethod
     def get_provider_name(cls) -> Literal["unit"]:
         return "unit"
-
-    def get_event_id(self) -> Optional[str]:
-        data: Dict[str, Any] = self._event.json_body
-        return data.get("id")
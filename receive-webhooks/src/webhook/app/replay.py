@@ -0,0 +1,387 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Replays archived webhooks of a provider through the ingest pipeline, for example to backfill
+# items lost to a bug, or to re-run the worker handlers after a downstream fix.
+#
+#     cd src/webhook
+#     python -m app.replay stripe --since 2026-10-01T00:00:00Z --until 2026-10-03T00:00:00Z \
+#         --target dispatch --rate 200 --checkpoint stripe-replay.log
+#
+# Each payload is rebuilt as a synthetic API Gateway event so the provider extracts the event ID
+# exactly as it did on receipt. Replayed keys are appended to the checkpoint file, so running the
+# same command again after an interruption skips them. --dry-run only reads and parses payloads,
+# reporting the throughput a real run can expect.
+
+import argparse
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import base64
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, IO, Iterator, Optional, Set, Tuple, Type
+
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.utilities.data_classes import APIGatewayProxyEventV2
+
+from app import constants, exceptions, keys, persistence, providers, worker
+
+__all__ = [
+    "ArchivedWebhook",
+    "Checkpoint",
+    "RateLimiter",
+    "list_objects",
+    "list_items",
+    "synthetic_event",
+    "replay_webhook",
+    "replay",
+]
+
+logger = Logger(child=True)
+
+OUTCOME_STORED = "stored"
+OUTCOME_EXISTS = "exists"
+OUTCOME_DISPATCHED = "dispatched"
+OUTCOME_PARSED = "parsed"  # dry run
+OUTCOME_RESUMED = "resumed"  # replayed by an earlier run
+OUTCOME_FAILED = "failed"
+
+
+@dataclass(slots=True, frozen=True)
+class ArchivedWebhook:
+    # unique within a source, recorded in the checkpoint
+    key: str
+    provider: str
+    event_id: str
+    received_at: datetime
+    # stored item, or the equivalent item for an S3 object, as passed to worker handlers
+    item: Dict[str, Any]
+
+
+class Checkpoint:
+    """
+    Append-only file of replayed keys, so an interrupted replay resumes where it stopped
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self._done: Set[str] = set()
+        self._file: Optional[IO[str]] = None
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            with open(path) as file:
+                self._done.update(json.loads(line) for line in file if line.strip())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._done
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def add(self, key: str) -> None:
+        if not self.path:
+            return
+
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a")
+            # keys are JSON encoded, since S3 keys may contain newlines
+            self._file.write(json.dumps(key) + "\n")
+            self._file.flush()
+            self._done.add(key)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class RateLimiter:
+    """
+    Token bucket allowing `rate` acquisitions per second (0 is unlimited), in bursts of at most
+    100ms worth of tokens unless `burst` is given
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None) -> None:
+        self.rate = rate
+        self.burst = burst or max(1, int(rate / 10))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # take the token now and sleep off the debt, so callers are served in order
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if delay:
+            time.sleep(delay)
+
+
+def list_objects(
+    provider: str, start: datetime, end: datetime, tenant: Optional[str] = None
+) -> Iterator[ArchivedWebhook]:
+    """
+    Yield the raw/{provider}/ (or raw/{provider}/{tenant}/) objects last modified in
+    [start, end). Segment objects hold many webhooks and are replayed from their DynamoDB
+    items instead.
+    """
+    prefix = f"raw/{provider}/{tenant}/evt_" if tenant else f"raw/{provider}/evt_"
+    for obj in persistence.s3.list_objects(prefix):
+        received_at: datetime = obj["LastModified"]
+        if not start <= received_at < end:
+            continue
+
+        event_id = obj["Key"][len(prefix) :].removesuffix(".json")
+        item = {
+            constants.PARTITION_KEY: keys.partition_key(provider, event_id, tenant),
+            constants.SORT_KEY: event_id,
+            "provider": provider,
+            "arrived_at": f"{received_at.astimezone(timezone.utc):%Y-%m-%dT%H:%M:%SZ}",
+            "storage": constants.STORAGE_S3,
+            "s3": {"key": obj["Key"]},
+        }
+        if tenant:
+            item["tenant"] = tenant
+        yield ArchivedWebhook(obj["Key"], provider, event_id, received_at, item)
+
+
+def list_items(
+    provider: str, start: datetime, end: datetime, tenant: Optional[str] = None
+) -> Iterator[ArchivedWebhook]:
+    """
+    Yield the stored webhooks of a provider (or of one of its tenants) that arrived in
+    [start, end)
+    """
+    for item in persistence.find_webhooks(provider, start, end, tenant):
+        if item.get("storage", constants.STORAGE_S3) == constants.STORAGE_S3 and "s3" not in item:
+            # the payload of this item is still being written
+            continue
+
+        event_id = item[constants.SORT_KEY]
+        received_at = datetime.fromisoformat(item["arrived_at"])
+        key = f"{item[constants.PARTITION_KEY]}/{event_id}"
+        yield ArchivedWebhook(key, provider, event_id, received_at, item)
+
+
+def synthetic_event(
+    provider_class: Type[providers.BaseProvider], payload: bytes, event_id: str
+) -> APIGatewayProxyEventV2:
+    """
+    Rebuild the API Gateway event a payload was received with, as far as providers read it
+    """
+    path = f"/{provider_class.get_provider_name()}"
+    headers = {"content-type": "application/json"}
+    if provider_class.EVENT_ID_HEADER:
+        headers[provider_class.EVENT_ID_HEADER.lower()] = event_id
+
+    return APIGatewayProxyEventV2(
+        {
+            "version": "2.0",
+            "routeKey": "POST /{provider}",
+            "rawPath": path,
+            "rawQueryString": "",
+            "headers": headers,
+            "pathParameters": {"provider": provider_class.get_provider_name()},
+            "requestContext": {"http": {"method": "POST", "path": path}, "stage": "$default"},
+            "body": base64.b64encode(payload).decode(),
+            "isBase64Encoded": True,
+        }
+    )
+
+
+def replay_webhook(webhook: ArchivedWebhook, target: str, dry_run: bool = False) -> Tuple[str, int]:
+    """
+    Replay one archived webhook, returning the outcome and the payload size
+    """
+    payload = persistence.read_payload(webhook.item)
+    provider_class = providers.PROVIDER_MAP[webhook.provider]
+    prov = provider_class(synthetic_event(provider_class, payload, webhook.event_id))
+    # webhooks without an event ID were stored under their arrival time, keep that key
+    event_id = prov.get_event_id() or webhook.event_id
+
+    if dry_run:
+        return OUTCOME_PARSED, len(payload)
+
+    if target == constants.REPLAY_TARGET_STORE:
+        try:
+            persistence.store_webhook(
+                webhook.provider,
+                event_id,
+                prov.body,
+                received_at=webhook.received_at,
+                tenant=webhook.item.get("tenant"),
+                # with DEDUP_MODE=read the write is unconditional and would reset stored items
+                if_not_exists=True,
+            )
+        except exceptions.DuplicateItemError:
+            return OUTCOME_EXISTS, len(payload)
+        return OUTCOME_STORED, len(payload)
+
+    handler = worker.HANDLERS.get(webhook.provider, worker.log_handler)
+    handler(webhook.item, payload)
+    return OUTCOME_DISPATCHED, len(payload)
+
+
+def replay(
+    provider: str,
+    start: datetime,
+    end: datetime,
+    source: str = constants.REPLAY_SOURCE_S3,
+    target: str = constants.REPLAY_TARGET_STORE,
+    max_workers: int = constants.REPLAY_MAX_WORKERS,
+    rate: float = 0.0,
+    checkpoint: Optional[Checkpoint] = None,
+    dry_run: bool = False,
+    tenant: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Replay the webhooks of a provider (or of one of its tenants) received in [start, end) on a
+    thread pool, at most `rate` per second, returning the number of webhooks per outcome and
+    the throughput
+    """
+    if provider not in providers.PROVIDER_MAP:
+        raise ValueError(f"Unknown provider: {provider}")
+
+    if source == constants.REPLAY_SOURCE_DYNAMODB:
+        webhooks = list_items(provider, start, end, tenant)
+    else:
+        webhooks = list_objects(provider, start, end, tenant)
+
+    checkpoint = checkpoint or Checkpoint()
+    limiter = RateLimiter(rate)
+    outcomes: Dict[str, int] = {}
+    size = 0
+
+    def run(webhook: ArchivedWebhook) -> Tuple[str, int]:
+        try:
+            result = replay_webhook(webhook, target, dry_run)
+        except Exception:
+            # not checkpointed, so the next run retries it
+            logger.exception("Unable to replay webhook", key=webhook.key)
+            return OUTCOME_FAILED, 0
+        if not dry_run:
+            checkpoint.add(webhook.key)
+        return result
+
+    def collect(futures: Set[Future]) -> None:
+        nonlocal size
+        for future in futures:
+            outcome, length = future.result()
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            size += length
+
+    started = time.perf_counter()
+    pending: Set[Future] = set()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="replay") as executor:
+        for webhook in webhooks:
+            if webhook.key in checkpoint:
+                outcomes[OUTCOME_RESUMED] = outcomes.get(OUTCOME_RESUMED, 0) + 1
+                continue
+
+            limiter.acquire()
+            pending.add(executor.submit(run, webhook))
+            # bound the backlog, a replay can cover millions of webhooks
+            if len(pending) >= max_workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(wait(pending).done)
+    elapsed = time.perf_counter() - started
+    checkpoint.close()
+
+    replayed = sum(total for outcome, total in outcomes.items() if outcome != OUTCOME_RESUMED)
+    return {
+        "provider": provider,
+        "source": source,
+        "target": target,
+        "dry_run": dry_run,
+        "outcomes": outcomes,
+        "elapsed_s": elapsed,
+        "webhooks_per_s": replayed / elapsed if elapsed else None,
+        "mb_per_s": size / 1e6 / elapsed if elapsed else None,
+    }
+
+
+def _datetime(value: str) -> datetime:
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay archived webhooks of a provider")
+    parser.add_argument("provider", choices=sorted(providers.PROVIDER_MAP.keys()))
+    parser.add_argument("--since", type=_datetime, required=True, help="ISO 8601, UTC if naive")
+    parser.add_argument("--until", type=_datetime, default=datetime.now(tz=timezone.utc))
+    parser.add_argument("--tenant", help="replay the webhooks received on /<provider>/<tenant>")
+    parser.add_argument(
+        "--source",
+        choices=(constants.REPLAY_SOURCE_S3, constants.REPLAY_SOURCE_DYNAMODB),
+        default=constants.REPLAY_SOURCE_S3,
+        help="list S3 objects (object archive mode) or DynamoDB items (any archive mode)",
+    )
+    parser.add_argument(
+        "--target",
+        choices=(constants.REPLAY_TARGET_STORE, constants.REPLAY_TARGET_DISPATCH),
+        default=constants.REPLAY_TARGET_STORE,
+        help="store webhooks missing from DynamoDB, or run the worker handlers on every webhook",
+    )
+    parser.add_argument(
+        "--handlers",
+        help='worker handlers as "provider=module:function,...", for --target dispatch',
+    )
+    parser.add_argument("--workers", type=int, default=constants.REPLAY_MAX_WORKERS)
+    parser.add_argument(
+        "--rate", type=float, default=0.0, help="webhooks per second, 0 is unlimited"
+    )
+    parser.add_argument("--checkpoint", help="file of replayed keys, resumed from when it exists")
+    parser.add_argument("--dry-run", action="store_true", help="only read and parse payloads")
+    args = parser.parse_args()
+
+    worker.load_handlers(args.handlers)
+    report = replay(
+        args.provider,
+        args.since,
+        args.until,
+        source=args.source,
+        target=args.target,
+        max_workers=args.workers,
+        rate=args.rate,
+        checkpoint=Checkpoint(args.checkpoint),
+        dry_run=args.dry_run,
+        tenant=args.tenant,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -19,7 +19,28 @@
 * SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
+from .aio import AsyncClientPool, AsyncDynamoDB, AsyncS3
+from .checksums import compute_digests
+from .clients import get_client, register_client, clear_clients, AWS_ERRORS, error_code
+from .compression import compress, decompress
 from .dynamodb import DynamoDB
 from .s3 import S3, S3Object
+from .sqs import SQS
 
-__all__ = ["DynamoDB", "S3", "S3Object"]
+__all__ = [
+    "AsyncClientPool",
+    "AsyncDynamoDB",
+    "AsyncS3",
+    "DynamoDB",
+    "S3",
+    "S3Object",
+    "SQS",
+    "get_client",
+    "register_client",
+    "clear_clients",
+    "AWS_ERRORS",
+    "error_code",
+    "compute_digests",
+    "compress",
+    "decompress",
+]
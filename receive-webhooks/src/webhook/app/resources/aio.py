@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Asyncio counterparts of S3 and DynamoDB, so a single process can have hundreds of persistence
+# calls in flight without a thread each. They build the same requests and raise the same
+# app.exceptions as the synchronous classes. Clients come from aiobotocore, an optional
+# dependency imported when the first client is created, through an AsyncClientPool bound to the
+# event loop that first uses it.
+
+import asyncio
+from contextlib import AsyncExitStack
+import os
+from typing import Any, Dict, List, Optional, Union
+
+from aws_lambda_powertools import Logger
+import boto3
+from botocore.config import Config
+
+from app import constants, exceptions
+from app.resources.clients import AWS_ERRORS
+from app.resources.dynamodb import TABLE_NAME, DynamoDB
+from app.resources.s3 import BUCKET_NAME, S3, S3Object
+
+__all__ = ["AsyncClientPool", "AsyncS3", "AsyncDynamoDB"]
+
+logger = Logger(child=True)
+
+ASYNC_MAX_CONNECTIONS = int(
+    os.getenv(constants.ENV_ASYNC_MAX_CONNECTIONS, constants.ASYNC_MAX_CONNECTIONS)
+)
+
+
+class AsyncClientPool:
+    """
+    Async clients created once and shared by every coroutine, each with a connection pool of
+    `max_connections`. Use as an async context manager, or call close(), to release them.
+    """
+
+    def __init__(
+        self, max_connections: int = ASYNC_MAX_CONNECTIONS, region_name: Optional[str] = None
+    ) -> None:
+        self.max_connections = max_connections
+        # the region the synchronous clients use, unless given
+        self.region_name = region_name or boto3._get_default_session().region_name
+        self.config = constants.BOTO3_CONFIG.merge(Config(max_pool_connections=max_connections))
+        self._clients: Dict[str, Any] = {}
+        self._stack = AsyncExitStack()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def get(self, service_name: str) -> Any:
+        client = self._clients.get(service_name)
+        if client is not None:
+            return client
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            client = self._clients.get(service_name)
+            if client is None:
+                # imported on first use, so cold starts of the Lambda functions never pay for it
+                try:
+                    from aiobotocore.session import get_session
+                except ImportError:  # pragma: no cover - optional dependency
+                    raise RuntimeError(
+                        "aiobotocore is required for asyncio clients, see requirements-aio.txt"
+                    )
+                logger.debug(f"Creating async {service_name} client", region_name=self.region_name)
+                client = await self._stack.enter_async_context(
+                    get_session().create_client(
+                        service_name, region_name=self.region_name, config=self.config
+                    )
+                )
+                self._clients[service_name] = client
+        return client
+
+    def register(self, service_name: str, client: Any) -> None:
+        """
+        Use the given client for this service, e.g. a local stand-in for benchmarks and tests
+        """
+        self._clients[service_name] = client
+
+    async def close(self) -> None:
+        self._clients.clear()
+        await self._stack.aclose()
+
+    async def __aenter__(self) -> "AsyncClientPool":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+
+class AsyncS3:
+    CHECKSUM_DIGESTS = S3.CHECKSUM_DIGESTS
+
+    def __init__(self, pool: AsyncClientPool) -> None:
+        self._pool = pool
+
+    async def put_object(
+        self,
+        key: str,
+        body: Union[str, bytes],
+        metadata: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = "application/json",
+        content_encoding: Optional[str] = None,
+        digests: Optional[Dict[str, bytes]] = None,
+    ) -> S3Object:
+        params = S3._put_object_params(key, body, metadata, content_type, content_encoding, digests)
+        client = await self._pool.get("s3")
+
+        logger.debug("put_object", params=params)
+        try:
+            response = await client.put_object(**params)
+        except AWS_ERRORS as error:
+            logger.exception("Failed to write object to S3", error)
+            raise exceptions.S3PutError()
+
+        return S3Object(bucket=BUCKET_NAME, key=key, version_id=response["VersionId"])
+
+    async def delete_object(self, key: str, version_id: Optional[str] = None) -> None:
+        params = S3._delete_object_params(key, version_id)
+        client = await self._pool.get("s3")
+
+        logger.debug("delete_object", params=params)
+        try:
+            await client.delete_object(**params)
+        except AWS_ERRORS as error:
+            logger.exception("Failed to delete object from S3", error)
+            raise exceptions.S3DeleteError()
+
+
+class AsyncDynamoDB:
+    serialize = staticmethod(DynamoDB.serialize)
+    deserialize = staticmethod(DynamoDB.deserialize)
+
+    def __init__(self, pool: AsyncClientPool) -> None:
+        self._pool = pool
+
+    async def put_item(self, item: Dict[str, Any], if_not_exists: bool = False) -> None:
+        params = DynamoDB._put_item_params(item, if_not_exists)
+        client = await self._pool.get("dynamodb")
+
+        logger.debug("put_item", params=params)
+        try:
+            await client.put_item(**params)
+        except AWS_ERRORS as error:
+            raise DynamoDB._put_item_error(error)
+
+    async def delete_item(self, key: Dict[str, Any]) -> None:
+        params = {
+            "TableName": TABLE_NAME,
+            "Key": self.serialize(key),
+        }
+        client = await self._pool.get("dynamodb")
+
+        logger.debug("delete_item", params=params)
+        try:
+            await client.delete_item(**params)
+        except AWS_ERRORS as error:
+            logger.exception("Unable to delete item", error)
+            raise exceptions.DynamoDBWriteError("Unable to delete item")
+
+    async def get_item(
+        self, key: Dict[str, Any], attributes: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        params = DynamoDB._get_item_params(key, attributes)
+        client = await self._pool.get("dynamodb")
+
+        logger.debug("get_item", params=params)
+        try:
+            response = await client.get_item(**params)
+        except AWS_ERRORS as error:
+            logger.exception("Unable to get item", error)
+            raise exceptions.DynamoDBReadError("Unable to get item")
+
+        return DynamoDB._get_item_result(response)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import hashlib
+from typing import Dict, Iterable
+import zlib
+
+__all__ = ["CRC32", "compute_digests"]
+
+CRC32 = "crc32"
+
+# Large bodies are hashed in slices so every digest reads the same chunk while it is in cache
+CHUNK_SIZE = 256 * 1024
+
+
+class _Crc32:
+    def __init__(self) -> None:
+        self._value = 0
+
+    def update(self, data: memoryview) -> None:
+        self._value = zlib.crc32(data, self._value)
+
+    def digest(self) -> bytes:
+        return self._value.to_bytes(4, "big")
+
+
+def compute_digests(data: bytes, algorithms: Iterable[str]) -> Dict[str, bytes]:
+    """
+    Compute every requested digest ("crc32" or any hashlib name) in a single pass over data
+    """
+    hashers = {
+        algorithm: _Crc32() if algorithm == CRC32 else hashlib.new(algorithm)
+        for algorithm in algorithms
+    }
+    if not hashers:
+        return {}
+
+    view = memoryview(data)
+    for offset in range(0, len(view), CHUNK_SIZE):
+        chunk = view[offset : offset + CHUNK_SIZE]
+        for hasher in hashers.values():
+            hasher.update(chunk)
+
+    return {algorithm: hasher.digest() for algorithm, hasher in hashers.items()}
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from aws_lambda_powertools import Logger
+import boto3
+import botocore
+from botocore.config import Config
+
+from app import constants
+
+__all__ = ["get_client", "register_client", "clear_clients", "AWS_ERRORS", "error_code"]
+
+logger = Logger(child=True)
+
+# Creating a botocore client resolves endpoints, loads service models and allocates a
+# connection pool, so clients are built once per process and shared by every request.
+_CLIENTS: Dict[Tuple[Any, ...], Any] = {}
+_LOCK = threading.Lock()
+
+# Service errors, and the connection, timeout and credential errors raised without a response
+AWS_ERRORS = (botocore.exceptions.ClientError, botocore.exceptions.BotoCoreError)
+
+
+def get_client(
+    service_name: str,
+    session: Optional[boto3.Session] = None,
+    region_name: Optional[str] = None,
+    config: Config = constants.BOTO3_CONFIG,
+) -> Any:
+    """
+    Return the shared client for this service, session, region and config
+    """
+    if not session:
+        session = boto3._get_default_session()
+    if not region_name:
+        region_name = session.region_name
+
+    # Sessions and configs compare by identity, and the key keeps them alive
+    key = (service_name, region_name, session, config)
+    client = _CLIENTS.get(key)
+    if client is not None:
+        return client
+
+    with _LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            logger.debug(f"Creating {service_name} client", region_name=region_name)
+            client = session.client(service_name, region_name=region_name, config=config)
+            _CLIENTS[key] = client
+    return client
+
+
+def register_client(
+    service_name: str,
+    client: Any,
+    session: Optional[boto3.Session] = None,
+    region_name: Optional[str] = None,
+    config: Config = constants.BOTO3_CONFIG,
+) -> None:
+    """
+    Use the given client for this service, e.g. a local stand-in for benchmarks and tests
+    """
+    if not session:
+        session = boto3._get_default_session()
+    if not region_name:
+        region_name = session.region_name
+
+    with _LOCK:
+        _CLIENTS[(service_name, region_name, session, config)] = client
+
+
+def clear_clients() -> None:
+    with _LOCK:
+        _CLIENTS.clear()
+
+
+def error_code(error: Exception) -> Optional[str]:
+    """
+    Return the error code of a service error, e.g. "NoSuchKey", or None for any other error
+    """
+    if isinstance(error, botocore.exceptions.ClientError):
+        return error.response.get("Error", {}).get("Code")
+    return None
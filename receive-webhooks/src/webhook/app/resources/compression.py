@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import gzip
+import threading
+from typing import Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+__all__ = [
+    "IDENTITY",
+    "GZIP",
+    "ZSTD",
+    "AUTO",
+    "available_encodings",
+    "compress",
+    "decompress",
+    "select_encoding",
+]
+
+IDENTITY = "identity"
+GZIP = "gzip"
+ZSTD = "zstd"
+AUTO = "auto"  # zstd when installed, gzip otherwise
+
+# Content types worth compressing; binary formats are usually compressed already
+COMPRESSIBLE_TYPES: Tuple[str, ...] = (
+    "application/json",
+    "application/x-ndjson",
+    "application/x-www-form-urlencoded",
+    "application/xml",
+    "text/",
+)
+
+# zstd compressor and decompressor objects must not be used by two threads at once, and
+# requests compress and decompress on worker threads, so each thread gets its own
+_zstd = threading.local()
+
+
+def available_encodings() -> Tuple[str, ...]:
+    if zstandard is None:
+        return (IDENTITY, GZIP)
+    return (IDENTITY, GZIP, ZSTD)
+
+
+def select_encoding(
+    size: int, content_type: Optional[str], preferred: str, min_size: int = 0
+) -> str:
+    """
+    Pick the encoding for a payload of this size and content type
+    """
+    if preferred == IDENTITY or size < min_size:
+        return IDENTITY
+
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if not media_type.startswith(COMPRESSIBLE_TYPES):
+        return IDENTITY
+
+    if preferred == AUTO:
+        return ZSTD if zstandard is not None else GZIP
+    if preferred == ZSTD and zstandard is None:
+        return GZIP
+    return preferred
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == GZIP:
+        # mtime=0 keeps the output deterministic for identical payloads
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if encoding == ZSTD and zstandard is not None:
+        return _zstd_compressor().compress(data)
+    if encoding == IDENTITY:
+        return data
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def decompress(data: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == GZIP:
+        return gzip.decompress(data)
+    if encoding == ZSTD and zstandard is not None:
+        # frames written by compress() always carry their content size
+        return _zstd_decompressor().decompress(data)
+    if not encoding or encoding == IDENTITY:
+        return data
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def _zstd_compressor() -> "zstandard.ZstdCompressor":
+    compressor = getattr(_zstd, "compressor", None)
+    if compressor is None:
+        compressor = _zstd.compressor = zstandard.ZstdCompressor(level=3)
+    return compressor
+
+
+def _zstd_decompressor() -> "zstandard.ZstdDecompressor":
+    decompressor = getattr(_zstd, "decompressor", None)
+    if decompressor is None:
+        decompressor = _zstd.decompressor = zstandard.ZstdDecompressor()
+    return decompressor
@@ -19,18 +19,20 @@
 * SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import heapq
 import os
-from typing import TYPE_CHECKING, Dict, Any, Optional, List
+from typing import TYPE_CHECKING, Dict, Any, Generator, Iterator, Optional, List, Sequence, Tuple
 
 from aws_lambda_powertools import Logger
 import boto3
-import botocore
 from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
 
 if TYPE_CHECKING:
     from mypy_boto3_dynamodb import DynamoDBClient
 
 from app import constants, exceptions
+from app.resources.clients import AWS_ERRORS, error_code, get_client
 
 __all__ = ["DynamoDB"]
 
@@ -42,28 +44,300 @@ class DynamoDB:
     _deserializer = TypeDeserializer()
     _serializer = TypeSerializer()
 
-    def __init__(self, session: boto3.Session) -> None:
-        self._client: "DynamoDBClient" = session.client("dynamodb", config=constants.BOTO3_CONFIG)
+    def __init__(self, session: Optional[boto3.Session] = None) -> None:
+        self._client: "DynamoDBClient" = get_client("dynamodb", session)
 
-    def put_item(self, item: Dict[str, Any]) -> None:
+    def put_item(self, item: Dict[str, Any], if_not_exists: bool = False) -> None:
+        params = self._put_item_params(item, if_not_exists)
+
+        logger.debug("put_item", params=params)
+        try:
+            self._client.put_item(**params)
+        except AWS_ERRORS as error:
+            raise self._put_item_error(error)
+
+    def claim_item(self, item: Dict[str, Any], stale_before: int) -> None:
+        """
+        Put an item unless one with the same key exists. An existing claim (an item carrying
+        CLAIMED_AT) older than `stale_before`, in epoch seconds, is taken over.
+
+        Raises DuplicateItemError when the existing item is complete, and ClaimPendingError
+        when it is a claim still in progress.
+        """
+        params = self._claim_item_params(item, stale_before)
+
+        logger.debug("put_item", params=params)
+        try:
+            self._client.put_item(**params)
+        except AWS_ERRORS as error:
+            raise self._claim_item_error(error)
+
+    def update_item(
+        self,
+        key: Dict[str, Any],
+        attributes: Dict[str, Any],
+        remove: Optional[List[str]] = None,
+        if_exists: bool = False,
+        increment: Optional[Dict[str, int]] = None,
+        condition: Optional[str] = None,
+        names: Optional[Dict[str, str]] = None,
+        values: Optional[Dict[str, Any]] = None,
+        return_values: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Update an item, optionally only when `condition` holds. The condition uses its own
+        `names` and `values` placeholders, e.g. "#owner = :owner".
+
+        Raises NotFoundError when `if_exists` is set and the item does not exist, and
+        ConditionFailedError when `condition` does not hold. Returns the updated item when
+        `return_values` is set.
+        """
         params = {
             "TableName": TABLE_NAME,
-            "Item": self.serialize(item),
+            "Key": self.serialize(key),
+            "ExpressionAttributeNames": {},
+            "ExpressionAttributeValues": {},
         }
+        assignments: List[str] = []
+        for idx, (attribute, value) in enumerate(attributes.items()):
+            params["ExpressionAttributeNames"][f"#a{idx}"] = attribute
+            params["ExpressionAttributeValues"][f":v{idx}"] = self._serializer.serialize(value)
+            assignments.append(f"#a{idx} = :v{idx}")
+        params["UpdateExpression"] = "SET " + ", ".join(assignments)
+        if remove:
+            placeholders: List[str] = []
+            for idx, attribute in enumerate(remove):
+                params["ExpressionAttributeNames"][f"#r{idx}"] = attribute
+                placeholders.append(f"#r{idx}")
+            params["UpdateExpression"] += " REMOVE " + ", ".join(placeholders)
+        if increment:
+            placeholders = []
+            for idx, (attribute, value) in enumerate(increment.items()):
+                params["ExpressionAttributeNames"][f"#i{idx}"] = attribute
+                params["ExpressionAttributeValues"][f":i{idx}"] = self._serializer.serialize(value)
+                placeholders.append(f"#i{idx} :i{idx}")
+            params["UpdateExpression"] += " ADD " + ", ".join(placeholders)
+        if if_exists:
+            params["ConditionExpression"] = "attribute_exists(#pk)"
+            params["ExpressionAttributeNames"]["#pk"] = constants.PARTITION_KEY
+        if condition:
+            if if_exists:
+                condition = f"{params['ConditionExpression']} AND ({condition})"
+            params["ConditionExpression"] = condition
+            params["ExpressionAttributeNames"].update(names or {})
+            for placeholder, value in (values or {}).items():
+                params["ExpressionAttributeValues"][placeholder] = self._serializer.serialize(value)
+        if return_values:
+            params["ReturnValues"] = "ALL_NEW"
 
-        logger.debug("put_item", params=params)
+        logger.debug("update_item", params=params)
         try:
-            self._client.put_item(**params)
-        except botocore.exceptions.ClientError as error:
-            logger.exception("Unable to put item", error)
-            raise exceptions.DynamoDBWriteError("Unable to put item")
+            response = self._client.update_item(**params)
+        except AWS_ERRORS as error:
+            if error_code(error) == "ConditionalCheckFailedException":
+                if condition:
+                    raise exceptions.ConditionFailedError("Condition not met")
+                raise exceptions.NotFoundError("Item not found")
+            logger.exception("Unable to update item", error)
+            raise exceptions.DynamoDBWriteError("Unable to update item")
+
+        if return_values:
+            return self.deserialize(response.get("Attributes", {}))
+        return None
+
+    def delete_item(self, key: Dict[str, Any]) -> None:
+        params = {
+            "TableName": TABLE_NAME,
+            "Key": self.serialize(key),
+        }
+
+        logger.debug("delete_item", params=params)
+        try:
+            self._client.delete_item(**params)
+        except AWS_ERRORS as error:
+            logger.exception("Unable to delete item", error)
+            raise exceptions.DynamoDBWriteError("Unable to delete item")
 
     def get_item(
         self, key: Dict[str, Any], attributes: Optional[List[str]] = None
     ) -> Dict[str, Any]:
+        params = self._get_item_params(key, attributes)
+
+        logger.debug("get_item", params=params)
+
+        try:
+            response = self._client.get_item(**params)
+        except AWS_ERRORS as error:
+            logger.exception("Unable to get item", error)
+            raise exceptions.DynamoDBReadError("Unable to get item")
+
+        return self._get_item_result(response)
+
+    def query(
+        self,
+        partition_key: Tuple[str, Any],
+        index_name: Optional[str] = None,
+        limit: Optional[int] = None,
+        start_key: Optional[Dict[str, Any]] = None,
+        filter_expression: Optional[str] = None,
+        names: Optional[Dict[str, str]] = None,
+        values: Optional[Dict[str, Any]] = None,
+        sort_range: Optional[Tuple[str, Any, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Return one page of items sharing a partition key, in sort key order, and the key to
+        continue from (None on the last page). `filter_expression` is applied after reading a page and
+        uses its own `names` and `values` placeholders. `sort_range` (name, low, high) only reads
+        the items whose sort key is between low and high, inclusive.
+        """
+        name, value = partition_key
         params = {
             "TableName": TABLE_NAME,
-            "Key": self.serialize(key),
+            "KeyConditionExpression": "#pk = :pk",
+            "ExpressionAttributeNames": {"#pk": name},
+            "ExpressionAttributeValues": {":pk": self._serializer.serialize(value)},
+        }
+        if sort_range:
+            sort_name, low, high = sort_range
+            params["KeyConditionExpression"] += " AND #sk BETWEEN :sk_low AND :sk_high"
+            params["ExpressionAttributeNames"]["#sk"] = sort_name
+            params["ExpressionAttributeValues"][":sk_low"] = self._serializer.serialize(low)
+            params["ExpressionAttributeValues"][":sk_high"] = self._serializer.serialize(high)
+        if index_name:
+            params["IndexName"] = index_name
+        if limit:
+            params["Limit"] = limit
+        if start_key:
+            params["ExclusiveStartKey"] = self.serialize(start_key)
+        if filter_expression:
+            params["FilterExpression"] = filter_expression
+            params["ExpressionAttributeNames"].update(names or {})
+            for placeholder, value in (values or {}).items():
+                params["ExpressionAttributeValues"][placeholder] = self._serializer.serialize(value)
+
+        logger.debug("query", params=params)
+        try:
+            response = self._client.query(**params)
+        except AWS_ERRORS as error:
+            logger.exception("Unable to query items", error)
+            raise exceptions.DynamoDBReadError("Unable to query items")
+
+        items = [self.deserialize(item) for item in response.get("Items", [])]
+        return items, self.deserialize(response.get("LastEvaluatedKey"))
+
+    def query_all(
+        self,
+        partition_name: str,
+        partition_values: Sequence[Any],
+        sort_key: Optional[str] = None,
+        index_name: Optional[str] = None,
+        limit: Optional[int] = None,
+        filter_expression: Optional[str] = None,
+        names: Optional[Dict[str, str]] = None,
+        values: Optional[Dict[str, Any]] = None,
+        sort_range: Optional[Tuple[str, Any, Any]] = None,
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Scatter-gather query over several partitions (e.g. the shards of a write-sharded key).
+        Every partition is paged on its own thread, with its next page fetched while the
+        current one is consumed. Items are yielded merged in `sort_key` order, which must be
+        the sort key of the table or index, or as pages arrive when no sort key is given.
+        """
+        if not partition_values:
+            return
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(len(partition_values), constants.QUERY_MAX_WORKERS),
+            thread_name_prefix="query",
+        )
+
+        def fetch(value: Any, start_key: Optional[Dict[str, Any]]) -> Future:
+            return executor.submit(
+                self.query,
+                (partition_name, value),
+                index_name,
+                limit,
+                start_key,
+                filter_expression,
+                names,
+                values,
+                sort_range,
+            )
+
+        def pages(value: Any, future: Optional[Future]) -> Iterator[Dict[str, Any]]:
+            while future is not None:
+                items, start_key = future.result()
+                future = fetch(value, start_key) if start_key else None
+                yield from items
+
+        try:
+            # The first page of every partition is requested before any is consumed
+            first_pages = [(value, fetch(value, None)) for value in partition_values]
+            if sort_key:
+                yield from heapq.merge(
+                    *(pages(value, future) for value, future in first_pages),
+                    key=lambda item: item.get(sort_key, ""),
+                )
+                return
+
+            pending = {future: value for value, future in first_pages}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    value = pending.pop(future)
+                    items, start_key = future.result()
+                    if start_key:
+                        pending[fetch(value, start_key)] = value
+                    yield from items
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def _put_item_params(cls, item: Dict[str, Any], if_not_exists: bool) -> Dict[str, Any]:
+        params = {
+            "TableName": TABLE_NAME,
+            "Item": cls.serialize(item),
+        }
+        if if_not_exists:
+            params["ConditionExpression"] = "attribute_not_exists(#pk)"
+            params["ExpressionAttributeNames"] = {"#pk": constants.PARTITION_KEY}
+        return params
+
+    @staticmethod
+    def _put_item_error(error: Exception) -> Exception:
+        if error_code(error) == "ConditionalCheckFailedException":
+            return exceptions.DuplicateItemError("Item already exists")
+        logger.exception("Unable to put item", error)
+        return exceptions.DynamoDBWriteError("Unable to put item")
+
+    @classmethod
+    def _claim_item_params(cls, item: Dict[str, Any], stale_before: int) -> Dict[str, Any]:
+        params = cls._put_item_params(item, False)
+        params["ConditionExpression"] = "attribute_not_exists(#pk) OR #claimed_at < :stale"
+        params["ExpressionAttributeNames"] = {
+            "#pk": constants.PARTITION_KEY,
+            "#claimed_at": constants.CLAIMED_AT,
+        }
+        params["ExpressionAttributeValues"] = {":stale": {"N": str(stale_before)}}
+        # The item that failed the condition tells a finished write from one in progress
+        params["ReturnValuesOnConditionCheckFailure"] = "ALL_OLD"
+        return params
+
+    @classmethod
+    def _claim_item_error(cls, error: Exception) -> Exception:
+        if error_code(error) == "ConditionalCheckFailedException":
+            existing = error.response.get("Item") or {}
+            if constants.CLAIMED_AT in existing:
+                return exceptions.ClaimPendingError("Item is claimed by another request")
+        return cls._put_item_error(error)
+
+    @classmethod
+    def _get_item_params(
+        cls, key: Dict[str, Any], attributes: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        params = {
+            "TableName": TABLE_NAME,
+            "Key": cls.serialize(key),
         }
         if attributes:
             params["ExpressionAttributeNames"] = {}
@@ -73,20 +347,14 @@ class DynamoDB:
                 params["ExpressionAttributeNames"][placeholder] = attribute
                 placeholders.append(placeholder)
             params["ProjectionExpression"] = ",".join(placeholders)
+        return params
 
-        logger.debug("get_item", params=params)
-
-        try:
-            response = self._client.get_item(**params)
-        except botocore.exceptions.ClientError as error:
-            logger.exception("Unable to get item", error)
-            raise exceptions.DynamoDBReadError("Unable to get item")
-
+    @classmethod
+    def _get_item_result(cls, response: Dict[str, Any]) -> Dict[str, Any]:
         item: Dict[str, Any] = response.get("Item", {})
         if not item:
             raise exceptions.NotFoundError("Item not found")
-
-        return self.deserialize(item)
+        return cls.deserialize(item)
 
     @classmethod
     def deserialize(cls, item: Any) -> Any:
@@ -21,18 +21,20 @@
 
 import base64
 from dataclasses import dataclass
-import hashlib
 import os
-from typing import Dict, TYPE_CHECKING, Optional
+from typing import Any, Dict, Iterator, TYPE_CHECKING, Optional, Tuple, Union
 
 from aws_lambda_powertools import Logger
 import boto3
-import botocore
+from botocore.compat import HAS_CRT
 
 if TYPE_CHECKING:
     from mypy_boto3_s3 import S3Client
 
 from app import constants, exceptions
+from app.resources import compression
+from app.resources.checksums import CRC32, compute_digests
+from app.resources.clients import AWS_ERRORS, get_client
 
 __all__ = ["S3", "S3Object"]
 
@@ -40,6 +42,22 @@ logger = Logger(child=True)
 BUCKET_NAME = os.getenv(constants.ENV_BUCKET_NAME)
 BUCKET_OWNER_ID = os.getenv(constants.ENV_BUCKET_OWNER_ID)
 KMS_KEY_ID = os.getenv(constants.ENV_KMS_KEY_ID)
+S3_COMPRESSION = os.getenv(constants.ENV_S3_COMPRESSION, compression.IDENTITY)
+S3_COMPRESSION_MIN_BYTES = int(
+    os.getenv(constants.ENV_S3_COMPRESSION_MIN_BYTES, constants.S3_COMPRESSION_MIN_BYTES)
+)
+S3_CHECKSUM_ALGORITHM = os.getenv(
+    constants.ENV_S3_CHECKSUM_ALGORITHM, constants.S3_CHECKSUM_SHA1
+).upper()
+if S3_CHECKSUM_ALGORITHM not in (
+    constants.S3_CHECKSUM_SHA1,
+    constants.S3_CHECKSUM_CRC32,
+    constants.S3_CHECKSUM_CRC32C,
+):
+    raise ValueError(f"Unsupported checksum algorithm: {S3_CHECKSUM_ALGORITHM}")
+if S3_CHECKSUM_ALGORITHM == constants.S3_CHECKSUM_CRC32C and not HAS_CRT:
+    # botocore computes CRC32C with awscrt, and would otherwise fail every upload
+    raise ValueError("CRC32C checksums require awscrt")
 
 
 @dataclass(kw_only=True, slots=True, frozen=True)
@@ -50,48 +68,166 @@ class S3Object:
 
 
 class S3:
-    def __init__(self, session: boto3.Session) -> None:
-        self._client: "S3Client" = session.client("s3", config=constants.BOTO3_CONFIG)
+    # Digests put_object needs for the configured checksum algorithm, so callers holding a
+    # RequestBody can compute them alongside their own
+    CHECKSUM_DIGESTS: Tuple[str, ...] = {
+        constants.S3_CHECKSUM_SHA1: ("md5", "sha1"),
+        constants.S3_CHECKSUM_CRC32: (CRC32,),
+    }.get(S3_CHECKSUM_ALGORITHM, ())
+
+    def __init__(self, session: Optional[boto3.Session] = None) -> None:
+        self._client: "S3Client" = get_client("s3", session)
 
     def put_object(
         self,
         key: str,
-        body: str,
+        body: Union[str, bytes],
         metadata: Optional[Dict[str, str]] = None,
         content_type: Optional[str] = "application/json",
+        content_encoding: Optional[str] = None,
+        digests: Optional[Dict[str, bytes]] = None,
     ) -> S3Object:
-        checksum_md5 = self._checksum_algo(body, "md5")
-        checksum_sha1 = self._checksum_algo(body, "sha1")
+        params = self._put_object_params(
+            key, body, metadata, content_type, content_encoding, digests
+        )
+
+        logger.debug("put_object", params=params)
+        try:
+            response = self._client.put_object(**params)
+        except AWS_ERRORS as error:
+            logger.exception("Failed to write object to S3", error)
+            raise exceptions.S3PutError()
+
+        return S3Object(bucket=BUCKET_NAME, key=key, version_id=response["VersionId"])
+
+    def delete_object(self, key: str, version_id: Optional[str] = None) -> None:
+        params = self._delete_object_params(key, version_id)
+
+        logger.debug("delete_object", params=params)
+        try:
+            self._client.delete_object(**params)
+        except AWS_ERRORS as error:
+            logger.exception("Failed to delete object from S3", error)
+            raise exceptions.S3DeleteError()
+
+    def get_object(
+        self,
+        key: str,
+        version_id: Optional[str] = None,
+        bucket: Optional[str] = None,
+        byte_range: Optional[Tuple[int, int]] = None,
+    ) -> bytes:
+        """
+        Return the object body, decompressed according to its Content-Encoding. A byte range is
+        returned as stored, since part of an encoded object can't be decoded on its own.
+        """
+        params = {
+            "Bucket": bucket or BUCKET_NAME,
+            "Key": key,
+        }
+        if version_id:
+            params["VersionId"] = version_id
+        if byte_range:
+            offset, length = byte_range
+            params["Range"] = f"bytes={offset}-{offset + length - 1}"
+        if BUCKET_OWNER_ID:
+            params["ExpectedBucketOwner"] = BUCKET_OWNER_ID
+
+        logger.debug("get_object", params=params)
+        try:
+            response = self._client.get_object(**params)
+            body = response["Body"].read()
+        except AWS_ERRORS as error:
+            logger.exception("Failed to read object from S3", error)
+            raise exceptions.S3GetError()
+
+        if byte_range:
+            return body
+        return compression.decompress(body, response.get("ContentEncoding"))
+
+    def list_objects(
+        self, prefix: str, start_after: Optional[str] = None, bucket: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the objects under a prefix in key order, following continuation tokens
+        """
+        params = {
+            "Bucket": bucket or BUCKET_NAME,
+            "Prefix": prefix,
+        }
+        if start_after:
+            params["StartAfter"] = start_after
+        if BUCKET_OWNER_ID:
+            params["ExpectedBucketOwner"] = BUCKET_OWNER_ID
+
+        while True:
+            logger.debug("list_objects_v2", params=params)
+            try:
+                response = self._client.list_objects_v2(**params)
+            except AWS_ERRORS as error:
+                logger.exception("Failed to list objects in S3", error)
+                raise exceptions.S3ListError()
+
+            yield from response.get("Contents", [])
+            if not response.get("IsTruncated"):
+                return
+            params["ContinuationToken"] = response["NextContinuationToken"]
+
+    @classmethod
+    def _put_object_params(
+        cls,
+        key: str,
+        body: Union[str, bytes],
+        metadata: Optional[Dict[str, str]],
+        content_type: Optional[str],
+        content_encoding: Optional[str],
+        digests: Optional[Dict[str, bytes]],
+    ) -> Dict[str, Any]:
+        """
+        Compress the body when configured and return the PutObject parameters, shared with
+        AsyncS3
+        """
+        if isinstance(body, str):
+            body = bytes(body, "utf-8")
+
+        if not content_encoding:
+            # Bodies passed with a content encoding are already encoded by the caller
+            encoding = compression.select_encoding(
+                len(body), content_type, S3_COMPRESSION, S3_COMPRESSION_MIN_BYTES
+            )
+            if encoding != compression.IDENTITY:
+                metadata = {
+                    **(metadata or {}),
+                    "content_encoding": encoding,
+                    "uncompressed_size": str(len(body)),
+                }
+                body = compression.compress(body, encoding)
+                content_encoding = encoding
+                # digests of the uncompressed body no longer describe the stored bytes
+                digests = None
 
         params = {
             "ACL": "bucket-owner-full-control",
             "Body": body,
             "Bucket": BUCKET_NAME,
-            "ContentMD5": checksum_md5,
-            "ChecksumAlgorithm": "SHA1",
-            "ChecksumSHA1": checksum_sha1,
             "Key": key,
             "ServerSideEncryption": "aws:kms",
             "SSEKMSKeyId": KMS_KEY_ID,
             "StorageClass": "STANDARD_IA",
+            **cls._checksum_params(body, digests),
         }
         if content_type:
             params["ContentType"] = content_type
+        if content_encoding:
+            params["ContentEncoding"] = content_encoding
         if metadata:
             params["Metadata"] = metadata
         if BUCKET_OWNER_ID:
             params["ExpectedBucketOwner"] = BUCKET_OWNER_ID
+        return params
 
-        logger.debug("put_object", params=params)
-        try:
-            response = self._client.put_object(**params)
-        except botocore.exceptions.ClientError as error:
-            logger.exception("Failed to write object to S3", error)
-            raise exceptions.S3PutError()
-
-        return S3Object(bucket=BUCKET_NAME, key=key, version_id=response["VersionId"])
-
-    def delete_object(self, key: str, version_id: Optional[str] = None) -> None:
+    @staticmethod
+    def _delete_object_params(key: str, version_id: Optional[str]) -> Dict[str, Any]:
         params = {
             "Bucket": BUCKET_NAME,
             "Key": key,
@@ -100,15 +236,24 @@ class S3:
             params["VersionId"] = version_id
         if BUCKET_OWNER_ID:
             params["ExpectedBucketOwner"] = BUCKET_OWNER_ID
-
-        logger.debug("delete_object", params=params)
-        try:
-            self._client.delete_object(**params)
-        except botocore.exceptions.ClientError as error:
-            logger.exception("Failed to delete object from S3", error)
-            raise exceptions.S3DeleteError()
+        return params
 
     @classmethod
-    def _checksum_algo(cls, data: str, algo: str = "md5") -> str:
-        hash = hashlib.new(algo, bytes(data, "utf-8")).digest()
-        return base64.b64encode(hash).decode()
+    def _checksum_params(
+        cls, body: bytes, digests: Optional[Dict[str, bytes]] = None
+    ) -> Dict[str, Any]:
+        if not digests or any(algorithm not in digests for algorithm in cls.CHECKSUM_DIGESTS):
+            digests = compute_digests(body, cls.CHECKSUM_DIGESTS)
+
+        def encode(algorithm: str) -> str:
+            return base64.b64encode(digests[algorithm]).decode()
+
+        if S3_CHECKSUM_ALGORITHM == constants.S3_CHECKSUM_CRC32C:
+            return {"ChecksumAlgorithm": "CRC32C"}
+        if S3_CHECKSUM_ALGORITHM == constants.S3_CHECKSUM_CRC32:
+            return {"ChecksumAlgorithm": "CRC32", "ChecksumCRC32": encode(CRC32)}
+        return {
+            "ContentMD5": encode("md5"),
+            "ChecksumAlgorithm": "SHA1",
+            "ChecksumSHA1": encode("sha1"),
+        }
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+from typing import Dict, TYPE_CHECKING, Optional
+
+from aws_lambda_powertools import Logger
+import boto3
+
+if TYPE_CHECKING:
+    from mypy_boto3_sqs import SQSClient
+
+from app import constants, exceptions
+from app.resources.clients import AWS_ERRORS, get_client
+
+__all__ = ["SQS"]
+
+logger = Logger(child=True)
+QUEUE_URL = os.getenv(constants.ENV_QUEUE_URL)
+
+
+class SQS:
+    def __init__(self, session: Optional[boto3.Session] = None) -> None:
+        self._client: "SQSClient" = get_client("sqs", session)
+
+    def send_message(
+        self,
+        body: str,
+        attributes: Optional[Dict[str, str]] = None,
+        queue_url: Optional[str] = None,
+    ) -> str:
+        """
+        Send a message with string attributes, returning the message ID
+        """
+        params = {
+            "QueueUrl": queue_url or QUEUE_URL,
+            "MessageBody": body,
+        }
+        if attributes:
+            params["MessageAttributes"] = {
+                name: {"DataType": "String", "StringValue": value}
+                for name, value in attributes.items()
+            }
+
+        logger.debug("send_message", params=params)
+        try:
+            response = self._client.send_message(**params)
+        except AWS_ERRORS as error:
+            logger.exception("Failed to send message to SQS", error)
+            raise exceptions.SQSSendError()
+
+        return response["MessageId"]
@@ -19,15 +19,18 @@
 * SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
-from datetime import datetime, timezone, timedelta
-import math
+from typing import Optional
 
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.event_handler.api_gateway import Router, Response
-from aws_lambda_powertools.event_handler.exceptions import InternalServerError, BadRequestError
-import boto3
+from aws_lambda_powertools.event_handler.exceptions import (
+    InternalServerError,
+    BadRequestError,
+    ServiceError,
+    UnauthorizedError,
+)
 
-from app import providers, exceptions, constants, resources
+from app import providers, exceptions, persistence, metrics, ingest, constants, tenants
 
 __all__ = ["router"]
 
@@ -35,75 +38,126 @@ logger = Logger(child=True)
 tracer = Tracer()
 router = Router()
 
-session = boto3._get_default_session()
-s3 = resources.S3(session)
-dynamodb = resources.DynamoDB(session)
-
 
 @tracer.capture_method(capture_response=False)
 @router.post("/<provider>")
 def post_webhook(provider: str) -> Response:
+    return _handle(provider)
+
+
+@tracer.capture_method(capture_response=False)
+@router.post("/<provider>/<tenant>")
+def post_tenant_webhook(provider: str, tenant: str) -> Response:
+    return _handle(provider, tenant)
+
+
+def _handle(provider: str, tenant: Optional[str] = None) -> Response:
+    timer = metrics.new_timer()
+    outcome, reason = metrics.OUTCOME_ERROR, None
+    try:
+        outcome = _post_webhook(provider, tenant, timer)
+        return Response(200)
+    except exceptions.RequestRejectedError as error:
+        outcome, reason = metrics.OUTCOME_REJECTED, error.reason
+        if reason in _BAD_REQUEST_REASONS:
+            raise BadRequestError(str(error))
+        raise UnauthorizedError(str(error))
+    finally:
+        # Only known providers become a dimension value, so junk paths can't add dimensions
+        metrics.publish(timer, _known(provider), outcome, reason)
+
+
+def _post_webhook(provider: str, tenant_name: Optional[str], timer: metrics.StageTimer) -> str:
+    """
+    Accept the webhook, returning the outcome of the request
+    """
     event = router.current_event
     if not event.body:
         logger.warning("No payload found in request")
-        raise BadRequestError("No payload found in request")
+        raise exceptions.RequestRejectedError(
+            constants.REJECT_MISSING_BODY, "No payload found in request"
+        )
 
     provider_class = providers.PROVIDER_MAP.get(provider)
     if not provider_class:
         logger.warning(f"Unknown provider: {provider}")
-        raise BadRequestError(
-            f"Unknown provider: {provider} (only {providers.PROVIDER_MAP.keys()} are supported)"
+        raise exceptions.RequestRejectedError(
+            constants.REJECT_UNKNOWN_PROVIDER,
+            f"Unknown provider: {provider} (only {providers.PROVIDER_MAP.keys()} are supported)",
         )
 
-    prov: providers.BaseProvider = provider_class(event)
+    tenant = None
+    if tenant_name is not None:
+        # an in-memory lookup, tenants are loaded at init and refreshed in the background
+        tenant = tenants.TENANTS.get(tenant_name)
+        if tenant is None:
+            logger.warning(f"Unknown tenant: {tenant_name}")
+            raise exceptions.RequestRejectedError(
+                constants.REJECT_UNKNOWN_TENANT, f"Unknown tenant: {tenant_name}"
+            )
+
+    prov: providers.BaseProvider = provider_class(event, tenant=tenant)
     logger.debug(f"Using provider: {prov.get_provider_name()}")
+    timer.lap(metrics.STAGE_PROVIDER)
+
+    body = prov.body
+    timer.lap(metrics.STAGE_DECODE)
+
+    # Header and format checks run before any HMAC or JWT work, and all of verification runs
+    # before the request can cost a DynamoDB read or an S3 write
+    verified = prov.verify()
+    timer.lap(metrics.STAGE_VERIFY)
+    if not verified:
+        timer.count(metrics.VERIFICATION_FAILURES)
+        raise exceptions.RequestRejectedError(
+            prov.rejection or constants.REJECT_INVALID_SIGNATURE, "Unable to verify request"
+        )
 
     event_id = prov.get_event_id()
-    if prov.is_duplicate(event_id):
+    timer.lap(metrics.STAGE_EVENT_ID)
+
+    duplicate = prov.is_duplicate(event_id)
+    timer.lap(metrics.STAGE_DEDUP)
+    if duplicate:
         logger.warning("Duplicate webhook request, replying with 200", event_id=event_id)
-        return Response(200)
+        timer.count(metrics.DUPLICATES)
+        return metrics.OUTCOME_DUPLICATE
 
-    now = datetime.now(tz=timezone.utc).replace(microsecond=0)
-    expires_at = now + timedelta(days=constants.EXPIRES_IN_DAYS)
-    arrived_at = now.isoformat().replace("+00:00", "Z")
-    if not event_id:
-        # if there is no unique event ID, use the arrival time
-        event_id = arrived_at
-
-    key = f"raw/{provider}/evt_{event_id}.json"
-    metadata = {
-        "event_id": str(event_id),
-        "arrived_at": str(arrived_at),
-        "provider": provider,
-        "expires_at": str(math.floor(expires_at.timestamp())),
-    }
+    outcome = metrics.OUTCOME_STORED
     try:
-        obj = s3.put_object(key, event.decoded_body, metadata)
+        if ingest.INGEST_MODE == constants.INGEST_MODE_QUEUE:
+            # Persisted by the queue consumer, or directly when too large for a message
+            if ingest.enqueue_webhook(provider, event_id, body, timer, tenant_name):
+                outcome = metrics.OUTCOME_QUEUED
+        else:
+            persistence.store_webhook(provider, event_id, body, timer, tenant=tenant_name)
+    except exceptions.DuplicateItemError:
+        logger.warning("Duplicate webhook request, replying with 200", event_id=event_id)
+        timer.count(metrics.DUPLICATES)
+        prov.mark_seen(event_id)
+        return metrics.OUTCOME_DUPLICATE
+    except exceptions.ClaimPendingError:
+        # Not stored yet, so the provider must retry rather than see a success
+        logger.warning("Webhook request is being stored by another request", event_id=event_id)
+        raise ServiceError(409, "Request is already being processed")
+    except exceptions.SQSSendError:
+        raise InternalServerError("Failed to enqueue request")
     except exceptions.S3PutError:
         raise InternalServerError("Failed to store request payload")
-
-    item = {
-        constants.PARTITION_KEY: provider.upper(),
-        constants.SORT_KEY: event_id,
-        "arrived_at": arrived_at,
-        "provider": provider,
-        "s3": {
-            "bucket": obj.bucket,
-            "key": obj.key,
-            "version_id": obj.version_id,
-        },
-        "gsi1pk": "PENDING",
-        "gsi1sk": arrived_at,
-        "expires_at": math.floor(expires_at.timestamp()),
-    }
-    try:
-        dynamodb.put_item(item)
     except exceptions.DynamoDBWriteError:
-        # Remove previously uploaded S3 object
-        try:
-            s3.delete_object(obj.key, obj.version_id)
-        except exceptions.S3DeleteError:
-            pass
         raise InternalServerError("Failed to store request metadata")
 
-    return Response(200)
+    prov.mark_seen(event_id)
+    return outcome
+
+
+# Rejections that are not about authentication
+_BAD_REQUEST_REASONS = (
+    constants.REJECT_MISSING_BODY,
+    constants.REJECT_UNKNOWN_PROVIDER,
+    constants.REJECT_UNKNOWN_TENANT,
+)
+
+
+def _known(provider: str) -> Optional[str]:
+    return provider if provider in providers.PROVIDER_CLASSES else None
@@ -0,0 +1,462 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Serves the webhook router from a long-running, pre-forked HTTP server, for running on
+# containers instead of Lambda:
+#
+#     python -m app.server --port 8080 --workers 4
+#
+# Requests are converted to the API Gateway HTTP API (v2) events Lambda receives, so routing,
+# verification and persistence are unchanged. The Powertools resolver keeps the current event in
+# a class attribute and the metric set is module-wide, so each worker resolves one request at a
+# time: connections are read and written on threads, and throughput scales with workers.
+
+import argparse
+import base64
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+import uuid
+
+from aws_lambda_powertools import Logger
+
+from app import constants
+
+__all__ = ["RequestContext", "WebhookServer", "build_event", "run"]
+
+logger = Logger(use_rfc3339=True, utc=True)
+
+# Longest chunk size or trailer line accepted, as http.server limits header lines
+_MAX_LINE = 65536
+
+HOST = os.getenv(constants.ENV_SERVER_HOST, constants.SERVER_HOST)
+PORT = int(os.getenv(constants.ENV_SERVER_PORT, constants.SERVER_PORT))
+WORKERS = int(os.getenv(constants.ENV_SERVER_WORKERS, os.cpu_count() or 1))
+MAX_BODY_BYTES = int(
+    os.getenv(constants.ENV_SERVER_MAX_BODY_BYTES, constants.SERVER_MAX_BODY_BYTES)
+)
+KEEP_ALIVE = float(os.getenv(constants.ENV_SERVER_KEEP_ALIVE, constants.SERVER_KEEP_ALIVE))
+GRACEFUL_TIMEOUT = float(
+    os.getenv(constants.ENV_SERVER_GRACEFUL_TIMEOUT, constants.SERVER_GRACEFUL_TIMEOUT)
+)
+
+
+@dataclass(slots=True)
+class RequestContext:
+    """
+    Stands in for the Lambda context passed to the resolver
+    """
+
+    aws_request_id: str
+    function_name: str = "webhook-server"
+    memory_limit_in_mb: int = 0
+    invoked_function_arn: str = ""
+
+    def get_remaining_time_in_millis(self) -> int:
+        return int(GRACEFUL_TIMEOUT * 1000)
+
+
+def build_event(
+    method: str,
+    target: str,
+    headers: List[Tuple[str, str]],
+    body: bytes,
+    source_ip: str,
+    request_id: str,
+) -> Dict[str, Any]:
+    """
+    Build the API Gateway HTTP API (v2) event for a request, as the $default route would
+    """
+    url = urlsplit(target)
+    merged: Dict[str, str] = {}
+    cookies: List[str] = []
+    for name, value in headers:
+        name = name.lower()
+        if name == "cookie":
+            cookies.extend(cookie.strip() for cookie in value.split(";"))
+        elif name in merged:
+            merged[name] = f"{merged[name]},{value}"
+        else:
+            merged[name] = value
+
+    try:
+        text, encoded = body.decode("utf-8"), False
+    except UnicodeDecodeError:
+        text, encoded = base64.b64encode(body).decode(), True
+
+    now = time.time()
+    event: Dict[str, Any] = {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": url.path,
+        "rawQueryString": url.query,
+        "headers": merged,
+        "requestContext": {
+            "http": {
+                "method": method,
+                "path": url.path,
+                "protocol": "HTTP/1.1",
+                "sourceIp": source_ip,
+                "userAgent": merged.get("user-agent", ""),
+            },
+            "requestId": request_id,
+            "routeKey": "$default",
+            "stage": "$default",
+            "time": time.strftime("%d/%b/%Y:%H:%M:%S +0000", time.gmtime(now)),
+            "timeEpoch": int(now * 1000),
+        },
+        "body": text,
+        "isBase64Encoded": encoded,
+    }
+    if cookies:
+        event["cookies"] = cookies
+    if url.query:
+        parameters: Dict[str, str] = {}
+        for name, value in parse_qsl(url.query, keep_blank_values=True):
+            parameters[name] = f"{parameters[name]},{value}" if name in parameters else value
+        event["queryStringParameters"] = parameters
+    return event
+
+
+class WebhookRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+    server: "WebhookServer"
+
+    def setup(self) -> None:
+        # idle keep-alive connections are closed once the socket times out
+        self.timeout = self.server.keep_alive
+        super().setup()
+
+    def do_GET(self) -> None:
+        self._dispatch()
+
+    do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = do_GET
+
+    def _dispatch(self) -> None:
+        # the body is left unread when it is rejected, so the connection can't be reused
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            try:
+                body = self._read_chunked(self.server.max_body_bytes)
+            except ValueError:
+                return self._reply_error(HTTPStatus.BAD_REQUEST, unread=True)
+            if body is None:
+                return self._reply_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, unread=True)
+        else:
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                return self._reply_error(HTTPStatus.BAD_REQUEST, unread=True)
+            if length > self.server.max_body_bytes:
+                return self._reply_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, unread=True)
+            body = self.rfile.read(length) if length else b""
+
+        request_id = str(uuid.uuid4())
+        event = build_event(
+            self.command,
+            self.path,
+            self.headers.items(),
+            body,
+            self.client_address[0],
+            request_id,
+        )
+        try:
+            response = self.server.resolve(event, RequestContext(request_id))
+        except Exception:
+            # API Gateway answers 500 when the function fails
+            logger.exception("Unable to resolve request", request_id=request_id)
+            return self._reply_error(HTTPStatus.INTERNAL_SERVER_ERROR)
+        self._reply(response)
+
+    def _reply(self, response: Dict[str, Any]) -> None:
+        body = response.get("body") or ""
+        data = base64.b64decode(body) if response.get("isBase64Encoded") else body.encode()
+
+        self.send_response(response["statusCode"])
+        for name, value in (response.get("headers") or {}).items():
+            for item in value if isinstance(value, list) else [value]:
+                self.send_header(name, str(item))
+        for name, values in (response.get("multiValueHeaders") or {}).items():
+            for item in values:
+                self.send_header(name, str(item))
+        for cookie in response.get("cookies") or []:
+            self.send_header("Set-Cookie", str(cookie))
+        self.send_header("Content-Length", str(len(data)))
+        if self.server.stopping.is_set():
+            self.close_connection = True
+            self.send_header("Connection", "close")
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _read_chunked(self, max_bytes: int) -> Optional[bytes]:
+        """
+        Read a chunked body, or return None once it is larger than `max_bytes`.
+
+        Raises ValueError when the body is not validly chunked.
+        """
+        chunks: List[bytes] = []
+        total = 0
+        while True:
+            line = self._read_line()
+            # chunk extensions are ignored
+            size = int(line.split(b";", 1)[0], 16)
+            if size < 0:
+                raise ValueError(f"Invalid chunk size: {size}")
+            if not size:
+                break
+            total += size
+            if total > max_bytes:
+                return None
+            chunk = self.rfile.read(size)
+            if len(chunk) < size or self._read_line().strip():
+                raise ValueError("Truncated chunk")
+            chunks.append(chunk)
+
+        # trailers are discarded
+        while self._read_line().strip():
+            pass
+        return b"".join(chunks)
+
+    def _read_line(self) -> bytes:
+        line = self.rfile.readline(_MAX_LINE + 1)
+        if len(line) > _MAX_LINE or not line.endswith(b"\n"):
+            raise ValueError("Line too long or truncated")
+        return line
+
+    def _reply_error(self, status: HTTPStatus, unread: bool = False) -> None:
+        self.close_connection = True
+        self.send_error(status)
+        if unread:
+            self._linger()
+
+    def _linger(self) -> None:
+        # Closing a socket with unread data resets the connection, and the reset can discard
+        # the response before the client reads it. Instead, stop sending and read what the client
+        # still sends for a while, so a client that writes its whole body first sees the error.
+        deadline = time.monotonic() + constants.SERVER_LINGER_TIMEOUT
+        try:
+            self.connection.shutdown(socket.SHUT_WR)
+            while (remaining := deadline - time.monotonic()) > 0:
+                self.connection.settimeout(remaining)
+                if not self.rfile.read1(_MAX_LINE):
+                    break
+        except OSError:
+            pass
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format % args, client=self.client_address[0])
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """
+    One worker: accepts connections on a listening socket shared with the other workers, and
+    resolves one request at a time
+    """
+
+    daemon_threads = False  # server_close() waits for in-flight requests
+    block_on_close = True
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        handler: Callable[[Dict[str, Any], Any], Dict[str, Any]],
+        max_body_bytes: int = MAX_BODY_BYTES,
+        keep_alive: float = KEEP_ALIVE,
+    ) -> None:
+        super().__init__(sock.getsockname()[:2], WebhookRequestHandler, bind_and_activate=False)
+        self.socket = sock
+        self.handler = handler
+        self.max_body_bytes = max_body_bytes
+        self.keep_alive = keep_alive
+        self.stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def resolve(self, event: Dict[str, Any], context: RequestContext) -> Dict[str, Any]:
+        with self._lock:
+            return self.handler(event, context)
+
+    def stop(self) -> None:
+        """
+        Stop accepting connections, and close kept-alive ones after their current request
+        """
+        self.stopping.set()
+        threading.Thread(target=self.shutdown, name="shutdown", daemon=True).start()
+
+
+def _worker(sock: socket.socket, max_body_bytes: int, keep_alive: float) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent forwards Ctrl+C as SIGTERM
+
+    # App modules create their clients at import, and are imported after the fork so that no
+    # worker shares a connection opened by another process
+    from aws_lambda_powertools.event_handler import APIGatewayHttpResolver
+
+    from app import metrics, priming, routers
+
+    api = APIGatewayHttpResolver()
+    api.include_router(routers.webhook_router)
+
+    # workers are long-running, so unless disabled priming keeps setup off the first request
+    if priming.PRIME_ON_INIT != constants.PRIME_NEVER:
+        try:
+            priming.prime()
+        except Exception:
+            logger.exception("Unable to prime")
+
+    server = WebhookServer(sock, metrics.log_metrics(api.resolve), max_body_bytes, keep_alive)
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def _spawn(sock: socket.socket, max_body_bytes: int, keep_alive: float) -> int:
+    # Signals are held across the fork, so the parent's handlers never run in the worker
+    held = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM, signal.SIGINT})
+    pid = os.fork()
+    if pid:
+        signal.pthread_sigmask(signal.SIG_SETMASK, held)
+        return pid
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.pthread_sigmask(signal.SIG_SETMASK, held)
+
+    status = 0
+    try:
+        _worker(sock, max_body_bytes, keep_alive)
+    except BaseException:
+        logger.exception("Worker failed")
+        status = 1
+    finally:
+        os._exit(status)
+
+
+def run(
+    host: str = HOST,
+    port: int = PORT,
+    workers: int = WORKERS,
+    max_body_bytes: int = MAX_BODY_BYTES,
+    keep_alive: float = KEEP_ALIVE,
+    graceful_timeout: float = GRACEFUL_TIMEOUT,
+    ready: Optional[Callable[[int], None]] = None,
+) -> None:
+    """
+    Fork `workers` processes serving on host:port, restart any that exit, and on SIGTERM or
+    SIGINT give them `graceful_timeout` seconds to finish their requests.
+
+    Raises RuntimeError once workers exit more than SERVER_MAX_RESTARTS times within
+    SERVER_RESTART_WINDOW seconds, after stopping the others.
+    """
+    sock = socket.create_server((host, port), backlog=1024)
+    port = sock.getsockname()[1]
+
+    children = {_spawn(sock, max_body_bytes, keep_alive) for _ in range(workers)}
+    logger.info("Listening", host=host, port=port, workers=workers)
+    if ready:
+        ready(port)
+
+    deadline: List[float] = []
+    restarts: List[float] = []  # when recent restarts were scheduled
+    pending: List[float] = []  # when restarts waiting out their backoff are due
+    failed = False
+
+    def stop(signum: int, frame: Any) -> None:
+        if not deadline:
+            deadline.append(time.monotonic() + graceful_timeout)
+            for pid in list(children):
+                os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children or (pending and not deadline):
+        pid, status = os.waitpid(-1, os.WNOHANG) if children else (0, 0)
+        if not pid:
+            now = time.monotonic()
+            while pending and pending[0] <= now and not deadline:
+                pending.pop(0)
+                children.add(_spawn(sock, max_body_bytes, keep_alive))
+            if deadline and now > deadline[0]:
+                logger.warning("Workers did not stop in time", pids=sorted(children))
+                for pid in list(children):
+                    os.kill(pid, signal.SIGKILL)
+                deadline[0] = float("inf")
+            time.sleep(0.1)
+            continue
+
+        children.discard(pid)
+        if deadline:
+            continue
+
+        now = time.monotonic()
+        restarts = [at for at in restarts if now - at < constants.SERVER_RESTART_WINDOW]
+        if len(restarts) >= constants.SERVER_MAX_RESTARTS:
+            logger.error("Workers keep exiting, stopping", pid=pid, status=status)
+            failed = True
+            stop(signal.SIGTERM, None)
+            continue
+
+        delay = constants.SERVER_RESTART_BACKOFF * 2 ** len(restarts)
+        logger.warning("Worker exited, restarting", pid=pid, status=status, delay=delay)
+        restarts.append(now)
+        pending.append(now + delay)
+        pending.sort()
+
+    sock.close()
+    if failed:
+        raise RuntimeError("Workers keep exiting")
+    logger.info("Stopped")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve webhooks from a long-running server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("-w", "--workers", type=int, default=WORKERS)
+    parser.add_argument("--max-body-bytes", type=int, default=MAX_BODY_BYTES)
+    parser.add_argument("--keep-alive", type=float, default=KEEP_ALIVE)
+    parser.add_argument("--graceful-timeout", type=float, default=GRACEFUL_TIMEOUT)
+    args = parser.parse_args(argv)
+
+    run(
+        args.host,
+        args.port,
+        args.workers,
+        args.max_body_bytes,
+        args.keep_alive,
+        args.graceful_timeout,
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
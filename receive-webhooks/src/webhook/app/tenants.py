@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+from dataclasses import dataclass, field
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Mapping, Optional, Tuple, Type
+
+from aws_lambda_powertools import Logger
+
+from app import constants, exceptions, resources
+from app.providers.base import ProviderCredentials
+
+if TYPE_CHECKING:
+    from app.providers.base import BaseProvider
+
+__all__ = ["Tenant", "TenantIndex", "TENANTS"]
+
+logger = Logger(child=True)
+
+TENANT_SOURCE = os.getenv(constants.ENV_TENANT_SOURCE, constants.TENANT_SOURCE_NONE)
+TENANT_PARAMETER_PATH = os.getenv(
+    constants.ENV_TENANT_PARAMETER_PATH, constants.TENANT_PARAMETER_PATH
+)
+TENANT_REFRESH = float(os.getenv(constants.ENV_TENANT_REFRESH, constants.TENANT_REFRESH))
+
+
+@dataclass(slots=True, frozen=True)
+class Tenant:
+    """
+    Credentials of one tenant, in the same shape as the shared credentials parameter
+    """
+
+    name: str
+    # SSM parameter version or item version, so unchanged tenants are kept as-is on refresh
+    version: str
+    parameter: Mapping[str, Any]
+    _credentials: Dict[Type["BaseProvider"], ProviderCredentials] = field(
+        default_factory=dict, compare=False, repr=False
+    )
+
+    def credentials(self, provider: Type["BaseProvider"]) -> ProviderCredentials:
+        """
+        Return the tenant's key material for a provider, decoded on first use
+        """
+        credentials = self._credentials.get(provider)
+        if credentials is None:
+            credentials = ProviderCredentials.build(self.parameter, provider)
+            self._credentials[provider] = credentials
+        return credentials
+
+
+class TenantIndex:
+    """
+    Immutable in-memory index of tenant credentials by name.
+
+    Every tenant is bulk loaded at init and re-listed on a background thread every `refresh`
+    seconds. A refresh builds a new index, reusing the Tenant of every unchanged version, and
+    swaps it in with a single assignment, so lookups are a dict lookup with no lock and no
+    network call.
+    """
+
+    def __init__(self, source: str, path: str, refresh: float) -> None:
+        self.source = source
+        self.path = path.rstrip("/") + "/"
+        self.refresh = refresh
+        self._tenants: Mapping[str, Tenant] = MappingProxyType({})
+        self._loaded_at: Optional[float] = None
+        self._refreshing = False
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    @property
+    def enabled(self) -> bool:
+        return self.source != constants.TENANT_SOURCE_NONE
+
+    def get(self, name: str) -> Optional[Tenant]:
+        if not self.enabled:
+            return None
+
+        loaded_at = self._loaded_at
+        stale = loaded_at is None or time.monotonic() - loaded_at >= self.refresh
+        if stale and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._refresh, name="tenants", daemon=True).start()
+
+        return self._tenants.get(name)
+
+    def load(self) -> Dict[str, int]:
+        """
+        List every tenant and swap in the new index, returning what changed
+        """
+        current = self._tenants
+        tenants: Dict[str, Tenant] = {}
+        changed = 0
+        for name, version, parameter in self._list():
+            if not name or "/" in name or "#" in name:
+                logger.warning("Skipping invalid tenant name", tenant=name)
+                continue
+            tenant = current.get(name)
+            if tenant is None or tenant.version != version:
+                tenant = Tenant(name, version, MappingProxyType(parameter))
+                changed += 1
+            tenants[name] = tenant
+
+        self._tenants = MappingProxyType(tenants)
+        self._loaded_at = time.monotonic()
+        stats = {
+            "tenants": len(tenants),
+            "changed": changed,
+            "removed": len(current.keys() - tenants.keys()),
+        }
+        logger.info("Loaded tenants", source=self.source, **stats)
+        return stats
+
+    def clear(self) -> None:
+        self._tenants = MappingProxyType({})
+        self._loaded_at = None
+
+    def _refresh(self) -> None:
+        try:
+            self.load()
+        except Exception:
+            # keep serving the current index, the next request past the interval retries
+            logger.exception("Unable to refresh tenants")
+            self._loaded_at = time.monotonic()
+        finally:
+            self._refreshing = False
+
+    def _list(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        if self.source == constants.TENANT_SOURCE_SSM:
+            return self._list_parameters()
+        if self.source == constants.TENANT_SOURCE_DYNAMODB:
+            return self._list_items()
+        raise ValueError(f"Unknown tenant source: {self.source}")
+
+    def _list_parameters(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        client = resources.get_client("ssm")
+        params: Dict[str, Any] = {
+            "Path": self.path,
+            "Recursive": False,
+            "WithDecryption": True,
+            "MaxResults": 10,
+        }
+        while True:
+            try:
+                response = client.get_parameters_by_path(**params)
+            except resources.AWS_ERRORS as error:
+                logger.exception("Unable to list tenant parameters", error)
+                raise exceptions.SSMReadError("Unable to list tenant parameters")
+
+            for parameter in response.get("Parameters", []):
+                name = parameter["Name"][len(self.path) :]
+                try:
+                    value = json.loads(parameter["Value"])
+                except ValueError:
+                    logger.warning("Skipping tenant parameter that is not JSON", tenant=name)
+                    continue
+                yield name, str(parameter["Version"]), value
+
+            if not response.get("NextToken"):
+                return
+            params["NextToken"] = response["NextToken"]
+
+    def _list_items(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        dynamodb = resources.DynamoDB()
+        start_key = None
+        while True:
+            items, start_key = dynamodb.query(
+                (constants.PARTITION_KEY, constants.TENANT_PARTITION), start_key=start_key
+            )
+            for item in items:
+                yield item[constants.SORT_KEY], str(item.get("version", 0)), item["credentials"]
+            if not start_key:
+                return
+
+
+TENANTS = TenantIndex(TENANT_SOURCE, TENANT_PARAMETER_PATH, TENANT_REFRESH)
+if TENANTS.enabled:
+    try:
+        TENANTS.load()
+    except Exception:
+        # tenant routes are rejected until a background refresh succeeds
+        logger.exception("Unable to load tenants")
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+* Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+* SPDX-License-Identifier: MIT-0
+*
+* Permission is hereby granted, free of charge, to any person obtaining a copy of this
+* software and associated documentation files (the "Software"), to deal in the Software
+* without restriction, including without limitation the rights to use, copy, modify,
+* merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+* permit persons to whom the Software is furnished to do so.
+*
+* THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+* INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+* PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+* HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+* OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+* SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import importlib
+import itertools
+import math
+import os
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from aws_lambda_powertools import Logger
+import boto3
+
+from app import constants, exceptions, persistence, resources
+
+__all__ = ["HANDLERS", "register_handler", "load_handlers", "process_pending", "process_item"]
+
+logger = Logger(child=True)
+
+session = boto3._get_default_session()
+dynamodb = resources.DynamoDB(session)
+
+WORKER_LEASE = int(os.getenv(constants.ENV_WORKER_LEASE, constants.WORKER_LEASE))
+
+# Shared across invocations so warm containers reuse the worker threads
+EXECUTOR = ThreadPoolExecutor(max_workers=constants.WORKER_MAX_WORKERS, thread_name_prefix="worker")
+
+# Called with the stored item and its raw payload; raising marks the attempt as failed
+Handler = Callable[[Dict[str, Any], bytes], None]
+
+HANDLERS: Dict[str, Handler] = {}
+
+# Lease bookkeeping removed once an item leaves the pending state
+LEASE_ATTRIBUTES = ["lease_owner", "lease_expires_at"]
+
+
+def register_handler(provider: str) -> Callable[[Handler], Handler]:
+    """
+    Decorator registering the handler for a provider's pending webhooks
+    """
+
+    def decorator(handler: Handler) -> Handler:
+        HANDLERS[provider] = handler
+        return handler
+
+    return decorator
+
+
+def load_handlers(spec: Optional[str]) -> None:
+    """
+    Register handlers from a comma-separated list of "provider=module:function" entries
+    """
+    for entry in filter(None, (entry.strip() for entry in (spec or "").split(","))):
+        provider, _, target = entry.partition("=")
+        module_name, _, function_name = target.partition(":")
+        module = importlib.import_module(module_name)
+        register_handler(provider.strip())(getattr(module, function_name))
+
+
+def log_handler(item: Dict[str, Any], payload: bytes) -> None:
+    logger.info(
+        "Processed webhook",
+        provider=item.get("provider"),
+        event_id=item.get(constants.SORT_KEY),
+        size=len(payload),
+    )
+
+
+def process_pending(worker_id: str, deadline: float = math.inf) -> Dict[str, int]:
+    """
+    Read all shards of the pending index, oldest first, processing items in parallel until the
+    index is drained or the deadline (time.monotonic()) passes. Returns the number of items per
+    outcome.
+    """
+    stats: Dict[str, int] = {}
+    # The unsharded partition holds items written before the index was sharded
+    partitions = [constants.STATUS_PENDING, *persistence.pending_shards()]
+    items = dynamodb.query_all(
+        constants.PENDING_PARTITION_KEY,
+        partitions,
+        constants.PENDING_SORT_KEY,
+        index_name=constants.PENDING_INDEX,
+        limit=constants.WORKER_PAGE_SIZE,
+    )
+
+    try:
+        while time.monotonic() < deadline:
+            batch = itertools.islice(items, constants.WORKER_PAGE_SIZE)
+            keys = [_key_of(item) for item in batch]
+            if not keys:
+                break
+
+            # Workers reading the same items start claiming at different ones
+            random.shuffle(keys)
+            for outcome in EXECUTOR.map(lambda key: process_item(key, worker_id), keys):
+                stats[outcome] = stats.get(outcome, 0) + 1
+    finally:
+        items.close()
+
+    return stats
+
+
+def process_item(key: Dict[str, Any], worker_id: str) -> str:
+    """
+    Claim a pending item, dispatch its payload to the provider's handler and record the result.
+    Returns the resulting status, or "skipped" when another worker holds the item.
+    """
+    item = _claim(key, worker_id)
+    if item is None:
+        return "skipped"
+
+    handler = HANDLERS.get(item.get("provider", ""), log_handler)
+    try:
+        handler(item, persistence.read_payload(item))
+    except Exception as error:
+        logger.exception("Unable to process webhook", key=key)
+        return _release(item, worker_id, error)
+
+    return _complete(key, worker_id)
+
+
+def _claim(key: Dict[str, Any], worker_id: str) -> Optional[Dict[str, Any]]:
+    now = time.time()
+    try:
+        return dynamodb.update_item(
+            key,
+            {
+                "status": constants.STATUS_PROCESSING,
+                "lease_owner": worker_id,
+                "lease_expires_at": math.floor(now + WORKER_LEASE),
+            },
+            increment={"attempts": 1},
+            # still pending, and either never leased or its lease has expired
+            condition=(
+                "begins_with(#gsi1pk, :pending) "
+                "AND (attribute_not_exists(#lease) OR #lease < :now)"
+            ),
+            names={"#gsi1pk": constants.PENDING_PARTITION_KEY, "#lease": "lease_expires_at"},
+            values={":pending": constants.STATUS_PENDING, ":now": math.floor(now)},
+            return_values=True,
+        )
+    except exceptions.ConditionFailedError:
+        return None
+    except exceptions.DynamoDBWriteError:
+        logger.warning("Unable to claim item", key=key)
+        return None
+
+
+def _complete(key: Dict[str, Any], worker_id: str) -> str:
+    # Dropping the index keys takes the item out of the sparse pending index
+    return _finish(
+        key,
+        worker_id,
+        {
+            "status": constants.STATUS_DONE,
+            "processed_at": _timestamp(),
+        },
+        [constants.PENDING_PARTITION_KEY, constants.PENDING_SORT_KEY, *LEASE_ATTRIBUTES],
+    )
+
+
+def _release(item: Dict[str, Any], worker_id: str, error: Exception) -> str:
+    key = _key_of(item)
+    attempts = int(item.get("attempts", 1))
+    if attempts >= constants.WORKER_MAX_ATTEMPTS:
+        return _finish(
+            key,
+            worker_id,
+            {
+                "status": constants.STATUS_FAILED,
+                constants.PENDING_PARTITION_KEY: constants.STATUS_FAILED,
+                "error": repr(error),
+            },
+            LEASE_ATTRIBUTES,
+        )
+
+    # Back off by keeping the item leased until the retry is due
+    retry_at = time.time() + constants.WORKER_RETRY_DELAY * attempts
+    return _finish(
+        key,
+        worker_id,
+        {
+            "status": constants.STATUS_PENDING,
+            "lease_expires_at": math.floor(retry_at),
+            "error": repr(error),
+        },
+        ["lease_owner"],
+    )
+
+
+def _finish(
+    key: Dict[str, Any], worker_id: str, attributes: Dict[str, Any], remove: List[str]
+) -> str:
+    try:
+        # Only the current lease holder may move the item on
+        dynamodb.update_item(
+            key,
+            attributes,
+            remove=remove,
+            condition="#owner = :owner",
+            names={"#owner": "lease_owner"},
+            values={":owner": worker_id},
+        )
+    except exceptions.ConditionFailedError:
+        logger.warning("Lease lost before the item was updated", key=key)
+        return "lost"
+    except exceptions.DynamoDBWriteError:
+        # the lease expires and another worker picks the item up again
+        return "lost"
+
+    return attributes["status"]
+
+
+def _key_of(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        constants.PARTITION_KEY: item[constants.PARTITION_KEY],
+        constants.SORT_KEY: item[constants.SORT_KEY],
+    }
+
+
+def _timestamp() -> str:
+    return datetime.now(tz=timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+load_handlers(os.getenv(constants.ENV_WORKER_HANDLERS))